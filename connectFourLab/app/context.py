@@ -1,9 +1,8 @@
 import os, sys
-import inspect
 import json
 from importlib import import_module
 from kivy.lang import Builder
-from ..game.agents import AgentBase, AgentHuman, AgentRandom
+from ..game.agents import find_agents
 
 __ICON_FILE_NAME__ = 'icon.ico'
 __APPLICATION_TITLE__ = 'CONNECT FOUR LAB'
@@ -15,9 +14,7 @@ __DIR__ = os.path.dirname(__file__)
 
 _images_dir = 'images'
 _screens_dir = 'screens'
-_agents_package = 'connectFourLab.game.agents'
 _trainer_package = 'connectFourLab.game.trainers'
-_agents_dir_relative_path = '../game/agents'
 _trainers_dir_relative_path = '../game/trainers'
 _models_dir_relative_path = '../game/models'
 
@@ -58,32 +55,7 @@ def get_agents():
 
 def load_agents():
     global __AGENTS__
-
-    agents_path = os.path.join(__DIR__, _agents_dir_relative_path)
-    agents = [AgentHuman,AgentRandom]
-    names = [AgentHuman.__name__, AgentRandom.__name__]
-
-    for file_name in os.listdir(agents_path):
-        if not file_name.endswith('.py'):
-            continue
-        elif file_name == 'basicAgents.py' or file_name == '__init__.py':
-            continue
-        else:
-            module_name = file_name[:-3]
-        
-        absolute_module = _agents_package + '.' + module_name
-        module = import_module(absolute_module)
-
-        for name, obj in inspect.getmembers(module):
-            if name.startswith('Agent') \
-                and name != AgentBase.__name__ \
-                and inspect.isclass(obj) \
-                and obj.__name__ not in names:
-
-                names.append(obj.__name__)
-                agents.append(obj)
-    
-    __AGENTS__ = agents
+    __AGENTS__ = find_agents()
 
 def load_trainer_module(module):
     absolute_module = _trainer_package + '.' + module
@@ -286,7 +286,7 @@ class Board(RelativeLayout, GameLogic):
 
     @mainthread
     def _initialize_board(self):
-        empty_board = np.zeros((7,6), dtype=int)
+        empty_board = np.zeros(self.BOARD_FORMAT, dtype=self.BOARD_DTYPE)
         self._load_scenario(empty_board)
 
     
@@ -1 +1,33 @@
-from .basicAgents import AgentBase, AgentRandom, AgentHuman
\ No newline at end of file
+import os
+import inspect
+from importlib import import_module
+from .basicAgents import AgentBase, AgentRandom, AgentHuman
+
+
+def find_agents():
+    """Return the classes of all the agents of this package
+
+    Every module in the `agents/` directory is imported and the
+    classes named `Agent...` are collected, `AgentHuman` and
+    `AgentRandom` are the first ones.
+    """
+    agents = [AgentHuman, AgentRandom]
+    names = [AgentHuman.__name__, AgentRandom.__name__]
+
+    for file_name in sorted(os.listdir(os.path.dirname(__file__))):
+        if not file_name.endswith('.py'):
+            continue
+        elif file_name == 'basicAgents.py' or file_name == '__init__.py':
+            continue
+
+        module = import_module(__name__ + '.' + file_name[:-3])
+        for name, obj in inspect.getmembers(module):
+            if name.startswith('Agent') \
+                and name != AgentBase.__name__ \
+                and inspect.isclass(obj) \
+                and obj.__name__ not in names:
+
+                names.append(obj.__name__)
+                agents.append(obj)
+
+    return agents
@@ -1,7 +1,7 @@
 """Basic Agents"""
 import time
 import random
-from copy import deepcopy
+import numpy as np
 from .strategies import RandomStrategy
 from ..exceptions import BadImplementation
 
@@ -33,6 +33,21 @@ class AgentBase:
         
         (*) - only necessary in the `app` interface
 
+    # The board
+        The `board` given to `action` is a read-only view of the
+        board of the game (no copies each turn), use `clone` to get
+        a copy which can be modified. The ids in the board are the
+        ids of the game, to see the board from the perspective of
+        the agent (its id is 1) use `clone` or load a `Position`
+        with `perspective=self.id`.
+
+    ```python
+    def action(self, board):
+        position = Position(board, perspective=self.id)
+        # search the position and make a choice...
+        return choice
+    ```
+
     # Saving the data
         You can easily save the data from all turns of the game
         using `save` all data will be saved separately in:
@@ -47,6 +62,12 @@ class AgentBase:
         self.save(board, choice)
         return choice
     ```
+    # Batches of boards
+        `actions` chooses a column for each board of a stack,
+        used by `VecRunGame` to play many games at once. By default
+        it calls `action` for each board, agents which can evaluate
+        many boards at once override it.
+
     # Exception
         BadImplementation: some class didn't implemented the
             required method(s)
@@ -97,6 +118,22 @@ class AgentBase:
             self.turn = turn
             self.clock = timer
 
+    def actions(self, boards):
+        """Choose a column for each board of a stack
+
+        The boards are not finished games and the agent plays the
+        next move in all of them. Override it to evaluate all the
+        boards at once, the overridden versions don't `save` the
+        turns.
+
+        # Arguments
+            boards: array (N,7,7), required
+
+        # Return
+            int array (N,), the chosen columns
+        """
+        return np.array([self.action(board) for board in boards], dtype=int)
+
     def clean(self):
         """Clean all the saved data"""
         self.data_action = []
@@ -104,7 +141,8 @@ class AgentBase:
         self.data_reward = []
 
     def save(self, board, column, reward=0):
-        """Save the data of a played turn
+        """Save the data of a played turn, the board is saved from
+        the perspective of the agent (see `clone`), its id is 1
         
         # Arguments
             board: matrix, required, current board
@@ -112,45 +150,36 @@ class AgentBase:
             reward: float, optional
                 - attributed reward for the chosen column
         """
-        self.data_scenario.append(deepcopy(board))
+        self.data_scenario.append(self.clone(board))
         self.data_action.append(column)
         self.data_reward.append(reward)
 
-    def switch_ids(self, board):
-        """Switch the player's id IN THE BOARD to 1
-        
-        If this agent id is -1, it will modify the board
-        and change de player's id to 1, the enemy id will be
-        changed to -1.
+    def clone(self, board, perspective=True):
+        """Return a writable copy of a board
+
+        The boards given to `action` are read-only views of the
+        board of the game, the agents which modify the board
+        work on a clone.
 
-        Useful to save the data in a pattern. Example, when
-        running two agents against each other, the agents
-        will have a diferent id (1 and -1), but the saved
-        data will represent a single agents id 1
+        # Arguments
+            board: matrix, required
+            perspective: bool, optional, default `True`
+                - if `True` and the id of this agent is -1 the ids
+                    are switched in the copy, the agent is always
+                    the player id 1
 
-        Also, applying this method before the logic, your code
-        can always treat your id as 1 when analysing the board
+        # Example
 
         ```python
         def action(self, board):
-            self.switch_ids(board)
-            # analyse the board and make a choice...
-            self.save(board, choice)
-            return choice
+            board = self.clone(board)
+            # analyse and modify the board...
         ```
         """
-        if self.id == -1:
-            for i, _ in enumerate(board):
-                for j, id in enumerate(_):
-                    if id == 1:
-                        board[i,j] = 3
-                    elif id == -1:
-                        board[i,j] = 1
-                        
-            for i, _ in enumerate(board):
-                for j, id in enumerate(_):
-                    if id == 3:
-                        board[i,j] = -1
+        board = np.array(board)
+        if perspective and self.id == -1:
+            board *= -1
+        return board
 
 
 class AgentHuman(AgentBase):
@@ -184,7 +213,9 @@ class AgentRandom(AgentBase, RandomStrategy):
         super().__init__()
 
     def action(self, board):
-        self.switch_ids(board)
         choice = self.random_choice(board)
         self.save(board, choice)
         return choice
+
+    def actions(self, boards):
+        return self.random_choices(boards)
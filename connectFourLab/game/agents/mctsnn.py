@@ -2,7 +2,8 @@
 import numpy as np
 from .monteCarlo import AgentMonteCarlo
 from .strategies import Node
-from .. import helpers
+from .. import inference
+from ..position import Position, WIDTH, HEIGHT
 from ..exceptions import MissingModel
 
 
@@ -16,9 +17,30 @@ class AgentMCTSNN(AgentMonteCarlo):
     This agent uses the Node `NodeMCTSNN` which evaluate the rollout
     score by predicting the board state in a trained model.
 
+    The leaves are evaluated `batch_size` at a time in a single
+    `model.predict` call (see `AgentMonteCarlo`), set it to 1
+    to evaluate one leaf at a time.
+
+    The evaluations are stored in the `evaluation_cache`, an
+    `EvaluationCache` shared by all the instances of the agent
+    (the entries are separated by the hash of the model weights),
+    so the same positions are not predicted again in the next turns
+    and games. Assign a new cache to change its size or `None` to
+    disable it. Only the `NumpyModel` evaluations are cached, the
+    weights of a Keras model can change while it is trained.
+
+    By default the model file is evaluated by a NumPy forward
+    pass (see [inference](../Game/inference)), Keras and TensorFlow
+    are not imported. The '.h5' file is exported to a '.npz' file
+    with the same name the first time it is loaded.
+
     # Arguments
-        model_file: str; path to the '.h5' model file;
-        model: str, loaded `keras.models.Model` object;
+        model_file: str; path to the '.h5' or '.npz' model file;
+        model: str, loaded `keras.models.Model` or `NumpyModel` object,
+            or an `InferenceClient` to evaluate the positions
+            in a shared `InferenceServer` process;
+        backend: str, optional, default 'numpy', how the
+            `model_file` is loaded, 'numpy' or 'keras'
 
     # Exceptions
         MissingModel: raise when creating a new instance, if
@@ -29,8 +51,10 @@ class AgentMCTSNN(AgentMonteCarlo):
     kind = 'Agent Kind'
     model_key = 'MCTSNN'
     require_nn_model = True
+    batch_size = 16
+    evaluation_cache = inference.EvaluationCache()
 
-    def __init__(self, model_file=None, model=None):
+    def __init__(self, model_file=None, model=None, backend='numpy'):
         super().__init__()
         
         self.model = None
@@ -38,6 +62,8 @@ class AgentMCTSNN(AgentMonteCarlo):
 
         if model:
             self.model = model
+        elif model_file and backend == 'numpy':
+            self.model = inference.load_model(model_file)
         elif model_file:
             import keras
             import tensorflow as tf
@@ -56,8 +82,51 @@ class AgentMCTSNN(AgentMonteCarlo):
                 return super().action(board)
         
 
+    def rollout_score(self, position):
+        """Evaluation of a `Position` in the `TreeStore`,
+        same as `NodeMCTSNN.rollout_score`"""
+        return self.rollout_scores([position])[0]
+
+    def rollout_scores(self, positions):
+        """Evaluation of many `Position` objects
+        in a single `model.predict` call, the positions
+        in the `evaluation_cache` are not predicted"""
+        cache, model_id = self._cache(), inference.model_id(self.model)
+        keys = [position.key() for position in positions]
+        scores = [None]*len(positions)
+        if cache is not None:
+            scores = [cache.get(model_id, key, position.color)
+                      for key, position in zip(keys, positions)]
+
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if not missing:
+            return scores
+
+        data_in = np.empty((len(missing), WIDTH*HEIGHT + 1), dtype=np.float32)
+        for row, i in enumerate(missing):
+            data_in[row, :-1] = positions[i].to_board().reshape(-1)
+            data_in[row, -1] = positions[i].color
+
+        evaluations = self.model.predict(data_in)[:, 0]
+        for i, evaluation in zip(missing, evaluations):
+            scores[i] = float(evaluation)
+            if cache is not None:
+                cache.put(model_id, keys[i], positions[i].color, scores[i])
+
+        return scores
+
     def create_root_node(self, board):
-        return NodeMCTSNN(self.model, board, self._memory)
+        return NodeMCTSNN(self.model, board, self._memory,
+                          table=self.transposition_table,
+                          cache=self._cache())
+
+    def _cache(self):
+        """Return the `evaluation_cache` or `None` if the
+        evaluations of the model can not be cached"""
+        if inference.model_id(self.model) is None:
+            return None
+
+        return self.evaluation_cache
 
     def start_timer(self, rule, max):
         super().start_timer(rule, 20)
@@ -65,28 +134,39 @@ class AgentMCTSNN(AgentMonteCarlo):
 
 class NodeMCTSNN(Node):
 
-    def __init__(self, model, *a, **kw):
+    def __init__(self, model, *a, cache=None, **kw):
         super().__init__(*a, **kw)
         self.model = model
+        self.cache = cache
 
     def new_node(self, board, column):
         node = NodeMCTSNN(model=self.model, 
                     board=board, 
                     parent=self, 
                     position=column, 
-                    color=-self.color)
+                    color=-self.color,
+                    cache=self.cache)
         return node
 
     def rollout_score(self):
-        winner = helpers.check_winner(self.board)
-        if winner:
-            return winner
+        if self.winner:
+            return self.winner
+
+        if self.cache is not None:
+            model_id = inference.model_id(self.model)
+            key = Position(self.board, self.color).key()
+            evaluation = self.cache.get(model_id, key, self.color)
+            if evaluation is not None:
+                return evaluation
 
         data_in = list(self.board.reshape(-1))
         data_in.append(self.color)
         board = np.array([data_in])
         evaluation = self.model.predict(board)[0][0]
 
+        if self.cache is not None:
+            self.cache.put(model_id, key, self.color, evaluation)
+
         # if self.color < 0:
         #     evaluation = -evaluation
 
@@ -6,8 +6,10 @@ from threading import Thread
 import random
 from copy import copy, deepcopy
 from .. import helpers
+from ..position import Position, HEIGHT, BITS_TABLE
 from . import AgentBase
 from .strategies import SimulationStrategy, TreeSearchStrategy, TimerStrategy, Node
+from .strategies import TreeStore
 
 
 class AgentSimulation(AgentBase, SimulationStrategy):
@@ -29,25 +31,23 @@ class AgentSimulation(AgentBase, SimulationStrategy):
     description = 'Simple simulation strategy (100 games per possibility)'
     kind = 'simulation'
     num_simulations = 100
-    childs = TreeSearchStrategy.childs
+    child_moves = TreeSearchStrategy.child_moves
 
     def action(self, board):
-        self.switch_ids(board)
-
         best_position = None
         best_value = -math.inf
 
-        nodes = self.childs(board)
+        game_position = Position(board, perspective=self.id)
+        columns = game_position.legal_columns()
 
-        if(len(nodes) == 1):
-            self.save(board, nodes[0][0])
-            return nodes[0][0]
+        if(len(columns) == 1):
+            self.save(board, columns[0])
+            return columns[0]
 
-        for position, node in nodes:
-            value = 0
-            
-            for _ in range(self.num_simulations):
-                value += self.simulate(node)
+        for position, _ in self.child_moves(game_position, columns):
+            wins, _, losses = self.simulate_batch(game_position,
+                                                  num_simulations=self.num_simulations)
+            value = wins - losses
 
             if value > best_value:
                 best_value = value
@@ -56,6 +56,31 @@ class AgentSimulation(AgentBase, SimulationStrategy):
         self.save(board, best_position)
         return best_position
 
+    def actions(self, boards):
+        """Batched `action`, the simulations of all the columns
+        of all the boards are played at once (see
+        `SimulationStrategy.simulate_positions`)"""
+        boards = np.asarray(boards)*self.id
+        bit_boards = helpers.bit_board_split_batch(boards)
+        heights = np.count_nonzero(boards, axis=2)
+        games, columns = np.nonzero(heights < HEIGHT)
+
+        # the agent (id 1) plays each legal column of each board
+        child_boards = bit_boards[games]
+        child_boards[:,0] |= BITS_TABLE[columns, heights[games, columns]]
+        child_heights = heights[games]
+        child_heights[np.arange(len(games)), columns] += 1
+
+        winners = self.simulate_positions(
+            np.repeat(child_boards, self.num_simulations, axis=0),
+            np.repeat(child_heights, self.num_simulations, axis=0),
+            np.full(len(games)*self.num_simulations, -1))
+        winners = winners.reshape(len(games), self.num_simulations)
+
+        values = np.full(heights.shape, -math.inf)
+        values[games, columns] = (winners == 1).sum(1) - (winners == -1).sum(1)
+        return values.argmax(1)
+
 
 class AgentSimulationTL(AgentBase, SimulationStrategy, TimerStrategy):
     """Simulation strategy with time management
@@ -73,23 +98,29 @@ class AgentSimulationTL(AgentBase, SimulationStrategy, TimerStrategy):
 
     In unlimited time games the agents takes the maximum of
     20 seconds per turn before returning the choice.
+
+    The games are simulated in batches of `batch_size` games
+    per column (see `SimulationStrategy.simulate_batch`), up to
+    `max_simulations` games per column, using the 'smart'
+    `rollout_policy`.
     """
     name = 'Simulation TL'
     description = 'Simple simulation strategy (simulates managing the time limit)'
     kind = 'simulation'
     clock_management = True
-    childs = TreeSearchStrategy.childs
+    rollout_policy = 'smart'
+    batch_size = 20
+    max_simulations = 1000
+    child_moves = TreeSearchStrategy.child_moves
 
     def action(self, board):
-        self.switch_ids(board)
-
-        rule = lambda time_left: time_left/(25-self.turn)
+        rule = lambda time_left: time_left/max(2, 25 - self.turn)
         self.start_timer(rule, max=20)
 
         self.best_position = None
         self.run_simulations(board)
         
-        if not self.best_position:
+        if self.best_position is None:
             self.best_position = self.random_choice(board)
 
         self.save(board, self.best_position)
@@ -97,36 +128,38 @@ class AgentSimulationTL(AgentBase, SimulationStrategy, TimerStrategy):
 
     def run_simulations(self, board):
         best_value = -math.inf
-        nodes = self.childs(board)
+        game_position = Position(board, perspective=self.id)
+        columns = game_position.legal_columns()
+
+        if(len(columns) == 1):
+            self.best_position = columns[0]
+            return
 
-        if(len(nodes) == 1):
-            self.save(board, nodes[0][0])
-            return nodes[0][0]
+        for position, row in self.child_moves(game_position, columns):
+            if helpers.check_winner_at(game_position, position, row):
+                self.best_position = position
+                return
 
         count = 0
-        results = np.zeros(len(nodes), dtype=int)
+        results = np.zeros(len(columns), dtype=int)
         while not self.time_out:
-            if count > 999: break
-            count += 1
-
-            if count == 1:
-                for position, node in nodes:
-                    winner = helpers.check_winner(node)
-                    if winner:
-                        self.best_position = position
-                        return
+            if count >= self.max_simulations: break
+            count += self.batch_size
             
-            for i, (position, node) in enumerate(nodes):
-                results[i] += self.simulate(node)
+            for i, (position, _) in enumerate(self.child_moves(game_position, columns)):
+                wins, _, losses = self.simulate_batch(game_position,
+                                                      num_simulations=self.batch_size)
+                results[i] += wins - losses
 
                 if results[i] > best_value:
                     best_value = results[i]
                     self.best_position = position
 
-        print('num. simulations:', count, '-- position ratio:', best_value/count)
+        if count:
+            print('num. simulations:', count, '-- position ratio:', best_value/count)
 
 
-class AgentMonteCarlo(AgentBase, TimerStrategy):
+class AgentMonteCarlo(AgentBase, SimulationStrategy, TimerStrategy):
     """Monte Carlo agent.
 
     This agent applies the Monte Carlo Tree Search method.
@@ -139,18 +172,48 @@ class AgentMonteCarlo(AgentBase, TimerStrategy):
     less prommissing branches.
 
     This agent evaluate the rollout with a simulation
-    of 100 games per board state.
+    of 100 games per board state, played with the 'smart'
+    `rollout_policy` (see `NodeMCTS`).
+
+    Assign a `TranspositionTable` to `transposition_table` to
+    share the rollout scores and the solved positions with
+    other agents (see `Node`).
+
+    By default the tree is stored in preallocated arrays
+    (see `TreeStore`) of `tree_capacity` nodes, the search
+    of the turn ends when the time runs out or the tree is full.
+    Set `array_tree` to `False` to search with `Node` objects
+    (`create_root_node`).
+
+    With `reuse_tree` the part of the tree below the moves
+    actually played is kept as the root of the next turn and the
+    other branches are released. The memory of each agent is
+    limited to `tree_capacity` nodes, in both kinds of tree.
+
+    With a `batch_size` greater than 1 the leaves are selected
+    with virtual loss and evaluated `batch_size` at a time
+    by `rollout_scores` (see `TreeStore.search_batch`).
     """
     name = 'Monte Carlo'
     description = 'Monte carlo search tree strategy'
     kind = 'monte carlo'
-    _memory = {}
     clock_management = True
+    transposition_table = None
+    array_tree = True
+    reuse_tree = True
+    tree_capacity = 100000
+    batch_size = 1
+    num_simulations = 100
+    rollout_policy = 'smart'
 
-    def action(self, board):
-        self.switch_ids(board)
+    def __init__(self):
+        super().__init__()
+        self._memory = {}
+        self._root_node = None
+        self._tree = None
 
-        rule = lambda time_left: time_left/(42 - self.turn)
+    def action(self, board):
+        rule = lambda time_left: time_left/max(2, 42 - self.turn)
         self.start_timer(rule, max=20)
         self.start_search(board)
 
@@ -158,33 +221,92 @@ class AgentMonteCarlo(AgentBase, TimerStrategy):
         return self.best_position
 
     def start_search(self, board):
-        root_node = self.create_root_node(board)
-
-        while not self.time_out:
+        if self.array_tree:
+            tree = self.create_tree()
+            position = Position(board, perspective=self.id)
+            if self.reuse_tree:
+                tree.reroot(position)
+            else:
+                tree.reset(position)
+
+            # at least one iteration, the root is expanded even if the time is over
+            if self.batch_size > 1:
+                while tree.search_batch(self.batch_size) and not self.time_out:
+                    pass
+            else:
+                while tree.search() and not self.time_out:
+                    pass
+
+            self.best_position = tree.best_move()
+            if self.best_position is None:
+                self.best_position = self.random_choice(board)
+            return
+
+        # the nodes keep and modify their own boards
+        board = self.clone(board)
+        root_node = None
+        if self.reuse_tree and self._root_node is not None:
+            root_node = self._root_node.reroot(board)
+
+        if root_node is None:
+            self._memory = {}
+            root_node = self.create_root_node(board)
+        self._root_node = root_node
+
+        while not self.time_out and len(self._memory) < self.tree_capacity:
             self._explore(root_node)
-        
+
         best_node = sorted(root_node.children(), key=lambda x: x.value, reverse=True)[0]
         # print('Visits:', best_node.visits, 'Value:', best_node.value)
         self.best_position = best_node.position
 
+    def create_tree(self):
+        """Return the `TreeStore` of the agent, the arrays are
+        allocated once and reused every turn"""
+        if self._tree is None or self._tree.capacity != self.tree_capacity:
+            self._tree = TreeStore(self.rollout_score, self.tree_capacity,
+                                   rollout_scores=self.rollout_scores)
+
+        self._tree.table = self.transposition_table
+        return self._tree
+
+    def rollout_score(self, position):
+        """Evaluation of a `Position` in the `TreeStore`
+        from the perspective of the player id 1, same as
+        `NodeMCTS.rollout_score`"""
+        wins, _, losses = self.simulate_batch(position,
+                                              num_simulations=self.num_simulations)
+        return (wins - losses)/self.num_simulations
+
+    def rollout_scores(self, positions):
+        """Evaluation of a list of `Position` objects at once,
+        used when `batch_size` is greater than 1
+
+        # Return
+            list of scores, see `rollout_score`
+        """
+        return [self.rollout_score(position) for position in positions]
+
     def create_root_node(self, board):
-        return NodeMCTS(board, self._memory)
+        return NodeMCTS(board, self._memory, table=self.transposition_table)
 
     def _explore(self, node):
-        if not node.rollout():
+        path = []
+        while not node.rollout(path):
             children = node.children()
             if not children:
                 return 0
-                
-            next_explore = sorted(children, key=lambda x: x.UCB1, reverse=True)[0]
-            self._explore(next_explore)
+
+            path.append(node)
+            visits = node.visits
+            node = max(children, key=lambda x: x.ucb1(visits))
 
 
 class NodeMCTS(Node):
     num_simulations=100
+    rollout_policy = 'smart'
 
     def rollout_score(self):
-        score = 0
-        for _ in range(self.num_simulations):
-            score += self.simulate(self.board, self.color)
-        return score/self.num_simulations
\ No newline at end of file
+        wins, _, losses = self.simulate_batch(self.board, self.color,
+                                              self.num_simulations)
+        return (wins - losses)/self.num_simulations
\ No newline at end of file
@@ -1,52 +1,42 @@
-import math
-import random
-import numpy as np
-from copy import deepcopy
 from . import AgentBase
-from .strategies import TreeSearchStrategy
+from .strategies import TreeSearchStrategy, TimerStrategy
+from ..position import Position, WIDTH, HEIGHT
 
 
-class AgentNegamax(AgentBase, TreeSearchStrategy):
+class AgentNegamax(AgentBase, TreeSearchStrategy, TimerStrategy):
     """Negamax Agent
-    
+
     This agent uses the negamax algorithm which is a
     simplified version of the minimax algorithm.
 
     Negamax is based on the observation that
     `max(a,b) = -min(-a,-b)`
 
-    This agent uses negamax in all actions using the maximum
-    depth of `5`.
+    This agent uses negamax with alpha-beta pruning and
+    __iterative deepening__, it searches one depth at a time
+    until the time of the turn runs out and plays the best
+    column of the deepest completed search.
 
-    It also uses a __zobrist hash table__ to store all searches in order
-    to be more efficient.
+    In time limited games the time of the turn is the time left
+    divided by the number of turns left, in unlimited time games
+    the agent takes the maximum of `max_time` seconds per turn.
     """
     name = 'Negamax'
-    description = 'Simple Tree Search strategy (negamax 5 level deep)'
+    description = 'Tree Search strategy (alpha-beta negamax with iterative deepening)'
     kind = 'tree search'
-    search_depth = 5
+    clock_management = True
+    max_time = 5
 
     def __init__(self):
         super().__init__()
         self.init_zobrist()
 
     def action(self, board):
-        self.switch_ids(board)
-
-        best_value = -math.inf
-        best_option = None
-        
-        nodes = self.childs(board, 1)
-        random.shuffle(nodes)
-        for position, node in nodes:
-            value = -self.negamax(node, self.search_depth, -1)
-
-            if value > best_value:
-                best_value = value
-                best_option = position
-
-                if value > 0:
-                    break
+        rule = lambda time_left: time_left/max(2, (WIDTH*HEIGHT - self.turn)//2)
+        self.start_timer(rule, max=self.max_time)
+
+        best_value, best_option = self.iterative_deepening(Position(board, perspective=self.id))
+        self.timer_thread.stop()
 
         self.save(board, best_option, best_value)
         return best_option
@@ -2,5 +2,7 @@
 from .base import Strategy
 from .random import RandomStrategy
 from .timer import TimerStrategy
+from .transposition import TranspositionTable
 from .treeSearch import ZobristHashingStrategy, TreeSearchStrategy
-from .monteCarlo import SimulationStrategy, DepthMeasure, Node
\ No newline at end of file
+from .monteCarlo import SimulationStrategy, DepthMeasure, Node
+from .treeStore import TreeStore
\ No newline at end of file
@@ -1,17 +1,34 @@
 """Monte Carlo strategies"""
 import math
+import random
+import numpy as np
 from copy import copy, deepcopy
 from . import Strategy, RandomStrategy, ZobristHashingStrategy
 from . import RandomStrategy
+from .transposition import EXACT, ESTIMATE
 from ... import helpers
+from ...position import Position, WIDTH, HEIGHT, BITS_TABLE, COLUMN_MASKS, \
+    COLUMN_MASKS_ARRAY, has_four, has_four_batch, playable_squares, winning_squares
 from ...exceptions import BadImplementation
 
 
 class SimulationStrategy(RandomStrategy):
     """Simulation Stragegy provide the method necessary
-    to simulate matches."""
+    to simulate matches.
+
+    # Attributes
+        rollout_policy: str, default 'random', how the turns of
+            the simulated matches are played
+            - `'random'` - every turn is a random valid column
+            - `'smart'` - play a winning column if there is one,
+                else block the opponent winning column, else
+                a random column which doesn't give the opponent
+                a winning position right above it. Uses bit board
+                threat masks, only a few integer operations per turn.
+    """
+    rollout_policy = 'random'
 
-    def simulate(self, board, color=-1):
+    def simulate(self, board, color=-1, last_move=None):
         """Simulate a match to the end from a given
         board state. All turns are played randomly till
         the board hits a terminal state then the value is
@@ -20,6 +37,11 @@ class SimulationStrategy(RandomStrategy):
         # Arguments
             board: matrix, required, board state to be simulated
             color: int, required, id of the owner of the board state
+            last_move: tuple (column, row), optional, default `None`
+                - last position played in the `board`, when given
+                    only the lines through it are checked for a winner,
+                    so the `board` before it must not have a winner
+                    (e.g. the children of a non terminal `Node`)
 
         # Return
             Id of the winner of the simulation or zero in case
@@ -28,10 +50,17 @@ class SimulationStrategy(RandomStrategy):
         # Example
             AgentSimulation: [documentation](./agents#agentsimulation)
         """
-        winner = helpers.check_winner(board)
+        if last_move is None:
+            winner = helpers.check_winner(board)
+        else:
+            winner = helpers.check_winner_at(board, *last_move)
+
         if winner:
             return winner
 
+        if self.rollout_policy == 'smart':
+            return self._simulate_smart(Position(board, color))
+
         sim_board = copy(board)
         end = False
 
@@ -45,12 +74,168 @@ class SimulationStrategy(RandomStrategy):
             sim_board[column, next_pos] = color
             color = 1 if color == -1 else -1
 
-            winner = helpers.check_winner(sim_board)
+            winner = helpers.check_winner_at(sim_board, column, next_pos)
             if winner:
                 return winner
 
         return 0
 
+    def _simulate_smart(self, position):
+        """Simulate a match using the 'smart' `rollout_policy`"""
+        color = position.color
+        bit_boards = dict(position.bit_boards)
+        occupied = bit_boards[1] | bit_boards[-1]
+
+        for _ in range(position.num_moves, WIDTH*HEIGHT):
+            player, opponent = bit_boards[color], bit_boards[-color]
+            possible = playable_squares(occupied)
+
+            if winning_squares(player, occupied) & possible:
+                return color
+
+            threats = winning_squares(opponent, occupied)
+            moves = threats & possible
+            if not moves:
+                moves = possible & ~(threats << 1) or possible
+
+            moves = [moves & mask for mask in COLUMN_MASKS if moves & mask]
+            move = random.choice(moves)
+            bit_boards[color] |= move
+            occupied |= move
+
+            if has_four(bit_boards[color]):
+                return color
+
+            color = -color
+
+        return 0
+
+    def _smart_columns(self, player, opponent, occupied):
+        """Vectorized 'smart' `rollout_policy`, return the chosen
+        column for each one of the given bit boards"""
+        possible = playable_squares(occupied)
+        wins = winning_squares(player, occupied) & possible
+        threats = winning_squares(opponent, occupied)
+        blocks = threats & possible
+        safe = possible & ~(threats << np.uint64(1))
+
+        moves = np.where(safe != 0, safe, possible)
+        moves = np.where(blocks != 0, blocks, moves)
+        moves = np.where(wins != 0, wins, moves)
+
+        in_column = (moves[:,None] & COLUMN_MASKS_ARRAY) != 0
+        return np.where(in_column, np.random.random(in_column.shape), -1).argmax(1)
+
+    def simulate_batch(self, board, color=-1, num_simulations=100):
+        """Simulate many matches at once from a given board state.
+
+        All the simulations are played in lockstep, each turn
+        choose a column (see `rollout_policy`) for every running
+        match and update the bit boards of all of them with NumPy
+        operations. Same result as calling `simulate`
+        `num_simulations` times.
+
+        # Arguments
+            board: matrix or `Position`, required, board state
+                to be simulated
+            color: int, optional, default -1, id of the owner of the
+                board state, ignored when `board` is a `Position`
+                (its `color` is used instead)
+            num_simulations: int, optional, default 100
+
+        # Return
+            wins, draws, losses: int, number of simulations won,
+                tied and lost by the player id `1`
+
+        # Example
+
+        ```python
+        wins, draws, losses = self.simulate_batch(board, -1, 500)
+        score = (wins - losses)/500
+        ```
+        """
+        if isinstance(board, Position):
+            position = board
+        else:
+            position = Position(board, color)
+
+        winner = position.winner()
+        if winner == 1:
+            return num_simulations, 0, 0
+        elif winner == -1:
+            return 0, 0, num_simulations
+
+        bit_boards = np.empty((num_simulations, 2), dtype=np.uint64)
+        bit_boards[:,0] = position.bit_boards[1]
+        bit_boards[:,1] = position.bit_boards[-1]
+        heights = np.tile(np.array(position.heights), (num_simulations, 1))
+        colors = np.full(num_simulations, position.color)
+        winners = self.simulate_positions(bit_boards, heights, colors)
+
+        wins = int(np.count_nonzero(winners == 1))
+        losses = int(np.count_nonzero(winners == -1))
+        return wins, num_simulations - wins - losses, losses
+
+    def simulate_positions(self, bit_boards, heights, colors):
+        """Simulate one match from each one of many board states,
+        in lockstep (see `simulate_batch`)
+
+        The board states can be different, each one with
+        its own player to move.
+
+        # Arguments
+            bit_boards: uint64 array (N,2), required, bit boards of
+                the player id 1 and the player id -1 of each board
+                (see `helpers.bit_board_split_batch`)
+            heights: int array (N,7), required, number of
+                pieces in each column
+            colors: int array (N,), required, id of the
+                player to move in each board
+
+        # Return
+            int array (N,), id of the winner of each simulation,
+                zero for a draw
+        """
+        bit_boards = np.array(bit_boards, dtype=np.uint64)
+        heights = np.array(heights, dtype=int)
+        colors = np.array(colors, dtype=int)
+        num_moves = heights.sum(1)
+        indexes = np.arange(len(bit_boards))
+
+        found = has_four_batch(bit_boards)
+        winners = np.zeros(len(bit_boards), dtype=int)
+        winners[found[:,1]] = -1
+        winners[found[:,0]] = 1
+        running = indexes[winners == 0]
+
+        while True:
+            running = running[num_moves[running] < WIDTH*HEIGHT]
+            if len(running) == 0:
+                break
+
+            player = (colors[running] == -1).astype(int)
+            own = bit_boards[running, player]
+
+            if self.rollout_policy == 'smart':
+                opponent = bit_boards[running, 1-player]
+                columns = self._smart_columns(own, opponent, own | opponent)
+            else:
+                legal = heights[running] < HEIGHT
+                columns = np.where(legal, np.random.random(legal.shape), -1).argmax(1)
+
+            rows = heights[running, columns]
+            own |= BITS_TABLE[columns, rows]
+            bit_boards[running, player] = own
+            heights[running, columns] += 1
+            num_moves[running] += 1
+
+            won = has_four_batch(own)
+            winners[running[won]] = colors[running[won]]
+            colors[running] = -colors[running]
+            running = running[~won]
+
+        return winners
+
 
 class DepthMeasure:
     """Use this class to help when measuring the depth of a
@@ -119,18 +304,31 @@ class Node(SimulationStrategy, ZobristHashingStrategy):
     of a given state.
 
     This class uses a __zobrist hashing table__ to optimize the search.
+    The positions reached by different move orders (transpositions)
+    are the same `Node`, so the tree is a graph where a node can be
+    the child of many nodes and all of them share its visits and score.
+    The rollout adds the score to the nodes of the path actually
+    followed in the search (`backpropagate`) instead of walking up
+    the `parent`.
 
     # Arguments
         board: matrix, required, board state
         memory: empty dictionary, required(*), default None
-            - this dictionary will store all searches
-                with zobrist hashing.
+            - this dictionary will store all the nodes
+                of the search by zobrist hash.
         parent: `Node` object, required (**), default None
-            - Node above in the tree hierarchy.
+            - Node above in the tree hierarchy, the first
+                one to generate the node.
         position: int, required (**), default None
             - Index of the column which generated the board
                 current `board`.
         color: int, required (**), default 1
+        table: `TranspositionTable`, optional, default None
+            - table shared with other searches (e.g. `TreeSearchStrategy`),
+                the rollout scores are stored in it as estimates and
+                positions solved by other searches are not rolled out.
+                Only used when creating a root `Node`, the children
+                use the table of the parent.
 
     (*) required when creating a new root `Node` object.
     
@@ -138,7 +336,13 @@ class Node(SimulationStrategy, ZobristHashingStrategy):
     `Node` object (`new_node` method).
 
     # Properties
-        UCB1: float, UCB1 value (*) of the node.
+        UCB1: float, UCB1 value (*) of the node, from the perspective
+            of the player who made the move of the node (see `ucb1`).
+        last_move: tuple (column, row), position played to
+            generate the node `board`, `None` for the root
+        winner: int or None, id of the winner of the `board`, the
+            nodes with a winner are terminal: they have no children
+            and the winner is their score in every visit
         visits: int, total number of Node visits
         value: float, total number of score divided by the
             number of visits
@@ -154,12 +358,14 @@ class Node(SimulationStrategy, ZobristHashingStrategy):
         AgentMCTSNN: [documentation](./agents#agentmctsnn)
     """
     
-    def __init__(self, board, memory=None, parent=None, position=None, color=1):
+    def __init__(self, board, memory=None, parent=None, position=None, color=1,
+                 table=None):
         self.board = board
         self.color = color
         self.position = position
         self.parent = parent
         self.memory = memory if memory is not None else parent.memory
+        self.table = table if parent is None else parent.table
         self.__score = 0
         self._visits = 0
         self._children = None
@@ -167,7 +373,12 @@ class Node(SimulationStrategy, ZobristHashingStrategy):
 
         if parent:
             self._hash = self._gen_hash()
-            self._save()
+            # the parent is not terminal, only the last move can win
+            self.winner = helpers.check_winner_at(board, *self.last_move)
+        else:
+            self._hash = self.hash(board, color)
+            self.winner = helpers.check_winner(board)
+        self._save()
 
     def __init_subclass__(cls):
         if 'rollout_score' not in cls.__dict__:
@@ -175,11 +386,35 @@ class Node(SimulationStrategy, ZobristHashingStrategy):
 
     @property
     def UCB1(self):
+        return self.ucb1(self.parent.visits)
+
+    def ucb1(self, parent_visits):
+        """UCB1 value of the node as a child of a node with
+        `parent_visits` visits. A node shared by many parents has
+        a different value for each one.
+
+        The value is from the perspective of the player who made
+        the move of the node (`-color`), so in every level of the
+        tree the player to move picks its best child.
+
+        # Arguments
+            parent_visits: int, visits of the parent node
+
+        # Return
+            float, `math.inf` when the node has no visits
+        """
         if self._visits == 0:
             return math.inf
 
-        lnN = math.log1p(self.parent.visits)
-        return self.__score/self._visits + 2*math.sqrt(lnN/self._visits)
+        lnN = math.log1p(parent_visits)
+        return -self.color*self.__score/self._visits + 2*math.sqrt(lnN/self._visits)
+
+    @property
+    def last_move(self):
+        if self.position is None:
+            return None
+
+        return self.position, np.count_nonzero(self.board[self.position]) - 1
 
     @property
     def visits(self):
@@ -195,6 +430,11 @@ class Node(SimulationStrategy, ZobristHashingStrategy):
     def _save(self):
         self.memory[self._hash] = self
 
+    def _get_memory(self, hash):
+        """Return the node stored in the `memory`
+        with a given hash or `None`"""
+        return self.memory.get(hash)
+
     def rollout_score(self):
         """This method must return a score (float), evaluation, 
         for the Node board state (`self.board`), from the 
@@ -209,27 +449,72 @@ class Node(SimulationStrategy, ZobristHashingStrategy):
         """
         pass
 
-    def rollout(self):
+    def rollout(self, path=None):
         """Node rollout.
 
         It will execute a rollout if this is the first
         visits of the Node, otherwise it will return `False`.
+        A terminal Node (see `winner`) is scored with its
+        winner in every visit.
 
         Each rollout adds a visit in the counter and the score
-        of the `board` to the Node and all the parents above
-        in the tree.
+        of the `board` to the Node and all the nodes in the
+        `path`, or all the parents above in the tree when
+        there is no `path`.
+
+        # Arguments
+            path: list, optional, default `None`, nodes from the
+                root to the parent of this node followed in the search
 
         # Return
             `True` when the rollout occur, `False` when it do not.
         """
-        if self.parent and self._visits == 0:
-            score = self.rollout_score()
-            self.add_score(score)
-            self.add_visit()
+        if self.parent and (self._visits == 0 or self.winner):
+            if self.winner:
+                score = self.winner
+            elif self.table is None:
+                score = self.rollout_score()
+            else:
+                score = self._table_rollout_score()
+
+            if path is None:
+                self.add_score(score)
+                self.add_visit()
+            else:
+                self.backpropagate(path + [self], score)
             return True
         else:
             return False
 
+    def _table_rollout_score(self):
+        """Rollout score using the transposition `table`, the values in
+        the table are from the perspective of the player to move"""
+        key = Position(self.board, self.color).key()
+        entry = self.table.get(key)
+
+        if entry:
+            value, _, bound, _ = entry
+            if bound == ESTIMATE:
+                return value*self.color
+            elif bound == EXACT and value != 0:
+                return math.copysign(1, value)*self.color
+
+        score = self.rollout_score()
+        self.table.put(key, score*self.color, 0, ESTIMATE)
+        return score
+
+    def backpropagate(self, path, score):
+        """Add a visit and the `score` to every node in the `path`,
+        each node is updated once even if it was reached by other paths
+
+        # Arguments
+            path: list, `Node` objects followed in the search
+            score: float, from the perspective of the player id 1
+        """
+        for node in path:
+            node.__score += score
+            node._visits += 1
+
     def add_score(self, value):
         self.__score += value
         if self.parent:
@@ -243,28 +528,74 @@ class Node(SimulationStrategy, ZobristHashingStrategy):
     def children(self):
         """Get all the childen Nodes.
 
-        Generate or get from the memory, all the childen
-        Nodes. Each node is generated from the available
-        possitions in the `board` of the current Node.
+        Generate all the childen Nodes. Each node is generated
+        from the available possitions in the `board` of the
+        current Node, a position already in the `memory`
+        (transposition) is not generated again, the stored
+        Node is used. A terminal Node has no children.
         """
         # DepthMeasure.add()
+        if self.winner:
+            return None
+
         if not self._children:
             childs = []
             board = self.board
             for column, row in helpers.available_positions(board):
-                board[column,row] = self.color
-                new_board = deepcopy(board) 
-                board[column,row] = 0
+                hash = self.update_hash(self._hash, column, row, self.color)
+                node = self._get_memory(hash)
 
-                node = self._get_memory(new_board, -self.color)
-                if not node:
+                if node is None:
+                    board[column,row] = self.color
+                    new_board = board.copy()
+                    board[column,row] = 0
                     node = self.new_node(new_board, column)
+
                 childs.append(node)
 
             self._children = childs
 
         return self._children if len(self._children) > 0 else None
 
+    def reroot(self, board, color=1):
+        """Find the Node of a board state in the `memory` and
+        make it the root of the search, keeping the statistics
+        of all the nodes below it.
+
+        The nodes not reachable from the new root are removed
+        from the `memory` and released.
+
+        # Arguments
+            board: matrix, required, board state of the new root
+            color: int, optional, default 1, player to move
+
+        # Return
+            The new root `Node` or `None` if the board state
+            is not in the `memory`.
+        """
+        root = self._get_memory(self.hash(board, color))
+        if root is None:
+            return None
+
+        root.parent = None
+        root.position = None
+        memory = {root._hash: root}
+        nodes = [root]
+        for node in nodes:
+            for child in node._children or []:
+                if child._hash in memory:
+                    continue
+
+                # the parent can be a released node, use the one found here
+                child.parent = node
+                child.position = int(np.flatnonzero((child.board != node.board).any(axis=1))[0])
+                memory[child._hash] = child
+                nodes.append(child)
+
+        self.memory.clear()
+        self.memory.update(memory)
+        return root
+
     def new_node(self, board, column):
         """This method is called by `children` method to
         generate a new Node.
@@ -280,12 +611,7 @@ class Node(SimulationStrategy, ZobristHashingStrategy):
         node = node_type(board=board, parent=self, position=column, color=-self.color)
         return node
 
-    def _get_memory(self, board, color):
-        hash = self.hash(board, color)
-        if hash in self.memory:
-            return hash
-        else:
-            return
-
     def _gen_hash(self):
-        self.hash(self.board, self.color)
\ No newline at end of file
+        """Zobrist hash of the node, updated from the parent hash"""
+        column, row = self.last_move
+        return self.update_hash(self.parent._hash, column, row, self.parent.color)
\ No newline at end of file
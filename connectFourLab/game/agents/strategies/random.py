@@ -1,6 +1,8 @@
 import random
+import numpy as np
 from . import Strategy
 from ... import helpers
+from ...position import HEIGHT
 
 
 class RandomStrategy(Strategy):
@@ -17,4 +19,11 @@ class RandomStrategy(Strategy):
         if len(columns_available) == 0:
             return None
         
-        return random.choice(columns_available)
\ No newline at end of file
+        return random.choice(columns_available)
+
+    def random_choices(self, boards):
+        """Vectorized `random_choice`, return a valid column
+        for each board of a stack (N,7,7), the boards must
+        have at least one valid column"""
+        legal = np.asarray(boards)[:,:,HEIGHT-1] == 0
+        return np.where(legal, np.random.random(legal.shape), -1).argmax(1)
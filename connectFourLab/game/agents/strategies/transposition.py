@@ -0,0 +1,145 @@
+"""Transposition table"""
+import numpy as np
+
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+ESTIMATE = 3
+
+
+class TranspositionTable:
+    """Fixed size hash table to store the results of searches
+
+    The table is preallocated in NumPy arrays and never grows,
+    each entry takes 16 bytes: the 64 bits key, the value (float32)
+    and a 32 bits word packing the depth, the bound type, the age
+    and the best column of the entry.
+
+    The entries are grouped in buckets of `bucket_size` entries,
+    a key can only be stored in its bucket. When the bucket is
+    full the entry of an older search (`new_search`) or the
+    shallowest entry is replaced.
+
+    # Arguments
+        size_mb: float, optional, default 16, size of the table in MB
+        bucket_size: int, optional, default 4
+
+    # Bound types
+        EXACT: the value is the exact value of the position
+        LOWER_BOUND: the value is a lower bound (beta cutoff)
+        UPPER_BOUND: the value is an upper bound (fail low)
+        ESTIMATE: the value is an evaluation, not a search result
+            (e.g. Monte Carlo rollout), the depth is meaningless
+
+    All values are stored from the perspective of the player
+    to move in the position of the key.
+
+    # Example
+
+    ```python
+    from connectFourLab.game.position import Position
+
+    table = TranspositionTable(size_mb=1)
+    position = Position()
+    table.put(position.key(), 0, depth=8, bound=EXACT, move=3)
+
+    value, depth, bound, move = table.get(position.key())
+    ```
+    """
+    entry_size = 16
+
+    def __init__(self, size_mb=16, bucket_size=4):
+        num_entries = max(bucket_size, int(size_mb*2**20)//self.entry_size)
+        self.bucket_size = bucket_size
+        self.num_buckets = num_entries//bucket_size
+        num_entries = self.num_buckets*bucket_size
+
+        self.keys = np.zeros(num_entries, dtype=np.uint64)
+        self.values = np.zeros(num_entries, dtype=np.float32)
+        self.info = np.zeros(num_entries, dtype=np.uint32)
+        self.age = 1
+
+    def __len__(self):
+        return int(np.count_nonzero(self.info))
+
+    @property
+    def capacity(self):
+        return len(self.info)
+
+    def clear(self):
+        """Remove all the entries"""
+        self.info[:] = 0
+        self.age = 1
+
+    def new_search(self):
+        """Start a new search, entries stored before are
+        the first to be replaced"""
+        self.age = self.age % 255 + 1
+
+    def get(self, key):
+        """Get the entry of a given key
+
+        # Arguments
+            key: int, 64 bits key of the position
+
+        # Return
+            `None` if there is no entry for the `key`, or
+            value: float
+            depth: int
+            bound: int, bound type
+            move: int, best column or `None`
+        """
+        start = (key % self.num_buckets)*self.bucket_size
+        for i in range(start, start + self.bucket_size):
+            info = int(self.info[i])
+            if not info:
+                return None
+            elif int(self.keys[i]) == key:
+                move = (info >> 18) & 0xF
+                return (float(self.values[i]),
+                        (info & 0xFF) - 1,
+                        (info >> 8) & 0x3,
+                        move - 1 if move else None)
+
+    def put(self, key, value, depth, bound=EXACT, move=None):
+        """Store an entry
+
+        An entry of the same key is only replaced by an entry
+        as deep or deeper, exact or from a newer search.
+
+        # Arguments
+            key: int, 64 bits key of the position
+            value: float, value of the position
+            depth: int (0 to 254), depth of the search
+            bound: int, optional, default `EXACT`, bound type
+            move: int, optional, default `None`, best column
+
+        # Return
+            `True` if the entry was stored
+        """
+        start = (key % self.num_buckets)*self.bucket_size
+        victim, victim_score = None, None
+
+        for i in range(start, start + self.bucket_size):
+            info = int(self.info[i])
+            if not info:
+                victim = i
+                break
+
+            same_age = ((info >> 10) & 0xFF) == self.age
+            if int(self.keys[i]) == key:
+                if same_age and bound != EXACT and depth + 1 < (info & 0xFF):
+                    return False
+                victim = i
+                break
+
+            score = same_age*256 + (info & 0xFF)
+            if victim is None or score < victim_score:
+                victim, victim_score = i, score
+
+        move = 0 if move is None else move + 1
+        self.keys[victim] = key
+        self.values[victim] = value
+        self.info[victim] = (depth + 1) | (bound << 8) | (self.age << 10) | (move << 18)
+        return True
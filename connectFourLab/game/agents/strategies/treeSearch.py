@@ -2,9 +2,15 @@
 import math
 import numpy as np
 import random
-from copy import deepcopy
 from . import Strategy
+from .transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
 from ... import helpers
+from ...position import WIDTH, HEIGHT, COLUMN_MASKS, playable_squares, winning_squares
+from ...exceptions import SearchTimeout
+
+
+MOVE_ORDER = [3, 2, 4, 1, 5, 0, 6]
+WIN_SCORE = WIDTH*HEIGHT + 1
 
 
 class ZobristHashingStrategy(Strategy):
@@ -18,6 +24,7 @@ class ZobristHashingStrategy(Strategy):
         Node: [documentation](#node)
     """
     zobrist_table = []
+    zobrist_keys = []
     z_t_color = []
 
     def __init__(self):
@@ -28,33 +35,33 @@ class ZobristHashingStrategy(Strategy):
     def init_zobrist():
         """Initialize Zobrist hashing table.
         
-        This method creates a list of two tables, filled
-        randomly with int64 numbers, to represent
-        all possitions in a 7x7 board, one table for each
-        player. It also generate two random int64 numbers
+        This method creates a table (uint64 matrix 49x2), filled
+        randomly with 64 bits numbers, to represent
+        all possitions in a 7x7 board, one column for each
+        player. It also generate two random 64 bits numbers
         which will represent the owner of a board state.
 
-        Both lists are used when generating a hash in the
-        `hash` method.
+        Both are used when generating a hash in the
+        `hash` and `update_hash` methods.
         """
         if len(ZobristHashingStrategy.zobrist_table):
             return
 
-        table = np.zeros((49,2),)
+        table = np.zeros((49,2), dtype=np.uint64)
 
         for i, _ in enumerate(table):
             for j, _ in enumerate(_):
                 table[i][j] = ZobristHashingStrategy.next_random64()
 
         ZobristHashingStrategy.zobrist_table = table
+        ZobristHashingStrategy.zobrist_keys = table.tolist()
         ZobristHashingStrategy.z_t_color = [ZobristHashingStrategy.next_random64(),
                                             ZobristHashingStrategy.next_random64()]
 
     @staticmethod
     def next_random64():
-        """Return a random int64 number"""
-        num = int(1E63)
-        return random.randint(0, num)
+        """Return a random 64 bits number"""
+        return random.getrandbits(64)
 
     def hash(self, board, color):
         """Create a __zobrist hash__ for a given board state.
@@ -67,12 +74,9 @@ class ZobristHashingStrategy(Strategy):
         # Return:
             Generated zobrist hash.
         """
-        hash = 0
-        for i, value in enumerate(board.reshape(-1)):
-            if value == 1:
-                hash ^= int(self.zobrist_table[i][0])
-            elif value == -1:
-                hash ^= int(self.zobrist_table[i][1])
+        board = np.asarray(board).reshape(-1)
+        hash = int(np.bitwise_xor.reduce(self.zobrist_table[board == 1, 0]))
+        hash ^= int(np.bitwise_xor.reduce(self.zobrist_table[board == -1, 1]))
 
         if color == 1:
             hash ^= self.z_t_color[0]
@@ -81,50 +85,313 @@ class ZobristHashingStrategy(Strategy):
 
         return hash
 
+    def update_hash(self, hash, column, row, color):
+        """Update a __zobrist hash__ with a move, without
+        walking the board.
+
+        Add the piece of the player `color` in the position
+        and pass the turn to the other player. Calling it again
+        with the same arguments takes the move back.
+
+        # Arguments:
+            hash: int, hash of the board before the move
+            column: int, column of the move
+            row: int, row of the move
+            color: int (1 or -1), player who made the move
+
+        # Return:
+            Hash of the board after the move.
+
+        # Example
+
+        ```python
+        hash = self.hash(board, 1)
+        board[3,0] = 1
+        hash = self.update_hash(hash, 3, 0, 1)
+        assert hash == self.hash(board, -1)
+        ```
+        """
+        keys = self.zobrist_keys[column*7 + row]
+        return hash ^ keys[0 if color == 1 else 1] ^ self.z_t_color[0] ^ self.z_t_color[1]
+
 
 class TreeSearchStrategy(ZobristHashingStrategy):
     """Tree Search Strategy provide the necessary methods
     to an agent make a tree search in a given board state.
     
+    The results of the searches are stored in a fixed size
+    `TranspositionTable`, created with `table_size_mb` on the first
+    use. The same table can be shared with other agents (e.g. Monte
+    Carlo agents) by assigning it to `transposition_table`.
+
+    # Attributes
+        time_out: bool, when it turns `True` the `alphabeta`
+            search is interrupted (see `TimerStrategy`)
+        table_size_mb: float, default 16, size of the transposition table
+        transposition_table: `TranspositionTable` object
+
     # Example
         AgentNegamax: [documentation](./agents#agentnegamax)
     """
-    _search_memory = {}
+    time_out = False
+    table_size_mb = 16
+    _transposition_table = None
+
+    @property
+    def transposition_table(self):
+        if self._transposition_table is None:
+            self._transposition_table = TranspositionTable(self.table_size_mb)
+
+        return self._transposition_table
+
+    @transposition_table.setter
+    def transposition_table(self, table):
+        self._transposition_table = table
+
+    def child_moves(self, position, order=MOVE_ORDER):
+        """Play each available column in a given `position`
+
+        The search framework of the tree search strategies, instead
+        of creating a copy of the board for each child, the moves are
+        made and unmade in the same mutable `Position`. The column is
+        played before each item is yielded and taken back when the
+        loop continues or stops.
+
+        # Arguments
+            position: `Position`, required, board state
+            order: list, optional, default center to the sides,
+                order of the columns
+
+        # Yield
+            Column and row of the move, while the move is played
+            in the `position`
+
+        # Example
+
+        ```python
+        position = Position(board)
+        for column, row in self.child_moves(position):
+            # position has the move, position.color is the opponent
+            if helpers.check_winner_at(position, column, row):
+                break
+        # position is unchanged
+        ```
+        """
+        for column in order:
+            if not position.can_play(column):
+                continue
+
+            row = position.play(column)
+            try:
+                yield column, row
+            finally:
+                position.undo()
+
+    def iterative_deepening(self, position, max_depth=None):
+        """Search the best column of a given `position` with
+        `alphabeta`, one depth at a time, until the search is
+        solved, reaches the `max_depth` or `time_out` turns `True`.
+
+        The best column of each completed depth is searched first
+        in the next one. A winning column is played without search
+        and, if the time runs out before the first depth, a column
+        which blocks a win of the opponent is preferred.
+
+        # Arguments
+            position: `Position`, required, board state, the
+                player to move is `position.color`
+            max_depth: int, optional, default `None`
+                - maximum depth, `None` to search until the end
+                    of the game
+
+        # Return
+            value: int, value of the best column in the deepest
+                completed search, positive when the player to move
+                wins, negative when loses and zero if unknown
+            column: int, best column in the deepest completed search
+        """
+        position = position.copy()
+        self.transposition_table.new_search()
+        empty_squares = WIDTH*HEIGHT - position.num_moves
+        if max_depth is None or max_depth > empty_squares:
+            max_depth = empty_squares
+
+        order = [column for column in MOVE_ORDER if position.can_play(column)]
+        best_value, best_column = 0, order[0]
+
+        player = position.bit_boards[position.color]
+        opponent = position.bit_boards[-position.color]
+        occupied = player | opponent
+        possible = playable_squares(occupied)
+        wins = winning_squares(player, occupied) & possible
+        if wins:
+            column = next(column for column in order if wins & COLUMN_MASKS[column])
+            return WIN_SCORE - position.num_moves - 1, column
+
+        blocks = winning_squares(opponent, occupied) & possible
+        if blocks:
+            best_column = next(column for column in order if blocks & COLUMN_MASKS[column])
+
+        for depth in range(1, max_depth + 1):
+            try:
+                value, column = self._search_root(position, depth, order)
+            except SearchTimeout:
+                break
+
+            best_value, best_column = value, column
+            order.remove(column)
+            order.insert(0, column)
+
+            if value != 0:
+                break
+
+        return best_value, best_column
+
+    def _search_root(self, position, depth, order):
+        best_value, best_column = -math.inf, None
+        alpha, beta = -WIN_SCORE, WIN_SCORE
+
+        for column, row in self.child_moves(position, order):
+            if helpers.check_winner_at(position, column, row):
+                value = WIN_SCORE - position.num_moves
+            else:
+                value = -self.alphabeta(position, depth - 1, -beta, -alpha)
+
+            if value > best_value:
+                best_value, best_column = value, column
+                alpha = max(alpha, value)
+
+        return best_value, best_column
 
-    def negamax(self, node, depth, color):
+    def alphabeta(self, position, depth, alpha=-WIN_SCORE, beta=WIN_SCORE):
+        """__Negamax algorithm with alpha-beta pruning__
+
+        Search on a single `Position` making and unmaking
+        the moves, columns are searched from the center to the
+        sides, after the best column stored in the transposition
+        table. Wins are scored by how fast they happen, the leaves
+        in the depth limit are scored zero.
+
+        # Arguments
+            position: `Position`, required, board state, the
+                player to move is `position.color`
+            depth: int, required, depth limit of the search
+            alpha: int, optional, lower bound of the search window
+            beta: int, optional, upper bound of the search window
+
+        # Return
+            Value of the `position` for the player to move
+
+        # Exception
+            SearchTimeout: raised when `time_out` turns `True`.
+        """
+        if self.time_out:
+            raise SearchTimeout()
+
+        player = position.bit_boards[position.color]
+        occupied = player | position.bit_boards[-position.color]
+        possible = playable_squares(occupied)
+
+        if winning_squares(player, occupied) & possible:
+            return WIN_SCORE - position.num_moves - 1
+        elif depth < 1 or not possible:
+            return 0
+
+        table = self.transposition_table
+        key = position.key()
+        entry = table.get(key)
+        order = MOVE_ORDER
+
+        if entry:
+            value, entry_depth, bound, move = entry
+            if entry_depth >= depth:
+                if bound == EXACT:
+                    return value
+                elif bound == LOWER_BOUND and value > alpha:
+                    alpha = value
+                elif bound == UPPER_BOUND and value < beta:
+                    beta = value
+
+                if alpha >= beta:
+                    return value
+
+            if move is not None:
+                order = [move] + [column for column in MOVE_ORDER if column != move]
+
+        alpha_start = alpha
+        best_column = None
+        for column in order:
+            if not position.can_play(column):
+                continue
+
+            position.play(column)
+            value = -self.alphabeta(position, depth - 1, -beta, -alpha)
+            position.undo()
+
+            if value > alpha:
+                alpha = value
+                best_column = column
+                if alpha >= beta:
+                    break
+
+        if alpha <= alpha_start:
+            bound = UPPER_BOUND
+        elif alpha >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+
+        table.put(key, alpha, depth, bound, best_column)
+        return alpha
+
+    def negamax(self, node, depth, color, last_move=None, hash=None):
         """__Negamax algorithm__
 
         This algorithm, in order to be more efficiente, 
         also uses a __Zobrist hashing table__ to store
         the values of board states and avoid duplicated
         searches in equal board states in the same depth.
+
+        The moves are made and unmade in the given `node`,
+        it is restored before the method returns.
         
         # Arguments
             node: matrix, required, board state
             depth: int, required, number which controls the
                 depth limit that the recursive calls should hit
             color: int (1 or -1), required, owner of the board state
+            last_move: tuple (column, row), optional, default `None`
+                - last position played in the `node`, when given
+                    only the lines through it are checked for a winner
+            hash: int, optional, default `None`, zobrist hash of the
+                `node`, the hashes of the children are updated from it
 
         # Return
             Best value of a `node`
         """
-        value_stored, update = self.stored_value(node, depth, color)
+        if hash is None:
+            hash = self.hash(node, color)
+
+        value_stored, update = self.stored_value(node, depth, color, hash)
 
         if value_stored:
             return value_stored
 
-        if not update and helpers.check_winner(node):
+        if not update and self._is_won(node, last_move):
             return -1
         elif depth < 1:
             return 0
         
-        childs = self.childs(node, color)
-        if len(childs) < 1:
+        moves = list(helpers.available_positions(node))
+        if len(moves) < 1:
             return 0
             
         best_value = -math.inf
-        for _, child_node in childs:
-            value = -self.negamax(child_node, depth-1, -color)
+        for column, row in moves:
+            child_hash = self.update_hash(hash, column, row, color)
+            node[column,row] = color
+            value = -self.negamax(node, depth-1, -color, (column, row), child_hash)
+            node[column,row] = 0
 
             if value > best_value:
                 best_value = value
@@ -132,16 +399,26 @@ class TreeSearchStrategy(ZobristHashingStrategy):
                 if value > 0:
                     break
 
-        self.save_search(node, best_value, depth, color)
+        self.save_search(node, best_value, depth, color, hash)
 
         return best_value
 
+    def _is_won(self, node, last_move):
+        if last_move is None:
+            return helpers.check_winner(node)
+
+        return helpers.check_winner_at(node, *last_move)
+
     def childs(self, node, color=1):
         """Create an return the children of a given `node`.
 
         The children are generated from all available
         positions in a given `board`
 
+        Compatibility method, each child is a copy of the
+        board, prefer `child_moves` which makes and unmakes
+        the moves in a single `Position`.
+
         # Arguments
             node: matrix, required, board state
             color: int (1 or -1), optional, default 1
@@ -154,19 +431,20 @@ class TreeSearchStrategy(ZobristHashingStrategy):
 
         for column, row in helpers.available_positions(node):
             node[column,row] = color
-            childs.append([column, deepcopy(node)])
+            childs.append([column, node.copy()])
             node[column,row] = 0
 
         return childs
 
-    def stored_value(self, board, depth, color):
+    def stored_value(self, board, depth, color, hash=None):
         """Get the stored value of a board state.
 
         Search in the hash table if the is already a value
         stored for the `board` and return the value if there is
         one and if it's necessary to update the value.
 
-        The search is made on a __Zobrist hashing table__.
+        The search is made on the `transposition_table`, using
+        the __zobrist hash__ of the board as key.
 
         It will require an update in the value stored when
         the stored value depth is inferior to
@@ -176,51 +454,41 @@ class TreeSearchStrategy(ZobristHashingStrategy):
             board: matrix, required, board state
             depth: int, required, current search depth
             color: int (1 or -1), owner of the board state
+            hash: int, optional, zobrist hash of the `board`,
+                calculated when `None`
 
         # Return
             value: int, value of the given board if it finds one
             update: boolean, `True` when the value stored needs to
                 be updated.
         """
-        hash = self.hash(board, color)
-        
+        if hash is None:
+            hash = self.hash(board, color)
+
+        entry = self.transposition_table.get(hash)
+
         value = None
         update = False
-        if hash in self._search_memory:
-            memory = self._search_memory[hash]
-
-            if np.all(memory['board'] != board):
-                error_msg = 'Diferente boards with the same hash!'
-                error_msg += '\nBoard stored: {}'.format(memory['board'])
-                error_msg += '\nCurrent board: {}'.format(board)
-                error_msg += '\nHash: {}'.format(hash)
-                raise ValueError(error_msg)
-            elif memory['depth'] < depth:
+        if entry:
+            if entry[1] < depth:
                 update = True
             else:
-                value = memory['value']
+                value = entry[0]
 
         return value, update
 
-    def save_search(self, board, value, depth, color):
-        """Save the data of a search in a __zobrist hashing table__.
+    def save_search(self, board, value, depth, color, hash=None):
+        """Save the data of a search in the `transposition_table`.
         
         # Arguments:
             board: matrix, required, board state
             value: int, value of the board state
             depth: int, current depth of the search
             color: int (1 or -1), owner of the board state
+            hash: int, optional, zobrist hash of the `board`,
+                calculated when `None`
         """
-        hash = self.hash(board, color)
-        
-        if hash not in self._search_memory:
-            self._search_memory[hash] = {'board': board, 
-                                        'value': value, 
-                                        'depth': depth}
-                                        
-        elif self._search_memory[hash]['depth'] < depth:
-            self._search_memory[hash]['value'] = value
-            self._search_memory[hash]['depth'] = depth
-        else:
-            return False
-    
+        if hash is None:
+            hash = self.hash(board, color)
+
+        return self.transposition_table.put(hash, value, depth)
@@ -0,0 +1,399 @@
+"""Array based Monte Carlo search tree"""
+import math
+import numpy as np
+from .transposition import EXACT, ESTIMATE
+from .treeSearch import MOVE_ORDER
+from ...position import WIDTH, has_four
+
+
+class TreeStore:
+    """Monte Carlo search tree stored in preallocated NumPy arrays
+
+    Same search as the `Node` objects (UCB1 selection, one
+    rollout per new node) but every node is a index in a set of
+    arrays (struct of arrays) instead of a Python object with
+    a copy of the board. The board is a single `Position`
+    played and taken back along the selected path, the selection
+    is a loop with `argmax` over the children of each node and
+    the score is added to the whole path at once.
+
+    With `transpositions` each position is a single node, whatever
+    the order of the moves which reached it, so the tree is a graph
+    (DAG) and a node can be the child of many nodes, sharing its
+    visits and score with all of them. The score of a rollout is
+    added only to the nodes of the path followed in the search.
+
+    The memory used by the tree is fixed by `capacity`, when
+    there is no space left to expand a node `search` returns
+    `False`. To keep the statistics between turns use `reroot`
+    instead of `reset`, the branches not played are released.
+
+    # Arguments
+        rollout_score: function, required, evaluation of a
+            `Position`, from the perspective of the player id 1
+            (same as `Node.rollout_score`)
+        capacity: int, optional, default 100000, maximum
+            number of nodes
+        exploration: float, optional, default 2, exploration
+            constant of the UCB1
+        table: `TranspositionTable`, optional, default None
+            - the rollout scores are stored in it as estimates
+                and positions solved by other searches are
+                not rolled out (see `Node`)
+        transpositions: bool, optional, default `True`, share the
+            nodes of the same position
+        rollout_scores: function, optional, default `None`, evaluation
+            of a list of `Position` objects at once, used by
+            `search_batch`, by default calls `rollout_score` for each one
+
+    # Attributes
+        visits: float array, number of visits of each node
+        value_sums: float array, sum of the scores of each node,
+            from the perspective of the player who made the
+            move of the node
+        children: int array (capacity x 7), indexes of the
+            children of each node, `-1` after the last child
+        moves: int array (capacity x 7), column played to
+            reach each child of the node
+        num_children: int array, number of children of each node
+        nodes: dict, index of the node of each position key
+        size: int, number of nodes in use, the root is the node 0
+
+    # Example
+
+    ```python
+    tree = TreeStore(self.rollout_score, capacity=50000)
+    tree.reset(Position(board))
+
+    while not self.time_out and tree.search():
+        pass
+
+    column = tree.best_move()
+    ```
+    """
+    root = 0
+
+    def __init__(self, rollout_score, capacity=100000, exploration=2, table=None,
+                 transpositions=True, rollout_scores=None):
+        self.rollout_score = rollout_score
+        self.rollout_scores = rollout_scores or self._rollout_scores
+        self.capacity = capacity
+        self.exploration = exploration
+        self.table = table
+        self.transpositions = transpositions
+
+        self.visits = np.zeros(capacity, dtype=np.float64)
+        self.value_sums = np.zeros(capacity, dtype=np.float64)
+        self.children = np.full((capacity, WIDTH), -1, dtype=np.int32)
+        self.moves = np.full((capacity, WIDTH), -1, dtype=np.int8)
+        self.num_children = np.zeros(capacity, dtype=np.int8)
+        self.expanded = np.zeros(capacity, dtype=bool)
+        self.terminal = np.zeros(capacity, dtype=bool)
+        self.nodes = {}
+        self.size = 0
+        self.position = None
+
+    def __len__(self):
+        return self.size
+
+    def _rollout_scores(self, positions):
+        return [self.rollout_score(position) for position in positions]
+
+    def reset(self, position):
+        """Remove all the nodes and create a new root
+
+        # Arguments
+            position: `Position`, required, board state of the root,
+                `position.color` is the player to move
+        """
+        self._clear(0, max(self.size, 1))
+        self.position = position.copy()
+        self.nodes = {position.key(): self.root}
+        self.size = 1
+
+    def reroot(self, position):
+        """Use the node of a position already in the tree as the
+        new root, keeping the statistics of all the nodes below it.
+
+        The nodes not reachable from the new root are released and
+        the ones kept are moved to the beginning of the arrays.
+        Requires `transpositions` to find the position.
+
+        # Arguments
+            position: `Position`, required, board state of the new
+                root, e.g. the root of the last search after the
+                move of the agent and the move of the opponent
+
+        # Return
+            `True` if the position was in the tree, otherwise the
+            tree is `reset` and `False` is returned
+        """
+        node = self.nodes.get(position.key()) if self.size else None
+        if node is None:
+            self.reset(position)
+            return False
+
+        # nodes reachable from the new root, one level at a time
+        reachable = np.zeros(self.size, dtype=bool)
+        reachable[node] = True
+        frontier = np.array([node])
+        order = [frontier]
+        while len(frontier):
+            children = self.children[frontier].ravel()
+            children = np.unique(children[children >= 0])
+            frontier = children[~reachable[children]]
+            reachable[frontier] = True
+            order.append(frontier)
+        order = np.concatenate(order)
+
+        # new index of each node, the last item maps the empty children (-1)
+        mapping = np.full(self.size + 1, -1, dtype=np.int32)
+        mapping[order] = np.arange(len(order))
+
+        size = len(order)
+        for array in (self.visits, self.value_sums, self.moves,
+                      self.num_children, self.expanded, self.terminal):
+            array[:size] = array[order]
+        self.children[:size] = mapping[self.children[order]]
+        self._clear(size, self.size)
+
+        self.nodes = {key: int(mapping[index]) for key, index in self.nodes.items()
+                      if reachable[index]}
+        self.position = position.copy()
+        self.size = size
+        return True
+
+    def _clear(self, start, end):
+        self.visits[start:end] = 0
+        self.value_sums[start:end] = 0
+        self.children[start:end] = -1
+        self.moves[start:end] = -1
+        self.num_children[start:end] = 0
+        self.expanded[start:end] = False
+        self.terminal[start:end] = False
+
+    def search(self):
+        """Run one iteration of the search: selection,
+        expansion, rollout and backpropagation
+
+        # Return
+            `False` if the tree is full or the root has no moves,
+            `True` otherwise
+        """
+        path = self._select_path()
+        if path is None:
+            return False
+
+        node, position = path[-1], self.position
+        score = self._known_score(node, position)
+        if score is None:
+            score = self._store_score(position, self.rollout_score(position))
+
+        self._undo_path(path)
+        self.backpropagate(path, score)
+        return True
+
+    def search_batch(self, batch_size, virtual_loss=1):
+        """Run up to `batch_size` iterations of the search
+        evaluating all the new leaves in a single call
+        of `rollout_scores`
+
+        Each selected path gets a __virtual loss__, its nodes
+        count as visited and lost until the batch is evaluated,
+        so the next selections of the batch follow other paths.
+        A leaf selected twice in the same batch is evaluated once.
+
+        # Arguments
+            batch_size: int, required, number of selections
+            virtual_loss: float, optional, default 1
+
+        # Return
+            `False` if the tree is full or the root has no moves,
+            `True` otherwise
+        """
+        pending = {}
+        collisions = []
+        running = True
+
+        for _ in range(batch_size):
+            path = self._select_path(pending)
+            if path is None:
+                running = False
+                break
+
+            node, position = path[-1], self.position
+            score = None if node in pending else self._known_score(node, position)
+            if score is not None:
+                self._undo_path(path)
+                self.backpropagate(path, score)
+                continue
+
+            if node in pending:
+                collisions.append(path)
+            else:
+                pending[node] = (path, position.copy())
+            self._undo_path(path)
+
+            self.visits[path] += virtual_loss
+            self.value_sums[path[1:]] -= virtual_loss
+
+        if pending:
+            positions = [position for _, position in pending.values()]
+            scores = self.rollout_scores(positions)
+        else:
+            scores = []
+
+        for path in collisions + [path for path, _ in pending.values()]:
+            self.visits[path] -= virtual_loss
+            self.value_sums[path[1:]] += virtual_loss
+
+        for (path, position), score in zip(pending.values(), scores):
+            self.backpropagate(path, self._store_score(position, score))
+
+        return running
+
+    def _select_path(self, pending=()):
+        """Select the nodes from the root to a leaf (or a node
+        in `pending`), the moves are left played in `position`,
+        `None` if the tree is full"""
+        position = self.position
+        node = self.root
+        path = [node]
+
+        while node == self.root or (self.visits[node] and not self.terminal[node]
+                                    and node not in pending):
+            if not self.expanded[node] and not self.expand(node, position):
+                self._undo_path(path)
+                return None
+
+            slot = self.select(node)
+            position.play(int(self.moves[node, slot]))
+            node = int(self.children[node, slot])
+            path.append(node)
+
+        return path
+
+    def _undo_path(self, path):
+        for _ in range(len(path) - 1):
+            self.position.undo()
+
+    def select(self, node):
+        """Return the index (slot) in `children` of the child
+        of `node` with the highest UCB1, the unvisited children first"""
+        children = self.children[node, :self.num_children[node]]
+        visits = self.visits[children]
+
+        slot = visits.argmin()
+        if visits[slot] == 0:
+            return slot
+
+        ucb = (self.value_sums[children]/visits +
+               self.exploration*np.sqrt(math.log1p(self.visits[node])/visits))
+        return ucb.argmax()
+
+    def expand(self, node, position):
+        """Create the children of a `node`, with `transpositions`
+        the positions already in the tree are not created again
+
+        # Arguments
+            node: int, index of the node
+            position: `Position`, board state of the node
+
+        # Return
+            `True` if the children were created
+        """
+        columns = [column for column in MOVE_ORDER if position.can_play(column)]
+        keys = []
+        for column in columns:
+            position.play(column)
+            keys.append(position.key())
+            position.undo()
+
+        new_keys = [key for key in keys if key not in self.nodes] \
+            if self.transpositions else keys
+        if not columns or self.size + len(new_keys) > self.capacity:
+            return False
+
+        for slot, (column, key) in enumerate(zip(columns, keys)):
+            child = self.nodes.get(key) if self.transpositions else None
+            if child is None:
+                child = self.size
+                self.size += 1
+                if self.transpositions:
+                    self.nodes[key] = child
+
+            self.children[node, slot] = child
+            self.moves[node, slot] = column
+
+        self.num_children[node] = len(columns)
+        self.expanded[node] = True
+        return True
+
+    def backpropagate(self, path, score):
+        """Add a visit and the `score` to every node in the `path`
+
+        # Arguments
+            path: list, indexes of the nodes from the root
+            score: float, score of the last node of the `path`
+                from the perspective of the player who made its move
+        """
+        signs = np.ones(len(path))
+        signs[-2::-2] = -1
+        self.visits[path] += 1
+        self.value_sums[path] += signs*score
+
+    def _known_score(self, node, position):
+        """Score of a leaf from the perspective of the player
+        who made its move if it doesn't need a rollout: the terminal
+        nodes and the positions in the `table`, otherwise `None`"""
+        if self.terminal[node]:
+            return self.value_sums[node]/self.visits[node]
+
+        if has_four(position.bit_boards[-position.color]):
+            self.terminal[node] = True
+            return 1.0
+        elif position.is_full:
+            self.terminal[node] = True
+            return 0.0
+
+        if self.table is None:
+            return None
+
+        entry = self.table.get(position.key())
+        if entry:
+            value, _, bound, _ = entry
+            if bound == ESTIMATE:
+                return -value
+            elif bound == EXACT and value != 0:
+                return -math.copysign(1, value)
+
+    def _store_score(self, position, score):
+        """Convert a rollout score (perspective of the player id 1)
+        to the perspective of the player who made the last move and
+        store it in the `table`"""
+        score = score*position.color
+        if self.table is not None:
+            self.table.put(position.key(), score, 0, ESTIMATE)
+
+        return -score
+
+    def value(self, node):
+        """Average score of a `node`, from the perspective
+        of the player who made its move"""
+        if self.visits[node] == 0:
+            return 0
+
+        return self.value_sums[node]/self.visits[node]
+
+    def best_move(self):
+        """Return the column of the child of the root with
+        the highest value, `None` if the root was not expanded"""
+        num_children = self.num_children[self.root]
+        if not num_children:
+            return None
+
+        children = self.children[self.root, :num_children]
+        values = np.where(self.visits[children] > 0,
+                          self.value_sums[children]/np.maximum(self.visits[children], 1),
+                          -math.inf)
+        return int(self.moves[self.root, values.argmax()])
@@ -0,0 +1,521 @@
+"""Headless matches between agents
+
+Run many games between two agents over a pool of processes,
+without the app, e.g. to compare a change of an agent:
+
+    python -m connectFourLab.game.arena AgentMonteCarlo AgentNegamax -n 1000 -t 30
+"""
+import os
+import ast
+import math
+import inspect
+import json
+import time
+import random
+import argparse
+import multiprocessing
+import numpy as np
+from .game import RunGame
+from .agents import AgentHuman, find_agents
+from .openings import load_openings, DEFAULT_FILE as DEFAULT_OPENINGS
+
+
+def get_agent(name):
+    """Return the agent class of a given name
+
+    # Arguments
+        name: str, required, class name (`AgentMonteCarlo`),
+            class name without the prefix (`MonteCarlo`) or the
+            `name` attribute of the agent (`Monte Carlo`), the
+            case is ignored
+
+    # Exceptions
+        ValueError: there is no agent with the `name`
+    """
+    key = name.lower().replace(' ', '')
+    for agent in find_agents():
+        names = (agent.__name__, agent.__name__[len('Agent'):], agent.name)
+        if key in [n.lower().replace(' ', '') for n in names]:
+            return agent
+
+    raise ValueError('Agent not found: {}'.format(name))
+
+
+def parse_agent(text):
+    """Parse an agent given as `Name:keyword=value,keyword=value`
+
+    The values are Python literals or strings, the keywords
+    are arguments of the class or attributes to change in the
+    agent (see `create_agent`).
+
+    # Return
+        Agent class and a dict with the keywords
+
+    # Example
+
+    ```python
+    agent, params = parse_agent('MonteCarlo:num_simulations=500')
+    ```
+    """
+    name, _, params = text.partition(':')
+    kwargs = {}
+    for item in filter(None, params.split(',')):
+        keyword, _, value = item.partition('=')
+        try:
+            value = ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            value = value.strip()
+        kwargs[keyword.strip()] = value
+
+    return get_agent(name.strip()), kwargs
+
+
+def create_agent(agent, params=None):
+    """Create an agent with the given `params`, the ones accepted
+    by the class arguments are used in the instantiation and
+    the others replace attributes of the agent
+
+    # Exceptions
+        AttributeError: the agent has no attribute with
+            the name of a parameter
+    """
+    params = dict(params or {})
+    arguments = inspect.signature(agent).parameters
+    instance = agent(**{kw: params.pop(kw) for kw in list(params) if kw in arguments})
+    for kw, value in params.items():
+        if not hasattr(instance, kw):
+            raise AttributeError('{} has no attribute {}'.format(agent.__name__, kw))
+        setattr(instance, kw, value)
+
+    return instance
+
+
+class TimedAgent:
+    """Measure the time of the moves of an agent
+
+    Replace the `action` of the agent with a timed version,
+    keeps the total, the number and the longest of the moves.
+    """
+
+    def __init__(self, agent):
+        self.agent = agent
+        self.action = agent.action
+        self.total = 0.
+        self.count = 0
+        self.max = 0.
+        agent.action = self
+
+    def __call__(self, board):
+        start = time.perf_counter()
+        try:
+            return self.action(board)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.total += elapsed
+            self.count += 1
+            self.max = max(self.max, elapsed)
+
+    def stats(self):
+        return {'total': self.total, 'moves': self.count, 'max': self.max}
+
+
+def play_game(task):
+    """Play a single game of a match (runs in the workers of `Arena`)
+
+    # Arguments
+        task: dict, `game` (index), `agents` (two pairs of class and
+            params, agent `A` and `B`), `swap` (agent `B` is the player
+            one), `time_limit`, `seed` and `opening` (columns played
+            before the game, optional)
+
+    # Return
+        dict with the result from the perspective of the agent `A`:
+        `result` (`win`, `draw`, `loss` or `None`), `status`, `moves`,
+        `A_first` (the agent `A` played the first move after the
+        opening), `timeout` and `exception` (`A`, `B` or `None`),
+        `error` and the `time` of the moves of each agent
+    """
+    if task.get('seed') is not None:
+        random.seed(task['seed'])
+        np.random.seed(task['seed'] % 2**32)
+
+    result = {'game': task['game'], 'A_first': not task['swap'], 'result': None,
+              'status': None, 'moves': 0, 'timeout': None, 'exception': None,
+              'error': None, 'time': {}}
+    timed = {}
+    try:
+        for label, (agent, params) in zip('AB', task['agents']):
+            timed[label] = TimedAgent(create_agent(agent, params))
+
+        labels = {1: 'A', -1: 'B'} if not task['swap'] else {1: 'B', -1: 'A'}
+        game = RunGame(timed[labels[1]].agent, timed[labels[-1]].agent,
+                       first_player_randomized=False,
+                       time_limit=task.get('time_limit'),
+                       start_position=task.get('opening'))
+        # the player two starts after an opening with an odd number of moves
+        first_player = game.start_position.color if game.start_position else 1
+        result['A_first'] = labels[first_player] == 'A'
+    except Exception as e:
+        result['status'] = 'exception'
+        result['error'] = repr(e)
+        result['exception'] = 'AB'[len(timed)] if len(timed) < 2 else None
+        return result
+
+    result['status'] = game.status.name
+    result['moves'] = len(game.memory)
+    result['time'] = {label: timed[label].stats() for label in timed}
+
+    if game.status == game.GameStatus.exception:
+        # the player of the last move started (or returned an invalid column)
+        last_player = game.position.color
+        result['exception'] = labels[last_player]
+        result['error'] = repr(game.exception[1])
+        return result
+
+    if game.winner is None:
+        result['result'] = 'draw'
+    else:
+        winner = labels[game.winner.id]
+        result['result'] = 'win' if winner == 'A' else 'loss'
+        if game.status == game.GameStatus.timeout:
+            result['timeout'] = 'B' if winner == 'A' else 'A'
+
+    return result
+
+
+def opening_of(openings, game):
+    """Return the opening of the game of index `game`, each
+    opening is used by two games in a row"""
+    if not openings:
+        return None
+
+    return openings[(game//2) % len(openings)]
+
+
+def run_tasks(tasks, num_workers=None):
+    """Play the games of a list of tasks (see `play_game`) in
+    `num_workers` processes, `0` plays them in this process,
+    and yield the results in the order they end"""
+    if num_workers == 0:
+        for task in tasks:
+            yield play_game(task)
+        return
+
+    # new processes, the agents may have threads or models loaded
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(num_workers) as pool:
+        for result in pool.imap_unordered(play_game, tasks):
+            yield result
+
+
+class ArenaStats:
+    """Aggregate of the results of `play_game`
+
+    # Attributes
+        wins, draws, losses: int, results of the agent `A`,
+            the timeouts count as losses of the agent which ran
+            out of time, the games with exceptions are not counted
+        timeouts, exceptions: dict, count of each agent (`A` and `B`)
+        move_time: dict, total time, number and longest
+            of the moves of each agent
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.timeouts = {'A': 0, 'B': 0}
+        self.exceptions = {'A': 0, 'B': 0}
+        self.move_time = {label: {'total': 0., 'moves': 0, 'max': 0.} for label in 'AB'}
+
+    def add(self, result):
+        self.games += 1
+        if result['result'] == 'win':
+            self.wins += 1
+        elif result['result'] == 'draw':
+            self.draws += 1
+        elif result['result'] == 'loss':
+            self.losses += 1
+
+        if result['timeout']:
+            self.timeouts[result['timeout']] += 1
+        if result['exception']:
+            self.exceptions[result['exception']] += 1
+
+        for label, stats in result['time'].items():
+            total = self.move_time[label]
+            total['total'] += stats['total']
+            total['moves'] += stats['moves']
+            total['max'] = max(total['max'], stats['max'])
+
+    @property
+    def score(self):
+        """Points of the agent `A` per game (1 per win, .5 per draw)"""
+        played = self.wins + self.draws + self.losses
+        return (self.wins + .5*self.draws)/played if played else None
+
+    def mean_move_time(self, label):
+        stats = self.move_time[label]
+        return stats['total']/stats['moves'] if stats['moves'] else 0.
+
+    def summary(self, names=('A', 'B')):
+        """Return a text with all the statistics"""
+        score = self.score
+        lines = ['{} vs {} - games: {}'.format(names[0], names[1], self.games),
+                 'W/D/L: {}/{}/{} - score: {}'.format(
+                     self.wins, self.draws, self.losses,
+                     '-' if score is None else '{:.3f}'.format(score))]
+        for label, name in zip('AB', names):
+            lines.append('{}: timeouts {} - exceptions {} - move time mean {:.4f}s max {:.4f}s'
+                         .format(name, self.timeouts[label], self.exceptions[label],
+                                 self.mean_move_time(label), self.move_time[label]['max']))
+        return '\n'.join(lines)
+
+
+class SPRT:
+    """Sequential probability ratio test of the strength
+    of the agent `A` against the agent `B`
+
+    Test the hypothesis H0, `A` is `elo0` points stronger than `B`,
+    against H1, `A` is `elo1` points stronger. After each game the
+    log-likelihood ratio (LLR) of the results is compared with the
+    bounds: below `lower` H0 is accepted, above `upper` H1 is accepted,
+    otherwise the test goes on. The probability of accepting H1 when
+    H0 is true is at most `alpha` and of accepting H0 when H1 is
+    true at most `beta`.
+
+    The LLR is the normal approximation of the trinomial (win, draw,
+    loss) model, as used by the chess engines testing frameworks.
+    The variance of the score has an extra half game of each outcome,
+    so a match of only wins is not accepted after the first game.
+
+    # Arguments
+        elo0: float, optional, default 0
+        elo1: float, optional, default 10
+        alpha: float, optional, default .05
+        beta: float, optional, default .05
+
+    # Attributes
+        llr: float, LLR of the last `update`
+        status: `None` while the test goes on, `'H0'` or `'H1'`
+            when a hypothesis was accepted
+
+    # Example
+
+    ```python
+    arena = Arena(AgentNew, AgentOld, num_games=10000, sprt=SPRT(0, 20))
+    arena.run()
+    print(arena.sprt.status, arena.sprt.llr, arena.stats.games)
+    ```
+    """
+
+    def __init__(self, elo0=0, elo1=10, alpha=.05, beta=.05):
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.alpha = alpha
+        self.beta = beta
+        self.lower = math.log(beta/(1 - alpha))
+        self.upper = math.log((1 - beta)/alpha)
+        self.llr = 0.
+        self.status = None
+
+    @staticmethod
+    def expected_score(elo):
+        return 1/(1 + 10**(-elo/400))
+
+    def log_likelihood_ratio(self, wins, draws, losses):
+        """Return the LLR of H1 against H0 for a number of
+        wins, draws and losses of the agent `A`"""
+        games = wins + draws + losses
+        if not games:
+            return 0.
+
+        score = (wins + .5*draws)/games
+        total = games + 1.5
+        variance = ((wins + .5)*(1 - score)**2 + (draws + .5)*(.5 - score)**2 +
+                    (losses + .5)*score**2)/total
+        score0 = self.expected_score(self.elo0)
+        score1 = self.expected_score(self.elo1)
+        return games*(score1 - score0)*(2*score - score0 - score1)/(2*variance)
+
+    def update(self, stats):
+        """Compute the LLR of an `ArenaStats` and check the bounds
+
+        # Return
+            `status`
+        """
+        self.llr = self.log_likelihood_ratio(stats.wins, stats.draws, stats.losses)
+        if self.llr <= self.lower:
+            self.status = 'H0'
+        elif self.llr >= self.upper:
+            self.status = 'H1'
+        else:
+            self.status = None
+
+        return self.status
+
+
+class Arena:
+    """Play many games between two agents in parallel
+
+    The games are played in `num_workers` processes, each game
+    creates new instances of the agents. The colors are alternated,
+    the agent `A` is the player one (id `1`) in the even games.
+
+    With `openings` the games start from the positions of an opening
+    suite (see [openings](./openings)), each opening is played twice
+    in a row with the colors swapped, so the advantage of an opening
+    goes to both agents and deterministic agents play different games.
+
+    # Arguments
+        agent_a: agent class or pair (class, params dict), required
+        agent_b: same as `agent_a`
+        num_games: int, optional, default 100
+        time_limit: int, optional, default `None`, time of each
+            player per game, see `RunGame`
+        num_workers: int, optional, default `None`, number of
+            processes, `None` for the number of CPUs, `0` plays
+            the games in this process
+        seed: int, optional, default `None`, seed of the game `i`
+            is `seed + i`
+        sprt: `SPRT`, optional, default `None`, stop the match as soon as
+            the test accepts a hypothesis, `num_games` is the maximum
+        openings: list, optional, default `None`, openings (lists
+            of columns), used in order and repeated if there are
+            fewer than half `num_games`
+
+    # Example
+
+    ```python
+    from connectFourLab.game.arena import Arena
+    from connectFourLab.game.agents import AgentRandom
+    from connectFourLab.game.agents.monteCarlo import AgentMonteCarlo
+
+    arena = Arena(AgentMonteCarlo, AgentRandom, num_games=100)
+    for result in arena.results():
+        print(result['game'], result['result'])
+
+    print(arena.stats.summary())
+    ```
+    """
+
+    def __init__(self, agent_a, agent_b, num_games=100, time_limit=None,
+                 num_workers=None, seed=None, sprt=None, openings=None):
+        self.agents = [agent if isinstance(agent, (tuple, list)) else (agent, {})
+                       for agent in (agent_a, agent_b)]
+        for agent, _ in self.agents:
+            if issubclass(agent, AgentHuman):
+                raise ValueError('The arena can not play with human agents.')
+
+        self.num_games = num_games
+        self.time_limit = time_limit
+        self.num_workers = os.cpu_count() if num_workers is None else num_workers
+        self.seed = seed
+        self.sprt = sprt
+        self.openings = openings
+        self.stats = ArenaStats()
+
+    def tasks(self):
+        for i in range(self.num_games):
+            yield {'game': i, 'agents': self.agents, 'swap': i % 2 == 1,
+                   'time_limit': self.time_limit,
+                   'seed': None if self.seed is None else self.seed + i,
+                   'opening': opening_of(self.openings, i)}
+
+    def results(self):
+        """Play the games, yield the result of each game
+        (see `play_game`) as soon as it ends, with a `sprt` the games
+        still running when the test ends are discarded"""
+        for result in run_tasks(self.tasks(), self.num_workers):
+            self.stats.add(result)
+            if self.sprt:
+                self.sprt.update(self.stats)
+                result['llr'] = self.sprt.llr
+            yield result
+            if self.sprt and self.sprt.status:
+                return
+
+    def run(self, callback=None):
+        """Play all the games
+
+        # Arguments
+            callback: function, optional, called with each result
+
+        # Return
+            `ArenaStats`
+        """
+        for result in self.results():
+            if callback:
+                callback(result)
+
+        return self.stats
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m connectFourLab.game.arena',
+                                     description='Play games between two agents.')
+    parser.add_argument('agent_a', nargs='?',
+                        help='agent, e.g. MonteCarlo or "AgentMCTSNN:model_file=\'m.h5\'"')
+    parser.add_argument('agent_b', nargs='?')
+    parser.add_argument('-n', '--num-games', type=int, default=100)
+    parser.add_argument('-t', '--time-limit', type=float, default=None,
+                        help='seconds of each player per game')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='number of processes, default number of CPUs')
+    parser.add_argument('-s', '--seed', type=int, default=None)
+    parser.add_argument('-o', '--output', default=None,
+                        help='file to append the result of each game (JSON lines)')
+    parser.add_argument('-q', '--quiet', action='store_true')
+    parser.add_argument('--sprt', type=float, nargs=2, metavar=('ELO0', 'ELO1'),
+                        help='stop when the SPRT of ELO0 against ELO1 ends, '
+                             'the number of games is the maximum')
+    parser.add_argument('--alpha', type=float, default=.05)
+    parser.add_argument('--beta', type=float, default=.05)
+    parser.add_argument('--openings', nargs='?', const=DEFAULT_OPENINGS, default=None,
+                        help='start the games from the openings of a file, '
+                             'default the suite of the game')
+    parser.add_argument('--list', action='store_true', help='list the agents')
+    args = parser.parse_args(args)
+
+    if args.list or not args.agent_b:
+        for agent in find_agents():
+            print('{} - {}'.format(agent.__name__, agent.name))
+        return
+
+    agent_a, agent_b = parse_agent(args.agent_a), parse_agent(args.agent_b)
+    names = (args.agent_a, args.agent_b)
+    sprt = SPRT(args.sprt[0], args.sprt[1], args.alpha, args.beta) if args.sprt else None
+    openings = load_openings(args.openings) if args.openings else None
+    arena = Arena(agent_a, agent_b, args.num_games, args.time_limit,
+                  args.workers, args.seed, sprt, openings)
+    if sprt:
+        print('SPRT elo0 {} elo1 {} - LLR bounds [{:.2f}, {:.2f}]'.format(
+            sprt.elo0, sprt.elo1, sprt.lower, sprt.upper))
+
+    output = open(args.output, 'a') if args.output else None
+    try:
+        start = time.time()
+        for result in arena.results():
+            if output:
+                output.write(json.dumps(dict(result, agents=names)) + '\n')
+                output.flush()
+            if not args.quiet:
+                print('Game {} ({} first): {} - {} moves{}{}'.format(
+                    result['game'], names[0] if result['A_first'] else names[1],
+                    result['result'] or result['status'], result['moves'],
+                    ' - LLR {:.2f}'.format(result['llr']) if sprt else '',
+                    ' - ' + result['error'] if result['error'] else ''))
+        print(arena.stats.summary(names))
+        if sprt:
+            print('SPRT: {} - LLR {:.2f}'.format(
+                {'H0': 'H0 accepted', 'H1': 'H1 accepted'}.get(sprt.status, 'no decision'),
+                sprt.llr))
+        print('Elapsed: {:.1f}s'.format(time.time() - start))
+    finally:
+        if output:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
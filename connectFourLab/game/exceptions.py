@@ -18,4 +18,13 @@ class MissingModel(Exception):
     def __init__(self, cls_name, model_description):
         msg = 'MissingModel: The class {} require the model "{}".' \
                 .format(cls_name, model_description)
-        super().__init__(msg)
\ No newline at end of file
+        super().__init__(msg)
+
+
+class SearchTimeout(Exception):
+    """Search Timeout Exception. Raised inside a tree search
+    when the time of the turn runs out, so the search can be
+    interrupted at any depth.
+    """
+    def __init__(self):
+        super().__init__('The search time ran out.')
\ No newline at end of file
@@ -5,10 +5,11 @@ import numpy as np
 import time
 import traceback
 from enum import Enum
-from copy import copy, deepcopy
+from copy import copy
 from threading import Thread
 from enum import Enum, auto
 from . import helpers
+from .position import Position, BOARD_DTYPE
 from .timer import Chronometer, Timer
 from .agents import AgentRandom, AgentHuman
 
@@ -49,11 +50,19 @@ class RunGame:
                 else you have to call `start`
         async: bool, optional, default False
             - If `True` the game will be run asynchronously
+        start_position: `Position` or list, optional, default None
+            - Board state where the matches start, e.g. an opening
+            - `Position`: its `color` is the id of the player who
+                plays the next move (`first_player_randomized` is ignored)
+            - list: columns played from the empty board by the
+                player one and two alternately
 
     # Attributes
         GameStatus: Enum -> (running, winner, tie, timeout, killed, exception)
             - Example: RunGame.GameStatus.winner
         BOARD_FORMAT: tuple, constant, value (7,7), define the board dimensions
+        BOARD_DTYPE: NumPy dtype, default int8, dtype of the board
+            matrices given to the agents and saved in the `memory`
         MAX_TURNS_POSSIBLE: int, the maximum number of turns in a match
         winner: `AgentBase` object
             - The Agent winner of the last match, if the is one.
@@ -116,6 +125,12 @@ class RunGame:
     # UI Attributes
         memory: list, register all turns data
             - Item: (player_id, current_board, column_choosed)
+            - The boards are read-only
+        board: matrix (7x7), current state of the board
+        board_view: read-only view of `board`, given to the agents
+            each turn without copying the board (see `AgentBase.clone`)
+        position: `Position`, bit board of the current state
+            of the board, updated along with `board`
         players: dict, two Agents one for each player
             - player one: id `1` - two: id `-1`
         clock: dict, two clocks (`Chronometer` or `Timer`) one for each player
@@ -125,7 +140,9 @@ class RunGame:
         See [Game Screen - Board class](../../app/screens/game#board-class)
     """
     GameStatus = Enum('GameStatus', 'running winner tie timeout killed exception')
+    start_position = None
     BOARD_FORMAT = (7,7)
+    BOARD_DTYPE = BOARD_DTYPE
     MAX_TURNS_POSSIBLE = BOARD_FORMAT[0]*BOARD_FORMAT[1]
     
 
@@ -136,7 +153,8 @@ class RunGame:
                  time_limit=None,
                  print_result_on_console=False,
                  start=True,
-                 async=False
+                 async=False,
+                 start_position=None
                 ):
         self.first_player_randomized = first_player_randomized
         self._time_limit = time_limit
@@ -144,6 +162,7 @@ class RunGame:
         self.status = None
         self.game_thread = None
         self.async=async
+        self.start_position = self._load_start_position(start_position)
 
         if not player_one:
             player_one = AgentRandom()
@@ -204,7 +223,9 @@ class RunGame:
             self.on_game_start()
 
             first_player = 1
-            if self.first_player_randomized:
+            if self.start_position is not None:
+                first_player = self.start_position.color
+            elif self.first_player_randomized:
                 first_player = 1 if random.randint(0,1) == 0 else -1
 
             self._define_char(first_player)
@@ -247,9 +268,11 @@ class RunGame:
         for each player. If the time runs out the player loses.
         """
         next_to_play = fisrt_player
+        self.position.color = fisrt_player
+        start_turn = self.position.num_moves
 
-        for i in range(self.MAX_TURNS_POSSIBLE):
-            turn = i + 1
+        for i in range(self.MAX_TURNS_POSSIBLE - start_turn):
+            turn = start_turn + i + 1
             self.on_new_turn(self.players[next_to_play], 
                               self.clocks[next_to_play])
 
@@ -261,7 +284,7 @@ class RunGame:
                     c_clock = copy(clock)
                     self.players[playing].update_clock(turn, c_clock)
 
-                column = self.players[playing].action(deepcopy(self.board))
+                column = self.players[playing].action(self.board_view)
                 # Thread(target=self.get_player_choice, args=(playing,)).start()
 
             if self.time_expired:
@@ -276,28 +299,32 @@ class RunGame:
                 raise InvalidColumn(self.players[playing].name, column,
                     'Column out of range, the range of columns is 0 to 6.')
 
-            next_pos = helpers.next_position(self.board, column)
+            next_pos = helpers.next_position(self.position, column)
 
             if next_pos is None:
                 raise InvalidColumn(self.players[playing].name, column,
                     'The chosen column is full.')
             
-            self.memory.append([playing, deepcopy(self.board), column])
+            # the boards of the memory are kept in a single array per game
+            self._memory_boards[len(self.memory)] = self.board
+            self.memory.append([playing, self._memory_view[len(self.memory)], column])
 
             self.on_end_turn()
 
 
+            self.position.play(column)
             self.board[column, next_pos] = playing
 
-            self._check_winner()
+            self._check_winner(column, next_pos)
 
             if self.winner:
                 self.status = self.GameStatus.winner
                 return
 
-    def _check_winner(self):
-        """Check if the current board has a winner, if so sets the winner"""
-        winner = helpers.check_winner(self.board)
+    def _check_winner(self, column, row):
+        """Check if the last move (`column`, `row`) won the game,
+        if so sets the winner"""
+        winner = helpers.check_winner_at(self.position, column, row)
         if winner:
             self.winner = self.players[winner]
     
@@ -317,7 +344,40 @@ class RunGame:
             time.sleep(.2)
 
     def _empty_board(self):
-        self.board = np.zeros(self.BOARD_FORMAT, dtype=int)
+        if self.start_position is not None:
+            self.position = self.start_position.copy()
+            self.board = self.position.to_board(self.BOARD_DTYPE)
+        else:
+            self.board = np.zeros(self.BOARD_FORMAT, dtype=self.BOARD_DTYPE)
+            self.position = Position()
+
+        self.board_view = self._read_only(self.board)
+        # a new array each game, the memory of the last game may still be in use
+        self._memory_boards = np.empty((self.MAX_TURNS_POSSIBLE,) + self.BOARD_FORMAT,
+                                       dtype=self.BOARD_DTYPE)
+        self._memory_view = self._read_only(self._memory_boards)
+
+    @staticmethod
+    def _read_only(array):
+        """Return a view of the array which can not be modified"""
+        view = array.view()
+        view.flags.writeable = False
+        return view
+
+    @staticmethod
+    def _load_start_position(start_position):
+        """Return the `start_position` argument as a `Position`"""
+        if start_position is None:
+            return None
+        elif not isinstance(start_position, Position):
+            columns, start_position = start_position, Position()
+            for column in columns:
+                start_position.play(column)
+
+        if start_position.winner() or start_position.is_full:
+            raise ValueError('The start position is the end of a game.')
+
+        return start_position.copy()
 
     @property
     def is_running(self):
@@ -1,4 +1,6 @@
 """Helpers"""
+import numpy as np
+from .position import Position, WIDTH, HEIGHT, BITS, BITS_ARRAY, has_four, has_four_batch
 
 
 def check_winner(game_board):
@@ -9,7 +11,7 @@ def check_winner(game_board):
     combination for a win.
 
     # Arguments
-        game_board: matrix (7x7), required
+        game_board: matrix (7x7) or `Position`, required
 
     # Return
         1: id 1 is the winner
@@ -20,7 +22,7 @@ def check_winner(game_board):
 
     ```
     import numpy as np
-    board = np.zeros((7,7), dtype=int)
+    board = np.zeros((7,7), dtype=np.int8)
     board[1,0] = 1
     board[2,0] = 1
     board[3,0] = 1
@@ -34,22 +36,15 @@ def check_winner(game_board):
         print('Winner id:', winner)
     ```
     """
-    #horizontal, vertical, diagonal: top-bottom, bottom-top
-    directions = [8,1,7,9] # 7x7 table
-
-    # directions = [7,1,6,8] # 7x6 table
-    # directions = [6,1,5,7] # 6x6 table
+    if isinstance(game_board, Position):
+        return game_board.winner()
 
     p1_board, p2_board = bit_board_split(game_board)
 
-    for direction in directions:
-        tmp_board = p1_board & (p1_board >> direction)
-        if tmp_board & (tmp_board >> 2*direction):
-            return 1
-
-        tmp_board = p2_board & (p2_board >> direction)
-        if tmp_board & (tmp_board >> 2*direction):
-            return -1
+    if has_four(p1_board):
+        return 1
+    elif has_four(p2_board):
+        return -1
 
 
 def bit_board_split(board):
@@ -62,31 +57,136 @@ def bit_board_split(board):
         Return a bit board of 56 of length, one for each player, which represents
         (in binary) the positions of the player on the board.
     """
-    p1_board, p2_board = 56*['0'], 56*['0']#56*['0'], 56*['0']
-    bit_index = 0
+    board = np.asarray(board)
+    p1_board = int(BITS_ARRAY[board == 1].sum())
+    p2_board = int(BITS_ARRAY[board == -1].sum())
+
+    return p1_board, p2_board
 
-    for _ in board:
-        for value in _:
-            if value == 1:
-                p1_board[bit_index] = '1'
-            elif value == -1:
-                p2_board[bit_index] = '1'
 
-            bit_index += 1
-        
-        bit_index += 1
+def check_winner_at(game_board, column, row):
+    """Check if the piece in a given position made a winning line
 
-    p1_board = int(str().join(p1_board), 2)
-    p2_board = int(str().join(p2_board), 2)
+    Faster than `check_winner` when the last move is known,
+    only the four lines (horizontal, vertical and both diagonals)
+    through the position are checked in a matrix. For a `Position`
+    only the bit board of the owner of the piece is checked.
 
-    return p1_board, p2_board
+    # Arguments
+        game_board: matrix (7x7) or `Position`, required
+        column: int (0 to 6), required, column of the last move
+        row: int (0 to 6), required, row of the last move
+
+    # Return
+        Id (1 or -1) of the owner of the piece if it is part of
+        a line of four, otherwise `None`
+
+    # Example
+
+    ```python
+    import numpy as np
+    board = np.zeros((7,7), dtype=np.int8)
+    board[0:4,0] = 1
+
+    assert check_winner_at(board, 3, 0) == 1
+    ```
+    """
+    if isinstance(game_board, Position):
+        bit = BITS[column][row]
+        for owner in (1, -1):
+            if game_board.bit_boards[owner] & bit:
+                return owner if has_four(game_board.bit_boards[owner]) else None
+        return None
+
+    owner = game_board[column, row]
+    if owner == 0:
+        return None
+
+    for d_column, d_row in ((1,0), (0,1), (1,1), (1,-1)):
+        count = 1
+        for sign in (1, -1):
+            c, r = column + sign*d_column, row + sign*d_row
+            while 0 <= c < WIDTH and 0 <= r < HEIGHT and game_board[c, r] == owner:
+                count += 1
+                c += sign*d_column
+                r += sign*d_row
+
+        if count >= 4:
+            return int(owner)
+
+
+def check_winner_batch(game_boards):
+    """Check the winner of many boards at once
+
+    Vectorized version of `check_winner`, all the boards are
+    checked together with NumPy operations over the bit boards
+    of each player, using the same directions (8,1,7,9).
+
+    # Arguments
+        game_boards: array, required
+            - (N,7,7) stack of boards or
+            - (N,2) uint64 array of bit boards, one column for
+                each player (id 1, id -1), as returned by
+                `bit_board_split_batch`
+
+    # Return
+        Array (N,) with the winner of each board, `1` or `-1`, and
+        `0` where there is no winner
+
+    # Example
+
+    ```python
+    import numpy as np
+    boards = np.zeros((1000,7,7), dtype=np.int8)
+    boards[:500,0,:4] = -1
+
+    winners = check_winner_batch(boards)
+    print('Boards won by id -1:', np.sum(winners == -1))
+    ```
+    """
+    game_boards = np.asarray(game_boards)
+    if len(game_boards) == 0:
+        return np.zeros(0, dtype=int)
+
+    if game_boards.ndim == 3:
+        bit_boards = bit_board_split_batch(game_boards)
+    else:
+        bit_boards = game_boards.astype(np.uint64, copy=False)
+
+    found = has_four_batch(bit_boards)
+
+    winners = np.zeros(len(bit_boards), dtype=int)
+    winners[found[:,1]] = -1
+    winners[found[:,0]] = 1
+    return winners
+
+
+def bit_board_split_batch(boards):
+    """Split a stack of boards in bit boards
+
+    # Arguments
+        boards: array (N,7,7), required
+
+    # Return
+        uint64 array (N,2) with the bit boards of player id 1
+        and player id -1 of each board, same values as
+        `bit_board_split`
+    """
+    boards = np.asarray(boards)
+    zero = np.uint64(0)
+    bit_boards = np.empty((len(boards), 2), dtype=np.uint64)
+    bit_boards[:,0] = np.where(boards == 1, BITS_ARRAY, zero) \
+                        .sum(axis=(1,2), dtype=np.uint64)
+    bit_boards[:,1] = np.where(boards == -1, BITS_ARRAY, zero) \
+                        .sum(axis=(1,2), dtype=np.uint64)
+    return bit_boards
 
 
 def next_position(board, column):
     """Return the next availabe position in a column
     
     # Arguments
-        board: matrix, required
+        board: matrix or `Position`, required
         column: int (0 to 6) - required - Index of the column
 
     # Return
@@ -98,6 +198,10 @@ def next_position(board, column):
     if column < 0 or column > 6:
         raise IndexError('Column out of range.')
 
+    if isinstance(board, Position):
+        row = board.heights[column]
+        return row if row < HEIGHT else None
+
     for i, value in enumerate(board[column]):
         if value == 0:
             return i
@@ -107,7 +211,7 @@ def available_positions(board):
     """Yield all empty positions of a given board
     
     # Arguments
-        board: matrix, required
+        board: matrix or `Position`, required
 
     # Yield
         Index of the column and row of all empty positions in the `board`
@@ -116,7 +220,7 @@ def available_positions(board):
 
     ```python
     import numpy as np
-    board = np.zeros((7,7), dtype=int)
+    board = np.zeros((7,7), dtype=np.int8)
     board[0,0] = 1
     board[1,0] = -1
     board[3,0] = 1
@@ -128,6 +232,12 @@ def available_positions(board):
         print('Position:', board[x,y])
     ```
     """
+    if isinstance(board, Position):
+        for column, row in enumerate(board.heights):
+            if row < HEIGHT:
+                yield column, row
+        return
+
     for column, _ in enumerate(board):
         for row, value in enumerate(_):
             if value == 0:
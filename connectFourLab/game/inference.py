@@ -0,0 +1,502 @@
+"""NumPy inference of the neural network models"""
+import os
+import json
+import time
+import queue
+import hashlib
+import multiprocessing
+from collections import OrderedDict
+import numpy as np
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'tanh': np.tanh,
+    'sigmoid': lambda x: 1/(1 + np.exp(-x)),
+}
+
+
+class NumpyModel:
+    """Forward pass of a sequential model of `Dense` layers in NumPy
+
+    Same result as `keras.models.Model.predict` for the models
+    created by the [trainers](./trainers) (`Dense` and `Dropout`
+    layers, the dropout does nothing in the inference) without
+    importing Keras or TensorFlow.
+
+    The weights are stored in a flat `.npz` file, one array for
+    the kernel (`W0`, `W1`, ...) and the bias (`b0`, `b1`, ...)
+    of each layer plus the name of the activations, use
+    `export_h5` to convert a `.h5` model saved by Keras.
+
+    # Arguments
+        layers: list, required, `(kernel, bias, activation)`
+            of each `Dense` layer
+            - activation: str, 'linear', 'relu', 'tanh' or 'sigmoid'
+        dtype: NumPy dtype, optional, default float32
+
+    # Exceptions
+        ValueError: unsupported activation
+
+    # Example
+
+    ```python
+    model = NumpyModel.load('game/models/MCTSNN_default.npz')
+    evaluation = model.predict(data_in)[0][0]
+    ```
+    """
+
+    def __init__(self, layers, dtype=np.float32):
+        self.layers = []
+        for kernel, bias, activation in layers:
+            if activation not in ACTIVATIONS:
+                raise ValueError('Unsupported activation: {}'.format(activation))
+
+            self.layers.append((np.asarray(kernel, dtype=dtype),
+                                np.asarray(bias, dtype=dtype),
+                                activation))
+        self.dtype = dtype
+        self._id = None
+
+    @property
+    def id(self):
+        """Identifier of the weights, two models with the
+        same weights have the same `id`"""
+        if self._id is None:
+            digest = hashlib.sha1()
+            for kernel, bias, activation in self.layers:
+                digest.update(kernel.tobytes())
+                digest.update(bias.tobytes())
+                digest.update(activation.encode())
+            self._id = digest.hexdigest()[:16]
+
+        return self._id
+
+    def predict(self, data_in):
+        """Evaluate a batch of inputs
+
+        # Arguments
+            data_in: matrix (n x inputs), required
+
+        # Return
+            matrix (n x outputs)
+        """
+        x = np.asarray(data_in, dtype=self.dtype)
+        for kernel, bias, activation in self.layers:
+            x = ACTIVATIONS[activation](x @ kernel + bias)
+
+        return x
+
+    def save(self, file):
+        """Save the weights in a `.npz` file"""
+        arrays = {}
+        for i, (kernel, bias, _) in enumerate(self.layers):
+            arrays['W{}'.format(i)] = kernel
+            arrays['b{}'.format(i)] = bias
+        arrays['activations'] = np.array([layer[2] for layer in self.layers])
+
+        np.savez(file, **arrays)
+
+    @staticmethod
+    def load(file, dtype=np.float32):
+        """Load a model from a `.npz` file written by `save`"""
+        with np.load(file) as arrays:
+            activations = [str(a) for a in arrays['activations']]
+            layers = [(arrays['W{}'.format(i)], arrays['b{}'.format(i)], activation)
+                      for i, activation in enumerate(activations)]
+
+        return NumpyModel(layers, dtype)
+
+    @staticmethod
+    def from_keras(model):
+        """Create a `NumpyModel` from a loaded Keras model"""
+        layers = []
+        for layer in model.layers:
+            if type(layer).__name__ == 'Dense':
+                kernel, bias = layer.get_weights()
+                layers.append((kernel, bias, layer.get_config()['activation']))
+
+        return NumpyModel(layers)
+
+
+class EvaluationCache:
+    """Least recently used (LRU) cache of model evaluations
+
+    The evaluations are stored by model, position key and
+    player to move, when the cache is full the entry used
+    the longest time ago is removed.
+
+    # Arguments
+        max_size: int, optional, default 50000, maximum
+            number of evaluations
+
+    # Attributes
+        hits: int, number of evaluations found with `get`
+        misses: int, number of evaluations not found with `get`
+
+    # Example
+
+    ```python
+    cache = EvaluationCache(10000)
+    key = position.key()
+    evaluation = cache.get(model_id(model), key, position.color)
+    if evaluation is None:
+        evaluation = model.predict(data_in)[0][0]
+        cache.put(model_id(model), key, position.color, evaluation)
+    ```
+    """
+
+    def __init__(self, max_size=50000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def hit_rate(self):
+        """Ratio of `get` calls which found the evaluation"""
+        total = self.hits + self.misses
+        return self.hits/total if total else 0
+
+    def get(self, model_id, key, color):
+        """Return the stored evaluation or `None`
+
+        # Arguments
+            model_id: identifier of the model (see `model_id`)
+            key: int, key of the position (e.g. `Position.key`)
+            color: int, player to move
+        """
+        value = self._data.get((model_id, key, color))
+        if value is None:
+            self.misses += 1
+            return None
+
+        self._data.move_to_end((model_id, key, color))
+        self.hits += 1
+        return value
+
+    def put(self, model_id, key, color, value):
+        """Store an evaluation, see `get`"""
+        self._data[(model_id, key, color)] = value
+        self._data.move_to_end((model_id, key, color))
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        """Remove all the evaluations and reset the counters"""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def model_id(model):
+    """Identifier of a model for the `EvaluationCache`, the
+    `id` of a `NumpyModel` (or the model of an `InferenceClient`),
+    a hash of its weights
+
+    `None` for other models (e.g. Keras models), their weights
+    can change (training) and their evaluations must not be cached"""
+    if isinstance(model, (NumpyModel, InferenceClient)):
+        return model.id
+
+    return None
+
+
+def export_h5(h5_file, npz_file=None):
+    """Export the weights of a Keras `.h5` model to a `.npz`
+    file which can be loaded by `NumpyModel`
+
+    Only requires `h5py`, Keras and TensorFlow are not imported.
+
+    # Arguments
+        h5_file: str, required, path to the `.h5` model
+        npz_file: str, optional, default `None`, path of the new
+            file, by default the `h5_file` with the `.npz` extension
+
+    # Return
+        The exported `NumpyModel`
+
+    # Example
+
+    ```
+    python -m connectFourLab.game.inference game/models/MCTSNN_default.h5
+    ```
+    """
+    import h5py
+
+    if npz_file is None:
+        npz_file = os.path.splitext(h5_file)[0] + '.npz'
+
+    with h5py.File(h5_file, 'r') as f:
+        config = f.attrs['model_config']
+        config = json.loads(config.decode() if isinstance(config, bytes) else config)
+        config = config['config']
+        config = config['layers'] if isinstance(config, dict) else config
+        activations = {layer['config']['name']: layer['config'].get('activation')
+                       for layer in config if layer['class_name'] == 'Dense'}
+
+        weights = f['model_weights'] if 'model_weights' in f else f
+        layers = []
+        for name in weights.attrs['layer_names']:
+            name = name.decode() if isinstance(name, bytes) else name
+            if name not in activations:
+                continue
+
+            group = weights[name]
+            kernel, bias = [group[w][()] for w in group.attrs['weight_names']]
+            layers.append((kernel, bias, activations[name]))
+
+    model = NumpyModel(layers)
+    model.save(npz_file)
+    return model
+
+
+def load_model(model_file):
+    """Load a model for the NumPy inference
+
+    A `.h5` file is exported to `.npz` (see `export_h5`) the first
+    time it's loaded and every time it is newer than the `.npz`
+    file, otherwise the `.npz` file is used. The trainers export
+    the model every time it is saved.
+
+    # Arguments
+        model_file: str, required, path to a `.npz` or `.h5` file
+
+    # Return
+        `NumpyModel` object
+    """
+    npz_file = os.path.splitext(model_file)[0] + '.npz'
+    if model_file == npz_file or os.path.exists(npz_file) and \
+            (not os.path.exists(model_file) or
+             os.path.getmtime(npz_file) >= os.path.getmtime(model_file)):
+        return NumpyModel.load(npz_file)
+
+    return export_h5(model_file, npz_file)
+
+
+class InferenceServer:
+    """Process which owns a model and evaluates the requests
+    of many agents (e.g. in other processes) in batches
+
+    Each client has a slot in two shared memory arrays, the inputs
+    and the outputs, only the slot index and the number of rows
+    go through the request queue. The server waits up to
+    `max_latency` seconds after the first request for requests of
+    other clients, up to `max_batch` rows, evaluates all of them
+    in a single `predict` call and wakes up the clients.
+
+    Create the clients (`client`) before starting the worker
+    processes and pass them as arguments, each client must be
+    used by a single agent at a time. The clients raise
+    `RuntimeError` if the server stops while they wait.
+
+    # Arguments
+        model_file: str, required, path to the model (see `load_model`)
+        num_clients: int, optional, default 8, number of slots
+        max_rows: int, optional, default 64, rows of each slot,
+            bigger requests are split
+        max_batch: int, optional, default 256, rows of a batch
+        max_latency: float, optional, default 0.002, seconds to
+            wait for other requests
+        num_inputs: int, optional, default 50, size of a row
+
+    # Example
+
+    ```python
+    with InferenceServer('game/models/MCTSNN_default.npz', num_clients=4) as server:
+        workers = [Process(target=play_games, args=(server.client(i),))
+                   for i in range(4)]
+        ...
+
+    def play_games(client):
+        agent = AgentMCTSNN(model=client)
+        ...
+    ```
+    """
+
+    def __init__(self, model_file, num_clients=8, max_rows=64, max_batch=256,
+                 max_latency=0.002, num_inputs=50):
+        self.model_file = model_file
+        self.num_clients = num_clients
+        self.max_rows = max_rows
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.num_inputs = num_inputs
+        self.id = load_model(model_file).id
+
+        self.inputs = multiprocessing.RawArray('f', num_clients*max_rows*num_inputs)
+        self.outputs = multiprocessing.RawArray('f', num_clients*max_rows)
+        self.requests = multiprocessing.Queue()
+        self.events = [multiprocessing.Event() for _ in range(num_clients)]
+        self.running = multiprocessing.RawValue('b', 0)
+        self.process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *i):
+        self.stop()
+
+    def start(self):
+        """Start the server process and wait for the model
+
+        # Exceptions
+            RuntimeError: raised if the process ends before
+                the model is loaded
+        """
+        ready = multiprocessing.Event()
+        self.process = multiprocessing.Process(
+            target=_serve, daemon=True,
+            args=(self.model_file, self.inputs, self.outputs, self.requests,
+                  self.events, self.running, self.num_clients, self.max_rows,
+                  self.num_inputs, self.max_batch, self.max_latency, ready))
+        self.process.start()
+        while not ready.wait(.1):
+            if not self.process.is_alive():
+                self.process = None
+                raise RuntimeError('The inference server stopped before loading '
+                                   'the model {}'.format(self.model_file))
+
+    def stop(self):
+        """Stop the server process"""
+        if self.process is not None:
+            self.requests.put(None)
+            self.process.join()
+            self.process = None
+
+    def client(self, slot):
+        """Return the `InferenceClient` of a slot (0 to `num_clients` - 1)"""
+        return InferenceClient(slot, self.inputs, self.outputs, self.requests,
+                               self.events[slot], self.running, self.max_rows,
+                               self.num_inputs, self.id)
+
+
+class InferenceClient:
+    """Client of an `InferenceServer`, has the same `predict`
+    method of the models so it can be used by the agents
+    in place of the model (e.g. `AgentMCTSNN(model=client)`)
+
+    # Attributes
+        id: str, `id` of the model of the server
+        timeout: float, default 60, seconds to wait for the
+            answer of a request
+    """
+    timeout = 60
+
+    def __init__(self, slot, inputs, outputs, requests, event, running,
+                 max_rows, num_inputs, id):
+        self.slot = slot
+        self.inputs = inputs
+        self.outputs = outputs
+        self.requests = requests
+        self.event = event
+        self.running = running
+        self.max_rows = max_rows
+        self.num_inputs = num_inputs
+        self.id = id
+
+    def predict(self, data_in):
+        """Evaluate a batch of inputs in the server
+
+        # Arguments
+            data_in: matrix (n x inputs), required
+
+        # Return
+            matrix (n x 1)
+
+        # Exceptions
+            RuntimeError: raised if the server is not running
+                or does not answer in `timeout` seconds
+        """
+        data_in = np.asarray(data_in, dtype=np.float32).reshape(-1, self.num_inputs)
+        inputs, outputs = self._views()
+        results = np.empty((len(data_in), 1), dtype=np.float32)
+
+        for start in range(0, len(data_in), self.max_rows):
+            rows = data_in[start:start + self.max_rows]
+            inputs[:len(rows)] = rows
+            self.event.clear()
+            self.requests.put((self.slot, len(rows)))
+            self._wait()
+            results[start:start + len(rows), 0] = outputs[:len(rows)]
+
+        return results
+
+    def _wait(self):
+        """Wait for the answer of the server, checking if it
+        is still running while there is no answer"""
+        deadline = time.perf_counter() + self.timeout
+        while not self.event.wait(.1):
+            if not self.running.value:
+                raise RuntimeError('The inference server is not running')
+            if time.perf_counter() > deadline:
+                raise RuntimeError('The inference server did not answer '
+                                   'in {} seconds'.format(self.timeout))
+
+    def _views(self):
+        """Views of the slot of the client in the shared arrays"""
+        inputs = np.frombuffer(self.inputs, dtype=np.float32)
+        inputs = inputs.reshape(-1, self.max_rows, self.num_inputs)[self.slot]
+        outputs = np.frombuffer(self.outputs, dtype=np.float32)
+        outputs = outputs.reshape(-1, self.max_rows)[self.slot]
+        return inputs, outputs
+
+
+def _serve(model_file, inputs, outputs, requests, events, running, num_clients,
+           max_rows, num_inputs, max_batch, max_latency, ready):
+    """Loop of the `InferenceServer` process, `running`
+    tells the clients if it is still serving"""
+    model = load_model(model_file)
+    inputs = np.frombuffer(inputs, dtype=np.float32).reshape(num_clients, max_rows, num_inputs)
+    outputs = np.frombuffer(outputs, dtype=np.float32).reshape(num_clients, max_rows)
+    running.value = 1
+    ready.set()
+    try:
+        _serve_requests(model, inputs, outputs, requests, events, max_batch, max_latency)
+    finally:
+        running.value = 0
+
+
+def _serve_requests(model, inputs, outputs, requests, events, max_batch, max_latency):
+    """Evaluate the requests in batches until `None` is received"""
+    running = True
+    while running:
+        request = requests.get()
+        if request is None:
+            break
+
+        batch, rows = [request], request[1]
+        deadline = time.perf_counter() + max_latency
+        while rows < max_batch:
+            try:
+                request = requests.get(timeout=max(0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+
+            if request is None:
+                running = False
+                break
+            batch.append(request)
+            rows += request[1]
+
+        data_in = np.concatenate([inputs[slot, :n] for slot, n in batch])
+        results = model.predict(data_in)[:, 0]
+
+        start = 0
+        for slot, n in batch:
+            outputs[slot, :n] = results[start:start + n]
+            start += n
+            events[slot].set()
+
+
+if __name__ == '__main__':
+    import sys
+    for file in sys.argv[1:]:
+        export_h5(file)
+        print('Exported:', file)
@@ -0,0 +1,160 @@
+"""Opening suite
+
+Start positions of a few moves, used to play matches (see `Arena`)
+from many different positions instead of always from the empty
+board. The suite is generated by an engine, which keeps only the
+balanced positions:
+
+    python -m connectFourLab.game.openings -p 4 -n 100 -o openings.txt
+
+Each line of a suite file is an opening, the columns played from
+the empty board (e.g. `3324`).
+"""
+import os
+import random
+import argparse
+from .position import Position, WIDTH
+from .agents.strategies import TreeSearchStrategy, SimulationStrategy
+
+
+__DIR__ = os.path.dirname(__file__)
+DEFAULT_FILE = os.path.join(__DIR__, 'openings.txt')
+
+
+class OpeningEngine(TreeSearchStrategy, SimulationStrategy):
+    """Evaluation of the openings
+
+    A fixed depth `alphabeta` search discards the positions
+    with a forced win and the smart rollouts measure the balance.
+
+    # Arguments
+        depth: int, optional, default 8, depth of the search
+        num_simulations: int, optional, default 400, rollouts
+            of each position
+    """
+    rollout_policy = 'smart'
+    table_size_mb = 4
+
+    def __init__(self, depth=8, num_simulations=400):
+        super().__init__()
+        self.depth = depth
+        self.num_simulations = num_simulations
+
+    def evaluate(self, position):
+        """Return the score of a `Position` for the player to move,
+        from -1 (always loses) to 1 (always wins), `None` if the
+        search found a forced win"""
+        self.transposition_table.new_search()
+        if self.alphabeta(position.copy(), self.depth) != 0:
+            return None
+
+        wins, _, losses = self.simulate_batch(position, num_simulations=self.num_simulations)
+        score = (wins - losses)/self.num_simulations
+        return score*position.color
+
+
+def mirror(columns):
+    """Return the opening mirrored (the column 0 is the column 6)"""
+    return [WIDTH - 1 - column for column in columns]
+
+
+def all_openings(num_plies):
+    """Return all the openings of `num_plies` moves, one of each
+    position (the transpositions and the mirrored positions
+    are removed)"""
+    openings, keys = [], set()
+
+    def expand(position):
+        if position.winner():
+            return
+        elif position.num_moves == num_plies:
+            columns = list(position.history)
+            mirrored = Position()
+            for column in mirror(columns):
+                mirrored.play(column)
+
+            if position.key() not in keys and mirrored.key() not in keys:
+                keys.add(position.key())
+                openings.append(columns)
+            return
+
+        for column in position.legal_columns():
+            position.play(column)
+            expand(position)
+            position.undo()
+
+    expand(Position())
+    return openings
+
+
+def generate_openings(num_plies=4, num_openings=None, max_score=.1, engine=None, seed=None):
+    """Generate a balanced opening suite
+
+    # Arguments
+        num_plies: int, optional, default 4, moves of each opening
+        num_openings: int, optional, default `None`, maximum number of
+            openings, a random sample of the balanced ones, `None` for all
+        max_score: float, optional, default .1, maximum absolute
+            score (see `OpeningEngine.evaluate`) of an opening
+        engine: `OpeningEngine`, optional, default `None`
+        seed: int, optional, default `None`, seed of the sample
+
+    # Return
+        list of openings (lists of columns), most balanced first
+    """
+    engine = engine or OpeningEngine()
+    candidates = all_openings(num_plies)
+    rng = random.Random(seed)
+    rng.shuffle(candidates)
+
+    openings = []
+    for columns in candidates:
+        position = Position()
+        for column in columns:
+            position.play(column)
+
+        score = engine.evaluate(position)
+        if score is not None and abs(score) <= max_score:
+            openings.append((abs(score), columns))
+            if num_openings and len(openings) >= num_openings:
+                break
+
+    openings.sort(key=lambda item: item[0])
+    return [columns for _, columns in openings]
+
+
+def save_openings(openings, file=DEFAULT_FILE):
+    with open(file, 'w') as f:
+        for columns in openings:
+            f.write(''.join(str(column) for column in columns) + '\n')
+
+
+def load_openings(file=DEFAULT_FILE):
+    """Load an opening suite, by default the suite
+    distributed with the game (4 moves)"""
+    with open(file) as f:
+        return [[int(column) for column in line.strip()]
+                for line in f if line.strip()]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m connectFourLab.game.openings',
+                                     description='Generate a balanced opening suite.')
+    parser.add_argument('-p', '--plies', type=int, default=4, help='moves of each opening')
+    parser.add_argument('-n', '--num-openings', type=int, default=None)
+    parser.add_argument('-m', '--max-score', type=float, default=.1)
+    parser.add_argument('-d', '--depth', type=int, default=8, help='depth of the search')
+    parser.add_argument('-r', '--rollouts', type=int, default=400)
+    parser.add_argument('-s', '--seed', type=int, default=None)
+    parser.add_argument('-o', '--output', default='openings.txt')
+    args = parser.parse_args(args)
+
+    engine = OpeningEngine(args.depth, args.rollouts)
+    openings = generate_openings(args.plies, args.num_openings, args.max_score,
+                                 engine, args.seed)
+    save_openings(openings, args.output)
+    print('{} openings saved in {}'.format(len(openings), args.output))
+
+
+if __name__ == '__main__':
+    main()
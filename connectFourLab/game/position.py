@@ -0,0 +1,261 @@
+"""Bit board position"""
+import numpy as np
+
+
+WIDTH = 7
+HEIGHT = 7
+COLUMN_BITS = HEIGHT + 1
+BOARD_BITS = WIDTH*COLUMN_BITS
+# dtype of the board matrices, the ids 1, -1 and 0 fit in a byte
+BOARD_DTYPE = np.int8
+
+# Same layout used by `helpers.bit_board_split`, the first position of the
+# board (column 0, row 0) is the most significant bit of a 56 bits number
+# and each column has an extra empty bit on top.
+BITS = [[1 << (BOARD_BITS - 1 - column*COLUMN_BITS - row)
+         for row in range(COLUMN_BITS)]
+        for column in range(WIDTH)]
+BITS_ARRAY = np.array([column[:HEIGHT] for column in BITS], dtype=np.uint64)
+BITS_TABLE = np.array(BITS, dtype=np.uint64)
+BOTTOM_MASK = sum(column[0] for column in BITS)
+COLUMN_MASKS = [sum(column[:HEIGHT]) for column in BITS]
+COLUMN_MASKS_ARRAY = np.array(COLUMN_MASKS, dtype=np.uint64)
+BOARD_MASK = sum(COLUMN_MASKS)
+
+
+def has_four(bit_board):
+    """Check if a bit board has four aligned positions
+
+    # Arguments
+        bit_board: int, bit board of a single player
+
+    # Return
+        `True` if there is a horizontal, vertical or diagonal
+        line of four positions in the `bit_board`
+    """
+    #horizontal, vertical, diagonal: top-bottom, bottom-top
+    for direction in (8,1,7,9):
+        tmp_board = bit_board & (bit_board >> direction)
+        if tmp_board & (tmp_board >> 2*direction):
+            return True
+
+    return False
+
+
+def has_four_batch(bit_boards):
+    """Vectorized version of `has_four`
+
+    # Arguments
+        bit_boards: uint64 array, bit boards of a single player each
+
+    # Return
+        Boolean array with the same shape as `bit_boards`
+    """
+    found = np.zeros(bit_boards.shape, dtype=bool)
+    for direction in (8,1,7,9):
+        tmp_boards = bit_boards & (bit_boards >> np.uint64(direction))
+        found |= (tmp_boards & (tmp_boards >> np.uint64(2*direction))) != 0
+
+    return found
+
+
+def playable_squares(occupied):
+    """Return a bit mask with the next available position
+    of each column which is not full
+
+    Works with an int or an uint64 array of masks.
+
+    # Arguments
+        occupied: bit board with the pieces of both players
+    """
+    return ((occupied >> 1) | BOTTOM_MASK) & ~occupied & BOARD_MASK
+
+
+def winning_squares(bit_board, occupied):
+    """Return a bit mask with all the empty positions which
+    would complete a line of four for the owner of `bit_board`
+
+    The positions are not necessarily playable, use
+    `playable_squares` to filter the ones available right now.
+    Works with an int or an uint64 array of masks.
+
+    # Arguments
+        bit_board: bit board of a single player
+        occupied: bit board with the pieces of both players
+    """
+    # vertical, the position above a piece is one bit to the right
+    squares = (bit_board >> 1) & (bit_board >> 2) & (bit_board >> 3)
+
+    #horizontal, diagonal: top-bottom, bottom-top
+    for direction in (8,7,9):
+        pair = (bit_board << direction) & (bit_board << 2*direction)
+        squares |= pair & (bit_board << 3*direction)
+        squares |= pair & (bit_board >> direction)
+
+        pair = (bit_board >> direction) & (bit_board >> 2*direction)
+        squares |= pair & (bit_board << direction)
+        squares |= pair & (bit_board >> 3*direction)
+
+    return squares & ~occupied & BOARD_MASK
+
+
+class Position:
+    """Connect Four (7x7) position stored as two bit boards
+
+    Keep one bit board (int) for each player and the height of
+    each column, both updated incrementally with `play` and `undo`,
+    so making a move or checking the winner costs a few integer
+    operations instead of walking the 49 positions of a matrix.
+
+    The functions `check_winner`, `next_position` and
+    `available_positions` in [helpers](./helpers) accept
+    a `Position` as well as a matrix.
+
+    # Arguments
+        board: matrix (7x7), optional, default `None`
+            - Board state to load, `None` for an empty board
+        color: int (1 or -1), optional, default 1
+            - Id of the player who plays the next move
+        perspective: int (1 or -1), optional, default 1
+            - Id in the `board` of the player who is the player id 1
+                in the position, with -1 the ids are switched while
+                the board is loaded (the `board` is not modified)
+
+    # Attributes
+        color: int, id of the player who plays the next move
+        bit_boards: dict, bit board of each player
+            - player one: id `1` - two: id `-1`
+        heights: list, number of pieces in each column
+        history: list, columns played with `play`
+        num_moves: int, total number of pieces on the board
+
+    # Example
+
+    ```python
+    position = Position()
+    for column in [0, 1, 0, 1, 0, 1]:
+        position.play(column)
+
+    position.play(0)
+    assert position.winner() == 1
+
+    position.undo()
+    assert position.winner() is None
+    ```
+    """
+
+    def __init__(self, board=None, color=1, perspective=1):
+        self.color = color
+        self.bit_boards = {1: 0, -1: 0}
+        self.heights = [0]*WIDTH
+        self.history = []
+        self.num_moves = 0
+
+        if board is not None:
+            self._load(board, perspective)
+
+    def _load(self, board, perspective=1):
+        board = np.asarray(board)
+        self.bit_boards[1] = int(BITS_ARRAY[board == perspective].sum())
+        self.bit_boards[-1] = int(BITS_ARRAY[board == -perspective].sum())
+        self.heights = [int(h) for h in np.count_nonzero(board, axis=1)]
+        self.num_moves = sum(self.heights)
+
+    def copy(self):
+        """Return an independent copy of the position"""
+        new = Position.__new__(Position)
+        new.color = self.color
+        new.bit_boards = dict(self.bit_boards)
+        new.heights = list(self.heights)
+        new.history = list(self.history)
+        new.num_moves = self.num_moves
+        return new
+
+    def can_play(self, column):
+        """Return `True` if the `column` is not full"""
+        return self.heights[column] < HEIGHT
+
+    def legal_columns(self):
+        """Return a list with all the columns which are not full"""
+        return [column for column, height in enumerate(self.heights)
+                if height < HEIGHT]
+
+    def play(self, column):
+        """Drop a piece of the player `color` in a column
+        and pass the turn to the other player
+
+        # Arguments
+            column: int (0 to 6), required, index of the column
+
+        # Return
+            Index (row) of the played position
+
+        # Exception
+            IndexError: `column` argument out of range.
+            ValueError: the `column` is full.
+        """
+        if column < 0 or column > 6:
+            raise IndexError('Column out of range.')
+
+        row = self.heights[column]
+        if row >= HEIGHT:
+            raise ValueError('The column {} is full.'.format(column))
+
+        self.bit_boards[self.color] |= BITS[column][row]
+        self.heights[column] = row + 1
+        self.history.append(column)
+        self.num_moves += 1
+        self.color = -self.color
+        return row
+
+    def undo(self):
+        """Take back the last move made with `play`
+
+        # Return
+            Index of the column and row of the removed piece
+        """
+        column = self.history.pop()
+        row = self.heights[column] - 1
+        self.color = -self.color
+        self.bit_boards[self.color] ^= BITS[column][row]
+        self.heights[column] = row
+        self.num_moves -= 1
+        return column, row
+
+    @property
+    def last_move(self):
+        """Column and row of the last move, `None` if there is no history"""
+        if not self.history:
+            return None
+
+        column = self.history[-1]
+        return column, self.heights[column] - 1
+
+    @property
+    def is_full(self):
+        return self.num_moves >= WIDTH*HEIGHT
+
+    def key(self):
+        """Return an unique 64 bits key of the position
+
+        The key is the bit board of the player to move plus
+        the next available position of each column, the bit 63
+        is set when the player to move is the id -1.
+        """
+        occupied = self.bit_boards[1] | self.bit_boards[-1]
+        key = self.bit_boards[self.color] | (((occupied >> 1) | BOTTOM_MASK) & ~occupied)
+        return key | (1 << 63) if self.color == -1 else key
+
+    def winner(self):
+        """Return the id of the winner (1 or -1) or `None`"""
+        if has_four(self.bit_boards[1]):
+            return 1
+        elif has_four(self.bit_boards[-1]):
+            return -1
+
+    def to_board(self, dtype=BOARD_DTYPE):
+        """Return the position as a matrix (7x7)"""
+        board = np.zeros((WIDTH, HEIGHT), dtype=dtype)
+        board[(BITS_ARRAY & np.uint64(self.bit_boards[1])) != 0] = 1
+        board[(BITS_ARRAY & np.uint64(self.bit_boards[-1])) != 0] = -1
+        return board
@@ -265,8 +265,9 @@ class Timer(Chronometer):
         """
         while True:
             if self.running:
-                if self.time_left > 0:
-                    time.sleep(.3)
+                time_left = self.time_left
+                if time_left > 0:
+                    time.sleep(min(.3, time_left))
                 else:
                     self.stop()
                     self.time_out = True
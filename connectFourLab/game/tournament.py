@@ -0,0 +1,340 @@
+"""Round-robin tournament between agents
+
+Play every pair of agents, in parallel processes, and rate
+the agents (Elo scale) with confidence intervals:
+
+    python -m connectFourLab.game.tournament MonteCarlo Negamax Simulation -g 50 -t 30
+
+The results of each pairing are cached by the class, the
+parameters and the model files of the agents, so adding an agent
+to the pool only plays its games.
+"""
+import os
+import json
+import math
+import time
+import hashlib
+import argparse
+import numpy as np
+from .arena import run_tasks, parse_agent, opening_of
+from .openings import load_openings, DEFAULT_FILE as DEFAULT_OPENINGS
+from .agents import find_agents
+
+
+def file_hash(file):
+    """Return the sha1 of the content of a file"""
+    sha = hashlib.sha1()
+    with open(file, 'rb') as f:
+        for chunk in iter(lambda: f.read(2**20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def agent_key(agent, params=None):
+    """Return an unique key of an agent: sha1 of the class, the
+    parameters and the content of the files given in the parameters
+    (e.g. `model_file`), a new model gives a new key
+
+    # Arguments
+        agent: agent class, required
+        params: dict, optional, see `arena.create_agent`
+    """
+    params = params or {}
+    data = {'agent': agent.__module__ + '.' + agent.__qualname__,
+            'params': sorted((kw, repr(value)) for kw, value in params.items()),
+            'files': sorted((kw, file_hash(value)) for kw, value in params.items()
+                            if isinstance(value, str) and os.path.isfile(value))}
+    return hashlib.sha1(json.dumps(data).encode()).hexdigest()
+
+
+def fit_ratings(num_agents, results, prior=2):
+    """Fit the ratings (Elo scale) of a group of agents
+
+    Maximum likelihood of the logistic (Bradley-Terry) model of
+    Elo, a draw counts as half win and half loss. As in BayesElo
+    each pair of agents which played has `prior` extra draws, which
+    keeps the ratings finite when an agent won all its games.
+
+    # Arguments
+        num_agents: int, required
+        results: dict, `(i, j): (wins, draws, losses)` of
+            the agent `i` against the agent `j`
+        prior: float, optional, default 2, number of virtual draws
+
+    # Return
+        ratings: array, average 0
+        errors: array, standard error of each rating, the
+            95% confidence interval is `rating +- 1.96*error`
+    """
+    pairs = []
+    for (i, j), (wins, draws, losses) in results.items():
+        games = wins + draws + losses
+        if games:
+            pairs.append((i, j, games + prior, wins + .5*(draws + prior)))
+
+    scale = 400/math.log(10)
+    strength = np.zeros(num_agents)
+    hessian = np.zeros((num_agents, num_agents))
+    for _ in range(100):
+        gradient = np.zeros(num_agents)
+        hessian[:] = 0
+        for i, j, games, score in pairs:
+            p = 1/(1 + math.exp(strength[j] - strength[i]))
+            gradient[i] += score - games*p
+            gradient[j] -= score - games*p
+            weight = games*p*(1 - p)
+            hessian[i, i] += weight
+            hessian[j, j] += weight
+            hessian[i, j] -= weight
+            hessian[j, i] -= weight
+
+        # the ratings are relative, the pseudo inverse keeps the average
+        step = np.linalg.pinv(hessian) @ gradient
+        strength += step
+        strength -= strength.mean()
+        if np.abs(step).max() < 1e-9:
+            break
+
+    covariance = np.linalg.pinv(hessian)
+    errors = np.sqrt(np.maximum(np.diag(covariance), 0))
+    # agents without games have no information
+    played = np.diag(hessian) > 0
+    errors[~played] = math.inf
+    return strength*scale, errors*scale
+
+
+class ResultCache:
+    """Results of the pairings stored in a JSON file
+
+    Each entry is the `[wins, draws, losses, games]` of the agent
+    with the smallest key, the `games` include the games ended by
+    an exception.
+
+    The entries are keyed by the keys of both agents (see `agent_key`)
+    and the `setting` of the games, e.g. the time limit.
+
+    # Arguments
+        file: str, optional, default `None`, path of the file,
+            `None` keeps the results only in memory
+    """
+
+    def __init__(self, file=None):
+        self.file = file
+        self.entries = {}
+        if file and os.path.exists(file):
+            with open(file) as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def pairing_key(key_a, key_b, setting):
+        key_a, key_b = sorted((key_a, key_b))
+        return '{}-{}-{}'.format(key_a, key_b, setting)
+
+    def get(self, key_a, key_b, setting):
+        """Return the `(wins, draws, losses, games)` of the
+        agent `key_a` against the agent `key_b`"""
+        wins, draws, losses, games = self.entries.get(
+            self.pairing_key(key_a, key_b, setting), (0, 0, 0, 0))
+        if key_a > key_b:
+            wins, losses = losses, wins
+        return wins, draws, losses, games
+
+    def add(self, key_a, key_b, setting, result):
+        """Add the result of a game (see `arena.play_game`),
+        the agent `A` of the game is `key_a`"""
+        entry = self.entries.setdefault(self.pairing_key(key_a, key_b, setting), [0, 0, 0, 0])
+        outcome = result['result']
+        if outcome == 'draw':
+            entry[1] += 1
+        elif outcome is not None:
+            entry[0 if (outcome == 'win') == (key_a < key_b) else 2] += 1
+        entry[3] += 1
+
+    def save(self):
+        if not self.file:
+            return
+
+        temp_file = self.file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(temp_file, self.file)
+
+
+class Tournament:
+    """Round-robin tournament, every agent plays `games_per_pair`
+    games against each other agent
+
+    The games of all the pairings are played in the same pool of
+    `num_workers` processes (see `Arena`) and the colors are
+    alternated. Only the games missing in the `cache` are played.
+
+    With `openings` each pairing plays the openings in order, each
+    one twice with the colors swapped (see `Arena`), the results
+    are cached apart from the results without openings.
+
+    # Arguments
+        agents: list, required, agent classes or pairs (class, params)
+        games_per_pair: int, optional, default 20
+        time_limit: float, optional, default `None`, see `RunGame`
+        num_workers: int, optional, default `None`, see `Arena`
+        cache: `ResultCache` or str (file), optional, default `None`
+        names: list, optional, default `None`, names of the agents,
+            the class names by default
+        prior: float, optional, default 2, see `fit_ratings`
+        openings: list, optional, default `None`, opening suite
+
+    # Exceptions
+        ValueError: raised when two agents have the same
+            `agent_key` (same class and params)
+
+    # Example
+
+    ```python
+    from connectFourLab.game.tournament import Tournament
+    from connectFourLab.game.agents import AgentRandom
+    from connectFourLab.game.agents.monteCarlo import AgentMonteCarlo, AgentSimulation
+
+    tournament = Tournament([AgentRandom, AgentSimulation, AgentMonteCarlo],
+                            time_limit=30, cache='tournament.json')
+    tournament.run()
+    print(tournament.table())
+    ```
+    """
+
+    def __init__(self, agents, games_per_pair=20, time_limit=None, num_workers=None,
+                 cache=None, names=None, prior=2, openings=None):
+        self.agents = [agent if isinstance(agent, (tuple, list)) else (agent, {})
+                       for agent in agents]
+        self.names = names or [agent.__name__ for agent, _ in self.agents]
+        self.keys = [agent_key(agent, params) for agent, params in self.agents]
+        # the results of the cache are from the perspective of the smallest key
+        if len(set(self.keys)) < len(self.keys):
+            raise ValueError('The same agent (class and params) is listed twice.')
+        self.games_per_pair = games_per_pair
+        self.time_limit = time_limit
+        self.num_workers = num_workers
+        self.cache = cache if isinstance(cache, ResultCache) else ResultCache(cache)
+        self.prior = prior
+        self.openings = openings
+        # 30 and 30.0 (command line) are the same setting
+        setting = float(time_limit) if time_limit is not None else None
+        # the cache entries of the same agents and time limit differ by the openings
+        self.setting = setting if not openings else '{}-{}'.format(
+            setting, hashlib.sha1(json.dumps(openings).encode()).hexdigest())
+
+    def pairings(self):
+        """Yield the index of the agents of each pairing"""
+        for i in range(len(self.agents)):
+            for j in range(i + 1, len(self.agents)):
+                yield i, j
+
+    def tasks(self):
+        """Return the games not in the `cache` (see `arena.play_game`),
+        the index of the game is the position in the list"""
+        tasks = []
+        for i, j in self.pairings():
+            played = self.cache.get(self.keys[i], self.keys[j], self.setting)[3]
+            for game in range(played, self.games_per_pair):
+                tasks.append({'game': len(tasks), 'pairing': (i, j), 'swap': game % 2 == 1,
+                              'agents': [self.agents[i], self.agents[j]],
+                              'time_limit': self.time_limit,
+                              'opening': opening_of(self.openings, game)})
+        return tasks
+
+    def run(self, callback=None):
+        """Play the missing games, the `cache` is saved after
+        each game
+
+        # Arguments
+            callback: function, optional, called with each
+                result and the index of the agents of the game
+        """
+        tasks = self.tasks()
+        for result in run_tasks(tasks, self.num_workers):
+            i, j = tasks[result['game']]['pairing']
+            self.cache.add(self.keys[i], self.keys[j], self.setting, result)
+            self.cache.save()
+            if callback:
+                callback(result, i, j)
+
+    def results(self):
+        """Return the `(wins, draws, losses)` of each pairing"""
+        results = {}
+        for i, j in self.pairings():
+            wins, draws, losses, _ = self.cache.get(self.keys[i], self.keys[j],
+                                                   self.setting)
+            results[i, j] = (wins, draws, losses)
+        return results
+
+    def ratings(self):
+        """Return the ratings and the standard errors,
+        see `fit_ratings`"""
+        return fit_ratings(len(self.agents), self.results(), self.prior)
+
+    def table(self):
+        """Return a text with the agents sorted by rating"""
+        ratings, errors = self.ratings()
+        points = [0.]*len(self.agents)
+        games = [0]*len(self.agents)
+        for (i, j), (wins, draws, losses) in self.results().items():
+            points[i] += wins + .5*draws
+            points[j] += losses + .5*draws
+            games[i] += wins + draws + losses
+            games[j] += wins + draws + losses
+
+        width = max(len(name) for name in self.names)
+        lines = ['{:<4} {:<{w}} {:>7} {:>7} {:>6} {:>6}'.format(
+            'Rank', 'Agent', 'Elo', '+/-', 'Games', 'Score', w=width)]
+        for rank, i in enumerate(np.argsort(-ratings)):
+            lines.append('{:<4} {:<{w}} {:>7.0f} {:>7.0f} {:>6} {:>6.1%}'.format(
+                rank + 1, self.names[i], ratings[i], 1.96*errors[i], games[i],
+                points[i]/games[i] if games[i] else 0, w=width))
+        return '\n'.join(lines)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m connectFourLab.game.tournament',
+                                     description='Round-robin tournament between agents.')
+    parser.add_argument('agents', nargs='*',
+                        help='agents (see arena), default all the agents '
+                             'which do not require a model')
+    parser.add_argument('-g', '--games', type=int, default=20, help='games per pairing')
+    parser.add_argument('-t', '--time-limit', type=float, default=None,
+                        help='seconds of each player per game')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='number of processes, default number of CPUs')
+    parser.add_argument('-c', '--cache', default='tournament.json',
+                        help='file of the results, default tournament.json')
+    parser.add_argument('--prior', type=float, default=2, help='virtual draws of each pairing')
+    parser.add_argument('--openings', nargs='?', const=DEFAULT_OPENINGS, default=None,
+                        help='start the games from the openings of a file, '
+                             'default the suite of the game')
+    args = parser.parse_args(args)
+
+    if args.agents:
+        agents = [parse_agent(agent) for agent in args.agents]
+        names = args.agents
+    else:
+        agents = [agent for agent in find_agents()
+                  if agent.__name__ != 'AgentHuman' and not agent.require_nn_model]
+        names = [agent.__name__ for agent in agents]
+
+    openings = load_openings(args.openings) if args.openings else None
+    tournament = Tournament(agents, args.games, args.time_limit, args.workers,
+                            args.cache, names, args.prior, openings)
+    num_games = len(tournament.tasks())
+    print('Games to play: {}'.format(num_games))
+
+    start = time.time()
+    def report(result, i, j):
+        print('{} vs {} ({} first): {}'.format(
+            names[i], names[j], names[i] if result['A_first'] else names[j],
+            result['result'] or result['status']))
+
+    tournament.run(report)
+    print(tournament.table())
+    print('Elapsed: {:.1f}s'.format(time.time() - start))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,18 @@
 '''Evaluation Neural Network Trainer'''
 import os, sys
 import time
+import queue
+import types
 import random
+import traceback
+import multiprocessing
 import numpy as np
 from threading import Thread
-import keras
-from keras import Sequential
-from keras.layers import Dense, Dropout, Activation
-from .. import RunGame
+from .. import RunGame, inference
 from ..agents import AgentRandom
 from ..agents.mctsnn import AgentMCTSNN
+from ..inference import NumpyModel
+from .replayMemory import ReplayMemory
 
 
 model_key = AgentMCTSNN.model_key
@@ -26,10 +29,15 @@ model_name = 'default'
 load_model = False
 model_file = None
 weight_file = None
+memory_file = None
 batch_size = 64
 num_epochs = 1
 verbose = 0
-data_memory = list()
+memory_capacity = 1000000
+data_memory = None
+num_workers = 0
+weights_frequency = 10
+random_episodes = 50
 
 
 __DIR__ = os.path.dirname(__file__)
@@ -37,8 +45,8 @@ __MODEL_DIR__ = os.path.join(__DIR__, '..\\models')
 
 
 def set_attr(log):
-    global quantity_games, time_limit, \
-        load_model, model_name, model_file, weight_file, model
+    global quantity_games, time_limit, num_workers, memory_capacity, \
+        load_model, model_name, model_file, weight_file, memory_file, model
     
     if kwargs and len(kwargs) > 0:
         log('Setting variables: {}'.format(kwargs))
@@ -50,6 +58,10 @@ def set_attr(log):
             time_limit = eval(value)
         elif kw == 'load_model':
             load_model = value
+        elif kw == 'num_workers':
+            num_workers = eval(value)
+        elif kw == 'memory_capacity':
+            memory_capacity = eval(value)
         elif kw == 'model_name':
             value = value.replace('\'', '').replace('\"', '')
             model_name = str(value)
@@ -64,9 +76,13 @@ def set_attr(log):
 
     model_file = os.path.join(__MODEL_DIR__, model_name)
     weight_file = os.path.join(__MODEL_DIR__, model_name.replace('.h5', '.npy'))
+    memory_file = os.path.join(__MODEL_DIR__, model_name.replace('.h5', '_memory'))
 
 
 def create_model():
+        from keras import Sequential
+        from keras.layers import Dense, Dropout
+
         len_in = board_size + 1
         len_out = 1
 
@@ -85,23 +101,41 @@ def create_model():
 
 
 def save_model(log):
+    global data_memory
     log('Saving model...')
-    np.save(weight_file, data_memory)
     model.save(model_file)
+    inference.export_h5(model_file)
+    if data_memory.file is None:
+        data_memory = data_memory.save(memory_file)
+    else:
+        data_memory.flush()
     log('Model saved.')
 
 
 def set_model(log):
     global model, data_memory
     if load_model:
+        import keras
         model = keras.models.load_model(model_file)
-        data_memory = np.load(weight_file).tolist()
+        data_memory = load_memory(log)
         log('Model loaded!')
     else:
         model = create_model()
+        data_memory = ReplayMemory(memory_capacity, board_size)
         log('Model Created!')
 
 
+def load_memory(log):
+    """Open the replay memory of the model, the memory of
+    the old format (list of samples in `weight_file`) is converted"""
+    if not os.path.exists(memory_file + '.meta.npy') and os.path.exists(weight_file):
+        log('Converting the replay memory...')
+        data = np.load(weight_file, allow_pickle=True).tolist()
+        return ReplayMemory.from_list(data, memory_capacity, memory_file)
+
+    return ReplayMemory(memory_capacity, board_size, memory_file)
+
+
 def controller():
     count = 0
     report = False
@@ -147,7 +181,7 @@ def play(episode):
             else:
                 time.sleep(.4)
 
-    if episode < 50 and not load_model:
+    if episode < random_episodes and not load_model:
         p_one = AgentRandom
         p_two = AgentRandom
     else:
@@ -167,6 +201,13 @@ def play(episode):
 
 
 def new_data(game):
+    add_data(*game_data(game))
+
+
+def game_data(game):
+    """Return the inputs (board states plus the id of the player)
+    and the outputs (rewards) of all the turns of a game,
+    int8 arrays"""
     data_in, data_out = [], []
     
     for _, p in game.players.items():
@@ -174,30 +215,41 @@ def new_data(game):
         if game.winner:
             reward = 1 if p.id != game.winner.id else -1
 
-        scenario = []
-        for item in p.data_scenario:
-            reshaped = list(np.array(item).reshape(-1))
-            reshaped.append(p.id)
-            scenario.append(reshaped)
-        
-        data_in += scenario
-        data_out += [reward for _ in scenario]
+        if not p.data_scenario:
+            continue
+
+        scenario = np.empty((len(p.data_scenario), board_size + 1), dtype=np.int8)
+        scenario[:, :-1] = np.reshape(p.data_scenario, (len(p.data_scenario), -1))
+        scenario[:, -1] = p.id
 
-    for i, j in zip(data_in, data_out):
-        data_memory.append([i,j])
+        data_in.append(scenario)
+        data_out.append(np.full(len(scenario), reward, dtype=np.int8))
+
+    if not data_in:
+        return (np.empty((0, board_size + 1), dtype=np.int8),
+                np.empty(0, dtype=np.int8))
+
+    return np.concatenate(data_in), np.concatenate(data_out)
+
+
+def add_data(data_in, data_out):
+    data_in = np.asarray(data_in)
+    if len(data_in):
+        data_memory.add(data_in[:, :-1], data_in[:, -1], data_out)
 
 
 def train():
     if len(data_memory) < batch_size:
         return
     
-    sample = random.sample(data_memory, batch_size)
-    data_in = np.array([item[0] for item in sample])
-    data_out = np.array([item[1] for item in sample])
+    data_in, data_out = data_memory.sample(batch_size)
     model.fit(data_in, data_out, epochs=num_epochs, verbose=verbose)
 
 
 def training_loop(log):
+    if num_workers > 0:
+        return parallel_training_loop(log)
+
     log('Starting training loop...')
     for episode, report in controller():
         if kill_training: break
@@ -210,6 +262,126 @@ def training_loop(log):
         train()
 
 
+def self_play_worker(weights_queue, samples_queue, layers=None):
+    """Self-play process, play games and send the data of each
+    one to the `samples_queue`
+
+    Play with random agents until the first weights are received,
+    the newest weights in the `weights_queue` are loaded before
+    each game (NumPy inference, Keras is not imported). A `None`
+    in the `weights_queue` stops the worker. An exception in a game
+    is sent as a `RuntimeError` with the traceback (tracebacks
+    can not be pickled) and stops the worker.
+    """
+    random.seed()
+    np.random.seed()
+    evaluation_model = NumpyModel(layers) if layers else None
+
+    while True:
+        try:
+            while True:
+                layers = weights_queue.get_nowait()
+                if layers is None:
+                    return
+                evaluation_model = NumpyModel(layers)
+        except queue.Empty:
+            pass
+
+        if evaluation_model is None:
+            p_one, p_two = AgentRandom, AgentRandom
+        else:
+            p_one = AgentMCTSNN(model=evaluation_model)
+            p_two = AgentMCTSNN(model=evaluation_model)
+
+        game = RunGame(p_one, p_two, first_player_randomized=False)
+        if game.status == game.GameStatus.exception:
+            message = ''.join(traceback.format_exception(*game.exception))
+            samples_queue.put(RuntimeError('Exception in a self-play game:\n' + message))
+            return
+
+        samples_queue.put(game_data(game))
+
+
+def get_samples(samples_queue, workers, timeout=1):
+    """Return the data of the next game played by the workers,
+    re-raise the exceptions sent by them and raise
+    `RuntimeError` if any of them is no longer alive"""
+    while True:
+        try:
+            data = samples_queue.get(timeout=timeout)
+        except queue.Empty:
+            if not all(worker.is_alive() for worker in workers):
+                raise RuntimeError('A self-play worker stopped unexpectedly')
+            continue
+
+        if isinstance(data, Exception):
+            raise data
+        return data
+
+
+def start_workers(workers):
+    """Start new processes without importing the `__main__` module
+    of the trainer in them
+
+    The `spawn` processes import the `__main__` module of the parent,
+    in the app it is `run_app.py`, which imports Kivy and would open
+    a window in every worker. The workers only need the modules of
+    their target, so an empty `__main__` is used while they start.
+    """
+    main = sys.modules['__main__']
+    sys.modules['__main__'] = types.ModuleType('__main__')
+    try:
+        for worker in workers:
+            worker.start()
+    finally:
+        sys.modules['__main__'] = main
+
+
+def parallel_training_loop(log):
+    """Training loop with `num_workers` self-play processes
+
+    The workers play the games and send the data to the trainer,
+    which trains the model with every new game and sends the
+    new weights to the workers every `weights_frequency` games.
+    The workers are started by `start_workers`.
+    """
+    log('Starting {} self-play workers...'.format(num_workers))
+    # new processes instead of forks of the trainer, which has TensorFlow loaded
+    context = multiprocessing.get_context('spawn')
+    samples_queue = context.Queue(maxsize=2*num_workers)
+    weights_queues = [context.Queue() for _ in range(num_workers)]
+    layers = None if not load_model else NumpyModel.from_keras(model).layers
+    workers = [context.Process(target=self_play_worker, daemon=True,
+                               args=(weights_queue, samples_queue, layers))
+               for weights_queue in weights_queues]
+    start_workers(workers)
+
+    try:
+        log('Starting training loop...')
+        for episode, report in controller():
+            if kill_training: break
+
+            if report:
+                log('Completed: {}% - Loop episode: {}'.format(report, episode))
+
+            data = get_samples(samples_queue, workers)
+            add_data(*data)
+            train()
+
+            if (episode + 1) >= random_episodes and \
+                    (episode + 1) % weights_frequency == 0:
+                layers = NumpyModel.from_keras(model).layers
+                for weights_queue in weights_queues:
+                    weights_queue.put(layers)
+    finally:
+        for weights_queue in weights_queues:
+            weights_queue.put(None)
+        for worker in workers:
+            worker.join(1)
+            if worker.is_alive():
+                worker.terminate()
+
+
 def start(log):
     log('Starting traning')
     set_attr(log)
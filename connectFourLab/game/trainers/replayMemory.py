@@ -0,0 +1,167 @@
+'''Replay memory'''
+import os
+import numpy as np
+
+
+class ReplayMemory:
+    """Fixed capacity ring buffer of training samples
+
+    Each sample is a board (int8), the id of the player
+    (side to move) and the target value (float32), stored in
+    preallocated NumPy arrays. When the memory is full the
+    oldest samples are replaced.
+
+    With a `file` the arrays are memory-mapped `.npy` files
+    (`<file>.boards.npy`, `<file>.colors.npy`, `<file>.targets.npy`
+    and `<file>.meta.npy`), created when missing and opened without
+    reading them when they exist, every change is written to
+    the files (see `flush`).
+
+    # Arguments
+        capacity: int, optional, default `None`, maximum number
+            of samples, 1000000 for a new memory and the capacity
+            of the files when opening existing files
+        board_size: int, optional, default `None`, 49 for a new
+            memory and the board size of the files when opening
+            existing files
+        file: str, optional, default `None`, path prefix of the files
+
+    # Exceptions
+        ValueError: raised when the `capacity` or the `board_size`
+            are not the ones of the existing files
+
+    # Example
+
+    ```python
+    memory = ReplayMemory(100000)
+    memory.add(boards, colors, rewards)
+    data_in, data_out = memory.sample(64)
+    model.fit(data_in, data_out)
+    ```
+    """
+
+    def __init__(self, capacity=None, board_size=None, file=None):
+        self.file = file
+        if file and os.path.exists(file + '.meta.npy'):
+            self.boards = np.load(file + '.boards.npy', mmap_mode='r+')
+            self.colors = np.load(file + '.colors.npy', mmap_mode='r+')
+            self.targets = np.load(file + '.targets.npy', mmap_mode='r+')
+            self.meta = np.load(file + '.meta.npy', mmap_mode='r+')
+            self._check_files(capacity, board_size)
+            return
+
+        if capacity is None:
+            capacity = 1000000
+        if board_size is None:
+            board_size = 49
+
+        if file:
+            open_memmap = np.lib.format.open_memmap
+            self.boards = open_memmap(file + '.boards.npy', 'w+', np.int8, (capacity, board_size))
+            self.colors = open_memmap(file + '.colors.npy', 'w+', np.int8, (capacity,))
+            self.targets = open_memmap(file + '.targets.npy', 'w+', np.float32, (capacity,))
+            self.meta = open_memmap(file + '.meta.npy', 'w+', np.int64, (2,))
+        else:
+            self.boards = np.zeros((capacity, board_size), dtype=np.int8)
+            self.colors = np.zeros(capacity, dtype=np.int8)
+            self.targets = np.zeros(capacity, dtype=np.float32)
+            # number of samples, index of the next sample
+            self.meta = np.zeros(2, dtype=np.int64)
+
+    def _check_files(self, capacity, board_size):
+        """Raise `ValueError` if the arrays of the files are
+        not consistent or not of the requested shape"""
+        stored_capacity, stored_board_size = self.boards.shape
+        if not len(self.colors) == len(self.targets) == stored_capacity:
+            raise ValueError('The files of the memory {} have different '
+                             'capacities'.format(self.file))
+
+        if capacity is not None and capacity != stored_capacity or \
+                board_size is not None and board_size != stored_board_size:
+            raise ValueError('The memory {} has capacity {} and board size {}, '
+                             '{} and {} requested (remove the files to create a new memory)'
+                             .format(self.file, stored_capacity, stored_board_size,
+                                     capacity, board_size))
+
+    def __len__(self):
+        return int(self.meta[0])
+
+    @property
+    def capacity(self):
+        return len(self.targets)
+
+    def add(self, boards, colors, targets):
+        """Add many samples at once
+
+        # Arguments
+            boards: matrix (n x board_size) or (n x 7 x 7)
+            colors: array (n), id of the player of each board
+            targets: array (n), target value of each board
+        """
+        boards = np.asarray(boards).reshape(len(targets), -1)
+        num = len(targets)
+        if num > self.capacity:
+            boards, colors, targets = boards[-self.capacity:], \
+                np.asarray(colors)[-self.capacity:], np.asarray(targets)[-self.capacity:]
+            num = self.capacity
+
+        indexes = (self.meta[1] + np.arange(num)) % self.capacity
+        self.boards[indexes] = boards
+        self.colors[indexes] = colors
+        self.targets[indexes] = targets
+
+        self.meta[0] = min(self.capacity, self.meta[0] + num)
+        self.meta[1] = (self.meta[1] + num) % self.capacity
+
+    def inputs(self, indexes):
+        """Return the inputs of the models (board plus
+        the id of the player, float32) of some samples"""
+        data_in = np.empty((len(indexes), self.boards.shape[1] + 1), dtype=np.float32)
+        data_in[:, :-1] = self.boards[indexes]
+        data_in[:, -1] = self.colors[indexes]
+        return data_in
+
+    def sample(self, batch_size):
+        """Random minibatch (with replacement)
+
+        # Return
+            data_in: matrix (batch_size x board_size + 1), see `inputs`
+            data_out: array (batch_size), targets
+        """
+        indexes = np.sort(np.random.randint(0, len(self), batch_size))
+        return self.inputs(indexes), self.targets[indexes]
+
+    def flush(self):
+        """Write the changes of the memory-mapped arrays to the files"""
+        for array in (self.boards, self.colors, self.targets, self.meta):
+            if isinstance(array, np.memmap):
+                array.flush()
+
+    def save(self, file):
+        """Save the memory in files (see `file`) and
+        return the memory-mapped copy, existing files are replaced"""
+        if file == self.file:
+            self.flush()
+            return self
+
+        # without the meta file new files are created, whatever the old capacity
+        if os.path.exists(file + '.meta.npy'):
+            os.remove(file + '.meta.npy')
+        memory = ReplayMemory(self.capacity, self.boards.shape[1], file)
+        memory.boards[:] = self.boards
+        memory.colors[:] = self.colors
+        memory.targets[:] = self.targets
+        memory.meta[:] = self.meta
+        memory.flush()
+        return memory
+
+    @staticmethod
+    def from_list(data, capacity=1000000, file=None):
+        """Create a memory from a list of `[inputs, target]` samples,
+        the inputs are the board plus the id of the player (old
+        format of the trainers)"""
+        data_in = np.array([item[0] for item in data], dtype=np.int8).reshape(len(data), -1)
+        memory = ReplayMemory(max(capacity, len(data)), data_in.shape[1] - 1, file)
+        if len(data):
+            memory.add(data_in[:, :-1], data_in[:, -1], [item[1] for item in data])
+        return memory
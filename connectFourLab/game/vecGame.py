@@ -0,0 +1,228 @@
+"""Vectorized games
+
+Play many games at once in lockstep: the boards of all the games
+are stacked in arrays, each turn every player chooses the columns
+of all its games in a single `actions` call (see `AgentBase`) and
+the moves and the winners of all the games are checked with NumPy.
+"""
+import numpy as np
+from .position import WIDTH, HEIGHT, BITS_TABLE, BOARD_DTYPE, has_four_batch
+from .game import InvalidColumn
+from .agents import AgentRandom
+
+
+class VecRunGame:
+    """Run many matches of Connect Four (7x7) at once
+
+    Keep `num_games` games running, each `step` plays one turn in
+    all of them and the finished games are started again, so the
+    games are always full. Made to collect the data of many games
+    (e.g. self-play) without the cost of a `RunGame` per game,
+    the agents play all the turns at once with `actions`
+    (see `AgentBase`).
+
+    # Arguments
+        player_one: type or instance, optional, default `None`
+            - Type or instance of any `AgentBase` object
+            - If `None` the `AgentRandom` object will be assigned
+        player_two: same as `player_one`
+        num_games: int, optional, default 64, games played at once
+        first_player_randomized: bool, optional, default True
+            - Defines if the first turn of each game will be randomized
+                or the player one will start the games
+        record: bool, optional, default False
+            - If `True` the turns of the finished games are kept
+                in `episodes`
+
+    # Attributes
+        BOARD_FORMAT: tuple, constant, value (7,7)
+        BOARD_DTYPE: NumPy dtype, default int8, see `RunGame`
+        MAX_TURNS_POSSIBLE: int, the maximum number of turns in a match
+        players: dict, two Agents one for each player
+            - player one: id `1` - two: id `-1`
+        boards: array (num_games,7,7), current state of each game
+        colors: int array (num_games,), id of the player
+            who plays the next move of each game
+        num_moves: int array (num_games,), moves played in each game
+        results: dict, number of finished games won by each
+            player id (`1` and `-1`), `0` for the ties
+        games_played: int, number of finished games
+        episodes: list, the finished games (only with `record`)
+            - Item: dict with the `boards` before each turn, the `colors`
+                of the players and the `columns` played in each turn,
+                the final `board` and the id of the `winner` (`0` tie)
+
+    # Exceptions
+        InvalidColumn: raised when an agent returns a column out of
+            range or a column already fulfilled
+
+    # Example
+
+    ```python
+    from connectFourLab.game.vecGame import VecRunGame
+    from connectFourLab.game.agents.monteCarlo import AgentSimulation
+
+    game = VecRunGame(AgentSimulation, num_games=128, record=True)
+    results = game.run(1000)
+    print('Player one won {} games'.format(results[1]))
+    ```
+    """
+    BOARD_FORMAT = (7,7)
+    BOARD_DTYPE = BOARD_DTYPE
+    MAX_TURNS_POSSIBLE = BOARD_FORMAT[0]*BOARD_FORMAT[1]
+
+    def __init__(self,
+                 player_one=None,
+                 player_two=None,
+                 num_games=64,
+                 first_player_randomized=True,
+                 record=False
+                ):
+        self.num_games = num_games
+        self.first_player_randomized = first_player_randomized
+        self.record = record
+
+        if not player_one:
+            player_one = AgentRandom()
+        elif type(player_one) == type:
+            player_one = player_one()
+
+        if not player_two:
+            player_two = AgentRandom()
+        elif type(player_two) == type:
+            player_two = player_two()
+
+        player_one.id = 1
+        player_two.id = -1
+        self.players = {1:player_one, -1:player_two}
+
+        self._games = np.arange(num_games)
+        self.boards = np.zeros((num_games,) + self.BOARD_FORMAT, dtype=self.BOARD_DTYPE)
+        self.bit_boards = np.zeros((num_games, 2), dtype=np.uint64)
+        self.heights = np.zeros((num_games, WIDTH), dtype=int)
+        self.colors = np.ones(num_games, dtype=int)
+        self.num_moves = np.zeros(num_games, dtype=int)
+
+        if record:
+            turns = (num_games, self.MAX_TURNS_POSSIBLE)
+            self._turn_boards = np.zeros(turns + self.BOARD_FORMAT, dtype=self.BOARD_DTYPE)
+            self._turn_colors = np.zeros(turns, dtype=np.int8)
+            self._turn_columns = np.zeros(turns, dtype=np.int8)
+
+        self.results = {1:0, -1:0, 0:0}
+        self.games_played = 0
+        self.episodes = []
+        self.reset()
+
+    def reset(self, games=None):
+        """Start new games
+
+        # Arguments
+            games: int array, optional, default `None`,
+                index of the games, `None` for all the games
+        """
+        if games is None:
+            games = self._games
+
+        self.boards[games] = 0
+        self.bit_boards[games] = 0
+        self.heights[games] = 0
+        self.num_moves[games] = 0
+
+        if self.first_player_randomized:
+            self.colors[games] = np.random.choice((1, -1), len(games))
+        else:
+            self.colors[games] = 1
+
+    def step(self):
+        """Play one turn in every game
+
+        Each player is called once, with the boards of all the
+        games where it plays the next move. The finished games
+        are counted in `results` and started again.
+
+        # Return
+            columns: int array (num_games,), column played in each game
+            dones: bool array (num_games,), games finished in this turn
+            winners: int array (num_games,), id of the winner of each
+                game finished in this turn, `0` for a tie or a game
+                not finished
+        """
+        columns = np.empty(self.num_games, dtype=int)
+        for id, player in self.players.items():
+            games = self._games[self.colors == id]
+            if len(games):
+                columns[games] = self._actions(player, games)
+
+        games = self._games
+        rows = self.heights[games, columns]
+        if self.record:
+            self._turn_boards[games, self.num_moves] = self.boards
+            self._turn_colors[games, self.num_moves] = self.colors
+            self._turn_columns[games, self.num_moves] = columns
+
+        player = (self.colors == -1).astype(int)
+        self.boards[games, columns, rows] = self.colors
+        self.bit_boards[games, player] |= BITS_TABLE[columns, rows]
+        self.heights[games, columns] += 1
+        self.num_moves += 1
+
+        won = has_four_batch(self.bit_boards[games, player])
+        dones = won | (self.num_moves == self.MAX_TURNS_POSSIBLE)
+        winners = np.where(won, self.colors, 0)
+        self.colors = -self.colors
+
+        finished = games[dones]
+        if len(finished):
+            self._end_games(finished, winners[finished])
+            self.reset(finished)
+
+        return columns, dones, winners
+
+    def run(self, num_games):
+        """Play until `num_games` more games are finished,
+        the games still running are kept for the next calls
+
+        # Return
+            `results`
+        """
+        target = self.games_played + num_games
+        while self.games_played < target:
+            self.step()
+
+        return self.results
+
+    def _actions(self, player, games):
+        """Return the columns chosen by a player in some games,
+        raise `InvalidColumn` if any of them is not valid"""
+        columns = np.asarray(player.actions(self.boards[games]), dtype=int)
+
+        out_of_range = (columns < 0) | (columns >= WIDTH)
+        if out_of_range.any():
+            raise InvalidColumn(player.name, columns[out_of_range][0],
+                'Column out of range, the range of columns is 0 to 6.')
+
+        full = self.heights[games, columns] >= HEIGHT
+        if full.any():
+            raise InvalidColumn(player.name, columns[full][0],
+                'The chosen column is full.')
+
+        return columns
+
+    def _end_games(self, games, winners):
+        """Count the results of the finished games and
+        keep their turns in `episodes`"""
+        self.games_played += len(games)
+        for id in self.results:
+            self.results[id] += int(np.count_nonzero(winners == id))
+
+        if not self.record:
+            return
+
+        for game, winner in zip(games, winners):
+            turns = self.num_moves[game]
+            self.episodes.append({'boards': self._turn_boards[game, :turns].copy(),
+                                  'colors': self._turn_colors[game, :turns].copy(),
+                                  'columns': self._turn_columns[game, :turns].copy(),
+                                  'board': self.boards[game].copy(),
+                                  'winner': int(winner)})
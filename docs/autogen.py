@@ -17,6 +17,18 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
 from connectFourLab import game
 from connectFourLab.game import RunGame
 from connectFourLab.game import helpers
+from connectFourLab.game.position import Position
+from connectFourLab.game import inference
+from connectFourLab.game.inference import NumpyModel, EvaluationCache
+from connectFourLab.game.inference import InferenceServer, InferenceClient
+from connectFourLab.game.trainers.replayMemory import ReplayMemory
+from connectFourLab.game import arena
+from connectFourLab.game.arena import Arena, ArenaStats, SPRT
+from connectFourLab.game import tournament
+from connectFourLab.game.tournament import Tournament, ResultCache
+from connectFourLab.game import openings
+from connectFourLab.game.openings import OpeningEngine
+from connectFourLab.game.vecGame import VecRunGame
 from connectFourLab.game.timer import Chronometer, ChronometerDecorator,Timer
 
 from connectFourLab.game.agents import AgentBase, AgentHuman, AgentRandom
@@ -29,8 +41,10 @@ from connectFourLab.game.agents.strategies import RandomStrategy
 from connectFourLab.game.agents.strategies import TimerStrategy
 from connectFourLab.game.agents.strategies import ZobristHashingStrategy
 from connectFourLab.game.agents.strategies import TreeSearchStrategy
+from connectFourLab.game.agents.strategies import TranspositionTable
 from connectFourLab.game.agents.strategies import SimulationStrategy
 from connectFourLab.game.agents.strategies import Node
+from connectFourLab.game.agents.strategies import TreeStore
 from connectFourLab.game.agents.strategies import DepthMeasure
 
 from connectFourLab.app.myWidgets import ConfirmationPopup, ConfirmationPopupDecorator
@@ -75,11 +89,119 @@ PAGES = [
             ChronometerDecorator,
         ]
     },
+    {
+        'page': 'Game/position.md',
+        'classes': [
+            (Position, [Position.play,
+                        Position.undo,
+                        Position.winner,
+                        Position.legal_columns,
+                        Position.to_board,
+                        ]),
+        ]
+    },
+    {
+        'page': 'Game/inference.md',
+        'classes': [
+            (NumpyModel, [NumpyModel.predict,
+                          NumpyModel.save,
+                          NumpyModel.load,
+                          NumpyModel.from_keras,
+                          ]),
+            (EvaluationCache, [EvaluationCache.get,
+                               EvaluationCache.put,
+                               EvaluationCache.clear,
+                               ]),
+            (InferenceServer, [InferenceServer.start,
+                               InferenceServer.stop,
+                               InferenceServer.client,
+                               ]),
+            (InferenceClient, [InferenceClient.predict]),
+        ],
+        'functions': [
+            inference.export_h5,
+            inference.load_model,
+            inference.model_id,
+        ]
+    },
+    {
+        'page': 'Agents/trainers.md',
+        'classes': [
+            (ReplayMemory, [ReplayMemory.add,
+                            ReplayMemory.sample,
+                            ReplayMemory.inputs,
+                            ReplayMemory.flush,
+                            ReplayMemory.save,
+                            ReplayMemory.from_list,
+                            ]),
+        ]
+    },
+    {
+        'page': 'Game/arena.md',
+        'classes': [
+            (Arena, [Arena.results,
+                     Arena.run,
+                     ]),
+            (ArenaStats, [ArenaStats.summary]),
+            (SPRT, [SPRT.update,
+                    SPRT.log_likelihood_ratio,
+                    ]),
+        ],
+        'functions': [
+            arena.play_game,
+            arena.get_agent,
+            arena.parse_agent,
+            arena.create_agent,
+            arena.run_tasks,
+        ]
+    },
+    {
+        'page': 'Game/vecGame.md',
+        'classes': [
+            (VecRunGame, [VecRunGame.step,
+                          VecRunGame.run,
+                          VecRunGame.reset,
+                          ]),
+        ],
+    },
+    {
+        'page': 'Game/openings.md',
+        'classes': [
+            (OpeningEngine, [OpeningEngine.evaluate]),
+        ],
+        'functions': [
+            openings.generate_openings,
+            openings.all_openings,
+            openings.load_openings,
+            openings.save_openings,
+        ]
+    },
+    {
+        'page': 'Game/tournament.md',
+        'classes': [
+            (Tournament, [Tournament.run,
+                          Tournament.tasks,
+                          Tournament.results,
+                          Tournament.ratings,
+                          Tournament.table,
+                          ]),
+            (ResultCache, [ResultCache.get,
+                           ResultCache.add,
+                           ]),
+        ],
+        'functions': [
+            tournament.fit_ratings,
+            tournament.agent_key,
+        ]
+    },
     {
         'page': 'Game/helpers.md',
         'functions': [
             helpers.check_winner,
             helpers.bit_board_split,
+            helpers.check_winner_at,
+            helpers.check_winner_batch,
+            helpers.bit_board_split_batch,
             helpers.next_position,
             helpers.available_positions,
             helpers.seconds_to_hms,
@@ -87,7 +209,8 @@ PAGES = [
     },
     {
         'page': 'Agents/base.md',
-        'classes': [AgentBase,]
+        'classes': [(AgentBase, [AgentBase.clone,
+                                 AgentBase.actions,]),]
     },
     {
         'page': 'Agents/agents.md',
@@ -102,23 +225,47 @@ PAGES = [
     },
     {
         'page': 'Agents/strategies.md',
-        'classes': [(RandomStrategy, [RandomStrategy.random_choice,]),
+        'classes': [(RandomStrategy, [RandomStrategy.random_choice,
+                                      RandomStrategy.random_choices,]),
                     (TimerStrategy, [TimerStrategy.start_timer,]),
                     (ZobristHashingStrategy, [ZobristHashingStrategy.init_zobrist,
-                                              ZobristHashingStrategy.hash, 
+                                              ZobristHashingStrategy.hash,
+                                              ZobristHashingStrategy.update_hash,
                                               ZobristHashingStrategy.next_random64,
                     ]),
-                    (TreeSearchStrategy, [TreeSearchStrategy.negamax, 
+                    (TreeSearchStrategy, [TreeSearchStrategy.iterative_deepening,
+                                          TreeSearchStrategy.alphabeta,
+                                          TreeSearchStrategy.child_moves,
+                                          TreeSearchStrategy.negamax, 
                                           TreeSearchStrategy.childs, 
                                           TreeSearchStrategy.save_search, 
                                           TreeSearchStrategy.stored_value
                     ]),
-                    (SimulationStrategy, [SimulationStrategy.simulate,]),
+                    (TranspositionTable, [TranspositionTable.get,
+                                          TranspositionTable.put,
+                                          TranspositionTable.new_search,
+                    ]),
+                    (SimulationStrategy, [SimulationStrategy.simulate,
+                                          SimulationStrategy.simulate_batch,
+                                          SimulationStrategy.simulate_positions,
+                    ]),
                     (Node, [Node.rollout,
                             Node.rollout_score,
+                            Node.ucb1,
+                            Node.backpropagate,
+                            Node.reroot,
                             Node.children,
                             Node.new_node,
                     ]),
+                    (TreeStore, [TreeStore.reset,
+                                 TreeStore.reroot,
+                                 TreeStore.search,
+                                 TreeStore.search_batch,
+                                 TreeStore.select,
+                                 TreeStore.expand,
+                                 TreeStore.backpropagate,
+                                 TreeStore.best_move,
+                    ]),
                     (DepthMeasure, [DepthMeasure.start,
                                     DepthMeasure.add,
                                     DepthMeasure.reset,
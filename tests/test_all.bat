@@ -1,3 +1,12 @@
+pytest test_arena.py
 pytest test_helpers.py
+pytest test_inference.py
+pytest test_nn_evaluation.py
 pytest test_game.py
+pytest test_openings.py
+pytest test_position.py
+pytest test_replayMemory.py
+pytest test_strategies.py
+pytest test_tournament.py
+pytest test_vecGame.py
 pause
\ No newline at end of file
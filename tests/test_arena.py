@@ -0,0 +1,98 @@
+"""arena.py test"""
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
+
+from connectFourLab.game import arena
+from connectFourLab.game.arena import Arena
+from connectFourLab.game.agents import AgentBase, AgentRandom, find_agents
+from connectFourLab.game.agents.monteCarlo import AgentMonteCarlo, AgentSimulation
+
+
+class AgentBroken(AgentBase):
+    name = 'Broken'
+
+    def action(self, board):
+        return 7
+
+
+def test_find_agents():
+    agents = find_agents()
+    assert agents[:2] == [arena.AgentHuman, AgentRandom]
+    assert AgentMonteCarlo in agents and AgentBase not in agents
+
+
+def test_parse_agent():
+    assert arena.parse_agent('random') == (AgentRandom, {})
+    agent, params = arena.parse_agent('Monte Carlo:num_simulations=10,rollout_policy=random')
+    assert agent is AgentMonteCarlo
+    assert params == {'num_simulations': 10, 'rollout_policy': 'random'}
+
+    instance = arena.create_agent(agent, params)
+    assert instance.num_simulations == 10 and AgentMonteCarlo.num_simulations == 100
+
+
+def test_arena():
+    results = []
+    stats = Arena(AgentRandom, AgentRandom, num_games=6, num_workers=0,
+                  seed=1).run(results.append)
+    assert stats.games == stats.wins + stats.draws + stats.losses == 6
+    assert [result['A_first'] for result in results] == [True, False]*3
+    assert stats.move_time['A']['moves'] + stats.move_time['B']['moves'] == \
+        sum(result['moves'] for result in results)
+
+    again = Arena(AgentRandom, AgentRandom, num_games=6, num_workers=0, seed=1)
+    assert [result['moves'] for result in again.results()] == \
+        [result['moves'] for result in results]
+
+
+def test_arena_exceptions():
+    stats = Arena(AgentRandom, AgentBroken, num_games=2, num_workers=0).run()
+    assert stats.exceptions == {'A': 0, 'B': 2}
+    assert stats.wins + stats.draws + stats.losses == 0
+
+
+def test_arena_workers():
+    arena = Arena(AgentRandom, (AgentMonteCarlo, {'num_simulations': 10}),
+                  num_games=4, time_limit=2, num_workers=2)
+    games = sorted(result['game'] for result in arena.results())
+    assert games == [0, 1, 2, 3]
+    assert arena.stats.games == 4 and arena.stats.exceptions == {'A': 0, 'B': 0}
+
+
+def test_sprt():
+    sprt = arena.SPRT(0, 50)
+    assert sprt.lower < 0 < sprt.upper
+    assert sprt.log_likelihood_ratio(0, 0, 0) == 0
+    assert sprt.log_likelihood_ratio(60, 20, 20) > sprt.upper
+    assert sprt.log_likelihood_ratio(20, 20, 60) < sprt.lower
+    assert sprt.lower < sprt.log_likelihood_ratio(5, 0, 4) < sprt.upper
+    # a single win is not enough
+    assert sprt.log_likelihood_ratio(1, 0, 0) < sprt.upper
+
+
+def test_arena_sprt():
+    strong = (AgentSimulation, {'num_simulations': 20})
+    match = Arena(strong, AgentRandom, num_games=200, num_workers=0, seed=1,
+                  sprt=arena.SPRT(0, 100))
+    results = list(match.results())
+    assert match.sprt.status == 'H1'
+    assert match.sprt.llr >= match.sprt.upper
+    assert len(results) == match.stats.games < 200
+    assert all(result['llr'] < match.sprt.upper for result in results[:-1])
+
+
+def test_arena_openings():
+    suite = [[3, 3, 2, 4], [0, 6, 1, 5]]
+    match = Arena(AgentRandom, AgentRandom, num_games=6, num_workers=0, openings=suite)
+    tasks = list(match.tasks())
+    assert [task['opening'] for task in tasks] == [suite[0]]*2 + [suite[1]]*2 + [suite[0]]*2
+    assert [task['swap'] for task in tasks] == [False, True]*3
+
+    results = list(match.results())
+    assert all(result['moves'] <= 45 for result in results)
+    assert match.stats.games == 6 and match.stats.exceptions == {'A': 0, 'B': 0}
+
+    # the player two moves first after an odd opening
+    match = Arena(AgentRandom, AgentRandom, num_games=4, num_workers=0, openings=[[3], []])
+    results = sorted(match.results(), key=lambda result: result['game'])
+    assert [result['A_first'] for result in results] == [False, True, True, False]
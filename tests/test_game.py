@@ -3,10 +3,15 @@ import os, sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
 
 import time
+import pytest
+import numpy as np
 from connectFourLab.game import RunGame
 from connectFourLab.game import RunGame
+from connectFourLab.game.agents import AgentRandom
 from connectFourLab.game.agents.monteCarlo import AgentSimulation
 from connectFourLab.game import helpers
+from connectFourLab.game.position import Position
+from connectFourLab.game.timer import Timer
 
 
 def test_game():
@@ -24,3 +29,70 @@ def test_game():
     game.kill()
     assert game.status is game.GameStatus.killed
 
+
+def test_timer_short_time():
+    expired = []
+    timer = Timer(.05, lambda: expired.append(time.time()))
+    start = time.time()
+    timer.start()
+    while not expired and time.time() - start < 1:
+        time.sleep(.01)
+
+    # the callback is not delayed to the next .3s sleep
+    assert expired and expired[0] - start < .2
+    assert timer.time_out and timer.time_left == 0
+
+
+def test_board_dtype():
+    game = RunGame(first_player_randomized=False)
+    assert game.board.dtype == np.int8
+    assert all(board.dtype == np.int8 for _, board, _ in game.memory)
+    assert all(board.dtype == np.int8 for board in game.players[1].data_scenario)
+
+    class RunGameInt(RunGame):
+        BOARD_DTYPE = int
+
+    game = RunGameInt(first_player_randomized=False)
+    assert game.board.dtype == int
+    winner = game.winner.id if game.winner else None
+    assert helpers.check_winner(game.board) == winner
+
+
+def test_start_position():
+    game = RunGame(start_position=[3, 3, 2])
+    assert game.memory[0][0] == -1
+    assert len(game.memory) + 3 == game.position.num_moves
+    assert game.memory[0][1][3, 1] == -1 and game.memory[0][1][2, 0] == 1
+
+    position = Position()
+    position.play(0)
+    position.color = 1
+    game = RunGame(start_position=position, first_player_randomized=True)
+    assert game.memory[0][0] == 1
+    assert position.num_moves == 1
+
+    with pytest.raises(ValueError):
+        RunGame(start_position=[0, 1, 0, 1, 0, 1, 0])
+
+
+def test_board_view():
+    class AgentChecker(AgentRandom):
+        def action(self, board):
+            with pytest.raises(ValueError):
+                board[0, 0] = 1
+            clone = self.clone(board)
+            clone[0, 0] = 1
+            assert np.all(self.clone(board, perspective=False) == board)
+            assert np.all(clone[1:] == board[1:]*self.id)
+            choice = self.random_choice(board)
+            self.save(board, choice)
+            return choice
+
+    game = RunGame(AgentChecker, AgentChecker, first_player_randomized=False)
+    assert game.status is game.GameStatus.winner or game.status is game.GameStatus.tie
+
+    # every turn has its own board, from the perspective of the agent in the data
+    for turn, (player, board, column) in enumerate(game.memory):
+        assert np.count_nonzero(board) == turn
+        assert not board.flags.writeable
+        assert np.all(game.players[player].data_scenario[turn//2] == board*player)
@@ -6,6 +6,7 @@ import pytest
 import numpy as np
 from copy import deepcopy
 from connectFourLab.game import helpers
+from connectFourLab.game.position import Position
 
 
 def empty_board():
@@ -127,4 +128,45 @@ def test_available_positions():
 
 def test_seconds_to_hms():
     h,m,s = helpers.seconds_to_hms(19805)
-    assert h is 5 and m is 30 and s is 5
\ No newline at end of file
+    assert h is 5 and m is 30 and s is 5
+
+
+def test_check_winner_batch():
+    boards = np.zeros((4,7,7), dtype=int)
+    boards[0,1:5,0] = -1
+    boards[1,0,:4] = 1
+    boards[2,[0,1,2,3],[3,2,1,0]] = 1
+    boards[3,0,:3] = 1
+    boards[3,1:4,0] = -1
+
+    winners = helpers.check_winner_batch(boards)
+    assert list(winners) == [-1, 1, 1, 0]
+    assert list(winners) == [helpers.check_winner(b) or 0 for b in boards]
+
+    bit_boards = helpers.bit_board_split_batch(boards)
+    assert tuple(int(b) for b in bit_boards[2]) == helpers.bit_board_split(boards[2])
+    assert list(helpers.check_winner_batch(bit_boards)) == list(winners)
+
+    assert len(helpers.check_winner_batch([])) == 0
+    assert len(helpers.check_winner_batch(np.zeros((0,7,7), dtype=np.int8))) == 0
+    assert len(helpers.check_winner_batch(np.zeros((0,2), dtype=np.uint64))) == 0
+
+
+def test_check_winner_at():
+    board = empty_board()
+    board[0,3] = 1
+    board[1,2] = 1
+    board[2,1] = 1
+    board[3,0] = 1
+    board[4,0] = -1
+
+    assert helpers.check_winner_at(board, 1, 2) == 1
+    assert helpers.check_winner_at(board, 4, 0) is None
+    assert helpers.check_winner_at(board, 5, 0) is None
+
+    board = empty_board()
+    board[1:5,0] = -1
+    board[5,0] = 1
+    position = Position(board)
+    assert helpers.check_winner_at(position, 3, 0) == -1
+    assert helpers.check_winner_at(position, 5, 0) is None
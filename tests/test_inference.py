@@ -0,0 +1,163 @@
+"""inference.py test"""
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
+
+import multiprocessing
+import pytest
+import numpy as np
+from connectFourLab.game import inference
+from connectFourLab.game.inference import NumpyModel, EvaluationCache, InferenceServer
+from connectFourLab.game.agents.mctsnn import AgentMCTSNN
+from connectFourLab.game.position import Position
+
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), '../connectFourLab/game/models')
+
+
+def test_numpy_model(tmpdir):
+    rng = np.random.RandomState(0)
+    layers = [(rng.randn(50, 8), rng.randn(8), 'relu'),
+              (rng.randn(8, 1), rng.randn(1), 'linear')]
+    model = NumpyModel(layers)
+
+    data_in = rng.randn(4, 50)
+    expected = np.maximum(data_in @ layers[0][0] + layers[0][1], 0) @ layers[1][0] + layers[1][1]
+    assert np.allclose(model.predict(data_in), expected, atol=1e-4)
+
+    file = str(tmpdir.join('model.npz'))
+    model.save(file)
+    loaded = inference.load_model(file)
+    assert [layer[2] for layer in loaded.layers] == ['relu', 'linear']
+    assert np.array_equal(loaded.predict(data_in), model.predict(data_in))
+
+
+def _write_h5(file, layers):
+    """Write the layers in the format of the Keras `.h5` models"""
+    import h5py, json
+    with h5py.File(file, 'w') as f:
+        config = [{'class_name': 'Dense',
+                   'config': {'name': 'dense_{}'.format(i), 'activation': activation}}
+                  for i, (_, _, activation) in enumerate(layers)]
+        f.attrs['model_config'] = json.dumps({'config': {'layers': config}})
+        weights = f.create_group('model_weights')
+        weights.attrs['layer_names'] = [layer['config']['name'].encode() for layer in config]
+        for layer, (kernel, bias, _) in zip(config, layers):
+            group = weights.create_group(layer['config']['name'])
+            group.attrs['weight_names'] = [b'kernel', b'bias']
+            group['kernel'], group['bias'] = kernel, bias
+
+
+def test_load_model_h5(tmpdir):
+    pytest.importorskip('h5py')
+    h5_file, npz_file = str(tmpdir.join('model.h5')), str(tmpdir.join('model.npz'))
+    _write_h5(h5_file, [(np.ones((50, 1)), np.zeros(1), 'linear')])
+    first = inference.load_model(h5_file)
+    assert os.path.exists(npz_file)
+    assert inference.load_model(h5_file).id == first.id
+
+    # the .h5 model was saved again (e.g. trained), the .npz file is old
+    _write_h5(h5_file, [(np.zeros((50, 1)), np.ones(1), 'linear')])
+    os.utime(npz_file, (0, 0))
+    assert inference.load_model(h5_file).id != first.id
+    assert os.path.getmtime(npz_file) >= os.path.getmtime(h5_file)
+
+
+def test_agent_numpy_backend():
+    agent = AgentMCTSNN(os.path.join(MODELS_DIR, 'MCTSNN_default.npz'))
+    assert isinstance(agent.model, NumpyModel)
+
+    scores = agent.rollout_scores([Position(), Position(color=-1)])
+    assert len(scores) == 2 and -2 < scores[0] < 2
+
+
+def test_evaluation_cache():
+    cache = EvaluationCache(max_size=2)
+    cache.put('a', 1, 1, 0.5)
+    cache.put('a', 2, 1, 0.25)
+    assert cache.get('a', 1, 1) == 0.5
+    assert cache.get('b', 1, 1) is None
+    assert cache.get('a', 1, -1) is None
+
+    # the key 2 is the least recently used
+    cache.put('a', 3, 1, 0)
+    assert len(cache) == 2
+    assert cache.get('a', 2, 1) is None
+    assert cache.get('a', 3, 1) == 0
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_agent_evaluation_cache():
+    agent = AgentMCTSNN(os.path.join(MODELS_DIR, 'MCTSNN_default.npz'))
+    agent.evaluation_cache = EvaluationCache()
+    positions = [Position(), Position(color=-1)]
+
+    scores = agent.rollout_scores(positions)
+    assert agent.evaluation_cache.misses == 2
+    assert agent.rollout_scores(positions[::-1]) == scores[::-1]
+    assert agent.evaluation_cache.hits == 2
+
+    other = NumpyModel.load(os.path.join(MODELS_DIR, 'MCTSNN.npz'))
+    assert inference.model_id(other) != inference.model_id(agent.model)
+
+    # the weights of other models (e.g. Keras) can change, they are not cached
+    class TrainedModel:
+        def predict(self, data_in):
+            return np.zeros((len(data_in), 1))
+
+    agent = AgentMCTSNN(model=TrainedModel())
+    agent.evaluation_cache = EvaluationCache()
+    assert agent.rollout_scores(positions) == [0, 0]
+    assert len(agent.evaluation_cache) == 0
+
+
+def _predict_in_worker(client, data_in, results):
+    results.put(client.predict(data_in))
+
+
+def test_inference_server():
+    model_file = os.path.join(MODELS_DIR, 'MCTSNN_default.npz')
+    model = NumpyModel.load(model_file)
+    data_in = np.random.RandomState(0).randint(-1, 2, (40, 50))
+
+    with InferenceServer(model_file, num_clients=3, max_rows=16) as server:
+        client = server.client(0)
+        assert inference.model_id(client) == model.id
+        assert np.allclose(client.predict(data_in), model.predict(data_in), atol=1e-5)
+
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_predict_in_worker,
+                                           args=(server.client(i), data_in[i:i + 5], results))
+                   for i in (1, 2)]
+        for worker in workers:
+            worker.start()
+        outputs = [results.get(timeout=30) for _ in workers]
+        for worker in workers:
+            worker.join()
+
+    expected = [model.predict(data_in[i:i + 5]) for i in (1, 2)]
+    assert any(np.allclose(outputs[0], e, atol=1e-5) for e in expected)
+    assert any(np.allclose(outputs[1], e, atol=1e-5) for e in expected)
+    assert server.process is None
+
+
+def test_inference_server_stopped():
+    model_file = os.path.join(MODELS_DIR, 'MCTSNN_default.npz')
+    data_in = np.zeros((2, 50))
+
+    server = InferenceServer(model_file, num_clients=1)
+    with pytest.raises(RuntimeError):
+        server.client(0).predict(data_in)
+
+    # an answer written before the server stopped is still returned
+    client = server.client(0)
+    client.event.set()
+    client._wait()
+
+    # the process is killed without clearing the running flag
+    server.start()
+    client = server.client(0)
+    client.timeout = .5
+    server.process.terminate()
+    server.process.join()
+    with pytest.raises(RuntimeError):
+        client.predict(data_in)
@@ -0,0 +1,79 @@
+"""nn_evaluation.py test"""
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
+
+import subprocess
+import multiprocessing
+import pytest
+import numpy as np
+from connectFourLab.game.trainers import nn_evaluation
+
+
+def test_self_play_worker():
+    context = multiprocessing.get_context('spawn')
+    samples_queue, weights_queue = context.Queue(), context.Queue()
+    worker = context.Process(target=nn_evaluation.self_play_worker,
+                             args=(weights_queue, samples_queue))
+    worker.start()
+
+    for _ in range(3):
+        data_in, data_out = samples_queue.get(timeout=60)
+        assert len(data_in) == len(data_out) > 0
+        assert all(len(row) == 50 for row in data_in)
+        assert set(data_out) <= {-1, 0, 1}
+
+    weights_queue.put(None)
+    while worker.is_alive():
+        try:
+            samples_queue.get(timeout=1)
+        except Exception:
+            pass
+    worker.join()
+
+
+def test_self_play_worker_exception():
+    context = multiprocessing.get_context('spawn')
+    samples_queue, weights_queue = context.Queue(), context.Queue()
+    # the inputs do not fit the kernel, the agents fail in the first turn
+    layers = [(np.zeros((3, 1)), np.zeros(1), 'linear')]
+    worker = context.Process(target=nn_evaluation.self_play_worker,
+                             args=(weights_queue, samples_queue, layers))
+    worker.start()
+
+    with pytest.raises(RuntimeError) as error:
+        nn_evaluation.get_samples(samples_queue, [worker])
+    assert 'Traceback' in str(error.value)
+    worker.terminate()
+    worker.join()
+
+    # the worker is gone, nothing will be received
+    with pytest.raises(RuntimeError):
+        nn_evaluation.get_samples(samples_queue, [worker], timeout=.1)
+
+
+MAIN_SCRIPT = """
+import os, sys
+sys.path.insert(0, {root!r})
+if __name__ != '__main__':
+    # imported again by a worker (e.g. Kivy opening a window)
+    open({marker!r}, 'w').close()
+
+import multiprocessing
+from connectFourLab.game.trainers import nn_evaluation
+
+if __name__ == '__main__':
+    worker = multiprocessing.get_context('spawn').Process(target=os.getpid)
+    nn_evaluation.start_workers([worker])
+    worker.join()
+    sys.exit(worker.exitcode)
+"""
+
+
+def test_start_workers(tmpdir):
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+    marker = str(tmpdir.join('imported'))
+    script = tmpdir.join('run_app.py')
+    script.write(MAIN_SCRIPT.format(root=root, marker=marker))
+
+    assert subprocess.call([sys.executable, str(script)], timeout=60) == 0
+    assert not os.path.exists(marker)
@@ -0,0 +1,33 @@
+"""openings.py test"""
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
+
+from connectFourLab.game import openings
+from connectFourLab.game.position import Position
+
+
+def test_all_openings():
+    assert len(openings.all_openings(1)) == 4
+    # 49 pairs of moves, all mirrored except (3, 3)
+    assert len(openings.all_openings(2)) == 25
+
+
+def test_generate_openings(tmpdir):
+    engine = openings.OpeningEngine(depth=4, num_simulations=50)
+    suite = openings.generate_openings(2, num_openings=5, max_score=1, engine=engine, seed=1)
+    assert len(suite) == 5 and all(len(columns) == 2 for columns in suite)
+    assert openings.generate_openings(2, max_score=-1, engine=engine) == []
+
+    file = os.path.join(str(tmpdir), 'openings.txt')
+    openings.save_openings(suite, file)
+    assert openings.load_openings(file) == suite
+
+
+def test_default_openings():
+    suite = openings.load_openings()
+    assert len(suite) > 100
+    for columns in suite:
+        position = Position()
+        for column in columns:
+            position.play(column)
+        assert position.num_moves == 4 and position.winner() is None
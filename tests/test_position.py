@@ -0,0 +1,86 @@
+"""position.py test"""
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
+
+import pytest
+import numpy as np
+from connectFourLab.game import helpers
+from connectFourLab.game.position import Position, BITS, playable_squares, winning_squares
+
+
+def test_play_undo():
+    position = Position()
+    for column in [0, 1, 0, 1, 0, 1]:
+        position.play(column)
+
+    assert position.heights[0] == 3 and position.heights[1] == 3
+    assert position.color == 1
+    assert position.winner() is None
+
+    assert position.play(0) == 3
+    assert position.winner() == 1
+    assert position.last_move == (0, 3)
+
+    assert position.undo() == (0, 3)
+    assert position.winner() is None
+    assert position.color == 1
+    assert position.num_moves == 6
+
+    with pytest.raises(IndexError):
+        position.play(7)
+
+    for _ in range(7):
+        position.play(6)
+
+    with pytest.raises(ValueError):
+        position.play(6)
+
+
+def test_board_conversion():
+    board = np.zeros((7,7), dtype=int)
+    board[0,3] = 1
+    board[1,2] = 1
+    board[2,1] = 1
+    board[3,0] = 1
+    board[0,2] = -1
+    board[0,1] = -1
+    board[0,0] = -1
+    board[1,1] = -1
+    board[1,0] = 1
+    board[2,0] = -1
+
+    position = Position(board)
+    assert np.all(position.to_board() == board)
+    assert position.winner() == helpers.check_winner(board) == 1
+    assert (position.bit_boards[1], position.bit_boards[-1]) \
+        == helpers.bit_board_split(board)
+
+    for column, row in helpers.available_positions(position):
+        assert helpers.next_position(board, column) == row
+        assert helpers.next_position(position, column) == row
+
+    switched = Position(board, perspective=-1)
+    assert np.all(switched.to_board() == -board)
+    assert switched.winner() == -1
+
+
+def test_threat_masks():
+    position = Position()
+    for column in [0, 6, 1, 6, 2]:
+        position.play(column)
+
+    p1, p2 = position.bit_boards[1], position.bit_boards[-1]
+    occupied = p1 | p2
+    assert playable_squares(occupied) == sum([BITS[0][1], BITS[1][1], BITS[2][1],
+                                              BITS[3][0], BITS[4][0], BITS[5][0],
+                                              BITS[6][2]])
+    assert winning_squares(p1, occupied) == BITS[3][0]
+    assert winning_squares(p2, occupied) == 0
+
+    position.play(6)
+    p2 = position.bit_boards[-1]
+    assert winning_squares(p2, occupied | p2) == BITS[6][3]
+
+    masks = np.array([p1, p2], dtype=np.uint64)
+    squares = winning_squares(masks, np.uint64(occupied | p2))
+    assert [int(s) for s in squares] == [BITS[3][0], BITS[6][3]]
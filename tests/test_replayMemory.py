@@ -0,0 +1,66 @@
+"""replayMemory.py test"""
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
+
+import pytest
+import numpy as np
+from connectFourLab.game.trainers.replayMemory import ReplayMemory
+
+
+def test_replay_memory():
+    memory = ReplayMemory(10, board_size=4)
+    boards = np.arange(24).reshape(6, 4)
+    memory.add(boards, [1, -1]*3, np.arange(6))
+    assert len(memory) == 6
+
+    memory.add(boards + 100, [1, -1]*3, np.arange(6, 12))
+    assert len(memory) == memory.capacity == 10
+    # the two oldest samples were replaced
+    assert sorted(memory.targets) == list(range(2, 12))
+
+    data_in, data_out = memory.sample(32)
+    assert data_in.shape == (32, 5) and data_in.dtype == np.float32
+    assert data_out.shape == (32,)
+    for row, target in zip(data_in, data_out):
+        index = list(memory.targets).index(target)
+        assert list(row[:-1]) == list(memory.boards[index])
+        assert row[-1] == (1 if target % 2 == 0 else -1)
+
+
+def test_replay_memory_file(tmpdir):
+    file = os.path.join(str(tmpdir), 'memory')
+    memory = ReplayMemory(8, board_size=4)
+    memory.add(np.ones((5, 4)), [1]*5, [.5]*5)
+    memory = memory.save(file)
+    memory.add(-np.ones((5, 4)), [-1]*5, [-.5]*5)
+    memory.flush()
+    del memory
+
+    memory = ReplayMemory(file=file)
+    assert len(memory) == memory.capacity == 8
+    assert memory.meta[1] == 2
+    assert list(memory.targets) == [-.5]*2 + [.5]*3 + [-.5]*3
+    del memory
+
+    # the files are not resized
+    assert ReplayMemory(8, 4, file=file).capacity == 8
+    with pytest.raises(ValueError):
+        ReplayMemory(16, file=file)
+    with pytest.raises(ValueError):
+        ReplayMemory(board_size=49, file=file)
+
+    # saving a new memory replaces the files of another capacity
+    memory = ReplayMemory(4, board_size=4)
+    memory.add(np.ones((2, 4)), [1]*2, [1.]*2)
+    memory.save(file)
+    del memory
+    memory = ReplayMemory(file=file)
+    assert len(memory) == 2 and memory.capacity == 4
+
+
+def test_replay_memory_from_list():
+    data = [[[0]*49 + [1], 1], [[1]*49 + [-1], -1]]
+    memory = ReplayMemory.from_list(data, capacity=1)
+    assert len(memory) == 2
+    data_in, _ = memory.sample(10)
+    assert set(data_in[:, -1]) <= {1, -1}
@@ -0,0 +1,305 @@
+"""strategies test"""
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
+
+import numpy as np
+from connectFourLab.game.position import Position
+from connectFourLab.game.agents.strategies import SimulationStrategy, TreeSearchStrategy
+from connectFourLab.game.agents.strategies import TranspositionTable, TreeStore, Node
+from connectFourLab.game.agents.strategies.transposition import EXACT, LOWER_BOUND
+from connectFourLab.game.agents.monteCarlo import AgentMonteCarlo
+
+
+def test_simulate_batch():
+    strategy = SimulationStrategy()
+
+    board = np.zeros((7,7), dtype=int)
+    board[0,:4] = 1
+    assert strategy.simulate_batch(board, -1, 10) == (10, 0, 0)
+
+    wins, draws, losses = strategy.simulate_batch(Position(), num_simulations=50)
+    assert wins + draws + losses == 50
+
+    # only one empty position left, no line can be made
+    board = np.array([[1 if (column//2 + row) % 2 == 0 else -1
+                       for row in range(7)] for column in range(7)])
+    board[6,6] = 0
+    assert strategy.simulate_batch(board, 1, 5) == (0, 5, 0)
+
+
+def test_smart_rollout_policy():
+    strategy = SimulationStrategy()
+    strategy.rollout_policy = 'smart'
+
+    # id 1 plays next and wins in the column 0
+    board = np.zeros((7,7), dtype=int)
+    board[0,:3] = 1
+    board[1:4,0] = -1
+    assert strategy.simulate(board, 1) == 1
+    assert strategy.simulate_batch(board, 1, 20) == (20, 0, 0)
+
+
+def test_iterative_deepening():
+    strategy = TreeSearchStrategy()
+
+    # id 1 plays next and wins in the column 3
+    position = Position()
+    for column in [0, 0, 1, 1, 2, 2]:
+        position.play(column)
+    assert strategy.iterative_deepening(position, 4)[1] == 3
+    assert position.num_moves == 6
+
+    # id -1 plays next and must block the column 3
+    position.play(6)
+    assert strategy.iterative_deepening(position, 4)[1] == 3
+
+    strategy.time_out = True
+    assert strategy.iterative_deepening(Position())[1] == 3
+
+    # no time for the first depth, the win and the block are still found
+    position = Position()
+    for column in [0, 6, 0, 6, 0]:
+        position.play(column)
+    assert strategy.iterative_deepening(position)[1] == 0
+    position.play(5)
+    assert strategy.iterative_deepening(position)[1] == 0
+    position.undo()
+    position.undo()
+    assert strategy.iterative_deepening(position)[1] == 3
+
+
+def test_child_moves():
+    strategy = TreeSearchStrategy()
+
+    position = Position()
+    for _ in range(7):
+        position.play(3)
+    key = position.key()
+
+    columns = []
+    for column, row in strategy.child_moves(position):
+        assert position.history[-1] == column
+        assert position.last_move == (column, row)
+        columns.append(column)
+    assert columns == [2, 4, 1, 5, 0, 6]
+    assert position.key() == key
+
+    for column, row in strategy.child_moves(position):
+        break
+    assert position.key() == key
+    assert position.num_moves == 7
+
+
+def test_transposition_table():
+    table = TranspositionTable(size_mb=0, bucket_size=2)
+    assert table.capacity == 2
+    assert table.get(7) is None
+
+    table.put(7, -3, 5, LOWER_BOUND, 4)
+    assert table.get(7) == (-3, 5, LOWER_BOUND, 4)
+
+    # shallower entry of the same key is ignored
+    assert not table.put(7, 1, 2, LOWER_BOUND)
+    table.put(1 << 63, 0.5, 1)
+    assert table.get(1 << 63) == (0.5, 1, EXACT, None)
+
+    # bucket is full, the shallowest entry is replaced
+    table.put(11, 2, 3)
+    assert table.get(1 << 63) is None
+    assert table.get(7) is not None and table.get(11) is not None
+
+    # entries of older searches are replaced first
+    table.new_search()
+    table.put(11, 2, 3)
+    table.put(13, 1, 1)
+    assert table.get(7) is None and len(table) == 2
+
+    position = Position()
+    position.play(3)
+    keys = {position.key()}
+    position.undo()
+    position.color = -1
+    position.play(3)
+    keys.add(position.key())
+    assert len(keys) == 2
+
+
+def test_zobrist_hash():
+    strategy = TreeSearchStrategy()
+    assert strategy.zobrist_table.dtype == np.uint64
+
+    board = np.zeros((7,7), dtype=int)
+    hash = strategy.hash(board, 1)
+    for column, color in [(3, 1), (3, -1), (2, 1)]:
+        row = np.count_nonzero(board[column])
+        board[column, row] = color
+        hash = strategy.update_hash(hash, column, row, color)
+        assert hash == strategy.hash(board, -color)
+
+    board[2,0] = 0
+    assert strategy.update_hash(hash, 2, 0, 1) == strategy.hash(board, 1)
+
+
+def test_tree_store():
+    # id 1 plays next and wins in the column 3
+    position = Position()
+    for column in [0, 0, 1, 1, 2, 2]:
+        position.play(column)
+
+    tree = TreeStore(lambda position: 0, capacity=100)
+    tree.reset(position)
+    for _ in range(300):
+        if not tree.search():
+            break
+
+    assert len(tree) <= 100
+    assert tree.best_move() == 3
+    children = tree.children[tree.root, :tree.num_children[tree.root]]
+    assert tree.visits[tree.root] == tree.visits[children].sum()
+    assert tree.position.key() == position.key()
+
+    tree.reset(Position())
+    assert len(tree) == 1
+    assert tree.search()
+    assert tree.visits[tree.root] == 1
+
+
+def test_tree_store_transpositions():
+    tree = TreeStore(lambda position: 0, capacity=100)
+    tree.reset(Position())
+
+    def walk(columns):
+        position, node = tree.position.copy(), tree.root
+        for column in columns:
+            if not tree.expanded[node]:
+                assert tree.expand(node, position)
+            slot = list(tree.moves[node]).index(column)
+            node = tree.children[node, slot]
+            position.play(column)
+        return node
+
+    node = walk([0, 1, 2])
+    size = len(tree)
+    assert walk([2, 1, 0]) == node
+    assert len(tree) == size + 7 + 6
+    assert len(tree.nodes) == len(tree)
+
+    for _ in range(50):
+        tree.search()
+    children = tree.children[tree.root, :tree.num_children[tree.root]]
+    assert tree.visits[tree.root] == tree.visits[children].sum()
+
+
+def test_node_transpositions():
+    class NodeZero(Node):
+        def rollout_score(self):
+            return 0
+
+    memory = {}
+    root = NodeZero(np.zeros((7,7), dtype=int), memory)
+
+    def child(node, column):
+        # no full columns, one child per column
+        return node.children()[column]
+
+    node = child(child(child(root, 0), 1), 2)
+    assert child(child(child(root, 2), 1), 0) is node
+    assert memory[node._hash] is node
+
+    path = [root, child(root, 2), child(child(root, 2), 1)]
+    assert node.rollout(path)
+    assert node.visits == 1 and root.visits == 1
+    assert child(root, 0).visits == 0
+
+
+def test_node_terminal():
+    class NodeZero(Node):
+        def rollout_score(self):
+            return 0
+
+    board = np.zeros((7,7), dtype=int)
+    board[0,:3] = 1
+    board[1,:3] = -1
+    root = NodeZero(board, {})
+    assert root.winner is None
+
+    # the win is not expanded, it is scored in every visit
+    won = root.children()[0]
+    assert won.winner == 1 and won.children() is None
+    for visits in range(1, 4):
+        assert won.rollout([root])
+        assert won.visits == visits and won.value == 1
+    assert root.visits == 3
+
+    assert NodeZero(won.board, {}, color=-1).children() is None
+
+
+def test_tree_store_reroot():
+    tree = TreeStore(lambda position: 0, capacity=1000)
+    position = Position()
+    tree.reset(position)
+    for _ in range(300):
+        tree.search()
+
+    position.play(3)
+    position.play(2)
+    node = tree.nodes[position.key()]
+    visits, size = tree.visits[node], len(tree)
+
+    assert tree.reroot(position)
+    assert tree.visits[tree.root] == visits
+    assert len(tree) == len(tree.nodes) < size
+    assert tree.nodes[position.key()] == tree.root
+    assert (tree.children[:len(tree)] < len(tree)).all()
+    assert not tree.visits[len(tree):].any()
+
+    # every key still points to the node of its position
+    for slot in range(tree.num_children[tree.root]):
+        position.play(int(tree.moves[tree.root, slot]))
+        assert tree.nodes[position.key()] == tree.children[tree.root, slot]
+        position.undo()
+
+    for _ in range(50):
+        assert tree.search()
+
+    for column in [0]*7 + [1]*2:
+        position.play(column)
+    assert not tree.reroot(position)
+    assert len(tree) == 1
+
+
+def test_tree_store_search_batch():
+    batches = []
+
+    def rollout_scores(positions):
+        batches.append(len(positions))
+        return [0]*len(positions)
+
+    tree = TreeStore(lambda position: 0, capacity=1000, rollout_scores=rollout_scores)
+    tree.reset(Position())
+    for _ in range(20):
+        assert tree.search_batch(8)
+
+    # the first batch gets a different child of the root for each leaf
+    assert batches[0] == 7
+    assert max(batches) == 8
+    assert tree.visits[tree.root] == sum(batches)
+    assert not tree.value_sums[:len(tree)].any()
+    assert tree.position.num_moves == 0
+
+
+def test_monte_carlo_no_iterations():
+    board = np.zeros((7,7), dtype=int)
+    agent = AgentMonteCarlo()
+    agent.id = 1
+    agent.num_simulations = 10
+
+    # the time of the turn is already over
+    agent.time_out = True
+    agent.start_search(board)
+    assert agent.best_position in range(7)
+
+    # the tree is full after the root
+    agent.tree_capacity = 1
+    agent.start_search(board)
+    assert agent.best_position in range(7)
@@ -0,0 +1,82 @@
+"""tournament.py test"""
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
+
+import pytest
+from connectFourLab.game.tournament import Tournament, ResultCache, agent_key, fit_ratings
+from connectFourLab.game.agents import AgentRandom
+from connectFourLab.game.agents.monteCarlo import AgentSimulation, AgentMonteCarlo
+
+
+def test_fit_ratings():
+    ratings, errors = fit_ratings(3, {(0, 1): (10, 0, 10), (1, 2): (5, 10, 5), (0, 2): (8, 4, 8)})
+    assert abs(ratings).max() < 1e-6
+    assert (errors > 0).all()
+
+    ratings, errors = fit_ratings(3, {(0, 1): (20, 0, 0), (1, 2): (15, 0, 5)})
+    assert ratings[0] > ratings[1] > ratings[2]
+    assert abs(ratings.sum()) < 1e-6
+    # 75% score is about 191 points
+    assert 150 < ratings[1] - ratings[2] < 191
+    assert errors[0] < float('inf')
+
+    more, more_errors = fit_ratings(3, {(0, 1): (200, 0, 0), (1, 2): (150, 0, 50)})
+    assert (more_errors < errors).all()
+
+
+def test_agent_key(tmpdir):
+    file = os.path.join(str(tmpdir), 'model.npz')
+    with open(file, 'w') as f:
+        f.write('one')
+
+    key = agent_key(AgentMonteCarlo, {'model_file': file})
+    assert key == agent_key(AgentMonteCarlo, {'model_file': file})
+    assert key != agent_key(AgentMonteCarlo)
+    assert agent_key(AgentMonteCarlo) != agent_key(AgentSimulation)
+
+    with open(file, 'w') as f:
+        f.write('two')
+    assert key != agent_key(AgentMonteCarlo, {'model_file': file})
+
+
+def test_tournament(tmpdir):
+    file = os.path.join(str(tmpdir), 'cache.json')
+    simulation = (AgentSimulation, {'num_simulations': 5})
+    tournament = Tournament([AgentRandom, simulation], games_per_pair=4,
+                            num_workers=0, cache=file)
+    assert len(tournament.tasks()) == 4
+    tournament.run()
+    assert tournament.tasks() == []
+    wins, draws, losses = tournament.results()[0, 1]
+    assert wins + draws + losses == 4
+
+    # only the games of the new agent, the cache was saved in the file
+    played = []
+    new_agent = (AgentSimulation, {'num_simulations': 3})
+    tournament = Tournament([simulation, AgentRandom, new_agent], games_per_pair=4,
+                            num_workers=0, cache=ResultCache(file))
+    assert tournament.results()[0, 1] == (losses, draws, wins)
+    assert [task['pairing'] for task in tournament.tasks()] == [(0, 2)]*4 + [(1, 2)]*4
+
+    tournament.run(lambda result, i, j: played.append((i, j)))
+    assert sorted(played) == [(0, 2)]*4 + [(1, 2)]*4
+    assert tournament.tasks() == []
+    assert 'AgentRandom' in tournament.table()
+
+
+def test_tournament_setting():
+    # the time limit of the API (30) and of the command line (30.0)
+    cache = ResultCache()
+    tournament = Tournament([AgentRandom, AgentSimulation], time_limit=30, cache=cache)
+    cache.add(tournament.keys[0], tournament.keys[1], tournament.setting, {'result': 'win'})
+
+    tournament = Tournament([AgentRandom, AgentSimulation], time_limit=30.0, cache=cache)
+    assert tournament.results()[0, 1] == (1, 0, 0)
+    tournament = Tournament([AgentRandom, AgentSimulation], cache=cache)
+    assert tournament.results()[0, 1] == (0, 0, 0)
+
+
+def test_tournament_duplicate_agents():
+    simulation = (AgentSimulation, {'num_simulations': 5})
+    with pytest.raises(ValueError):
+        Tournament([simulation, AgentRandom, (AgentSimulation, {'num_simulations': 5})])
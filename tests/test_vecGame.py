@@ -0,0 +1,79 @@
+"""vecGame.py test"""
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
+
+import pytest
+import numpy as np
+from connectFourLab.game.vecGame import VecRunGame
+from connectFourLab.game.game import InvalidColumn
+from connectFourLab.game.position import Position
+from connectFourLab.game.helpers import bit_board_split_batch
+from connectFourLab.game.agents import AgentBase, AgentRandom
+from connectFourLab.game.agents.monteCarlo import AgentSimulation
+
+
+class AgentFirstColumn(AgentBase):
+    name = 'First column'
+
+    def action(self, board):
+        return next(column for column in range(7) if board[column, -1] == 0)
+
+
+class AgentBroken(AgentBase):
+    name = 'Broken'
+
+    def action(self, board):
+        return 7
+
+
+def test_vec_game():
+    game = VecRunGame(AgentRandom, AgentFirstColumn, num_games=16, record=True)
+    results = game.run(100)
+    assert game.games_played == sum(results.values()) == len(game.episodes) >= 100
+
+    for episode in game.episodes[:20]:
+        position = Position(color=episode['colors'][0])
+        for board, color, column in zip(episode['boards'], episode['colors'],
+                                        episode['columns']):
+            assert (board == position.to_board()).all()
+            assert color == position.color
+            position.play(column)
+
+        assert (episode['board'] == position.to_board()).all()
+        assert episode['winner'] == position.winner()
+
+
+def test_vec_game_invalid_column():
+    with pytest.raises(InvalidColumn):
+        VecRunGame(AgentRandom, AgentBroken, num_games=4, first_player_randomized=False).run(1)
+
+
+def test_actions():
+    boards = np.zeros((3, 7, 7), dtype=np.int8)
+    boards[:, 0] = [1, -1, 1, -1, 1, -1, 1]
+    boards[1, 3, :3] = -1
+    boards[2, 4, :3] = 1
+
+    agent = AgentFirstColumn()
+    assert list(agent.actions(boards)) == [1, 1, 1]
+    assert all(AgentRandom().actions(boards) != 0)
+
+    # wins in the column 3 or blocks the column 4
+    agent = AgentSimulation()
+    agent.id = -1
+    agent.rollout_policy = 'smart'
+    assert list(agent.actions(boards)[1:]) == [3, 4]
+
+
+def test_simulate_positions():
+    boards = np.zeros((3, 7, 7), dtype=np.int8)
+    boards[1, 3, :4] = -1
+    boards[2, 2, :3] = 1
+
+    agent = AgentSimulation()
+    agent.rollout_policy = 'smart'
+    winners = agent.simulate_positions(bit_board_split_batch(boards),
+                                       np.count_nonzero(boards, axis=2), [1, 1, 1])
+    # already won and won in the first move
+    assert list(winners[1:]) == [-1, 1]
+    assert winners[0] in (1, 0, -1)